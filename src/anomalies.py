@@ -0,0 +1,194 @@
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Daily totals alerts are computed from, named as in rollups.ROLLUP_MEASURES
+ALERT_DAILY_MEASURES = ['revenue', 'orders', 'review_score_sum', 'review_score_count']
+
+# Measures every category (and the day's total) is checked on
+ALERT_MEASURES = ['revenue', 'orders', 'rating']
+
+# How far from its usual value a day must be, in standard deviations, to be flagged
+ALERT_Z_THRESHOLD = 3.5
+
+# Days of history each day is compared against, and how many of them must have a value
+ALERT_HISTORY_DAYS = 28
+ALERT_MIN_HISTORY_DAYS = 14
+
+# Daily ratings built from fewer reviews are too noisy to score
+ALERT_MIN_REVIEWS = 5
+
+# Smallest spread a day is scored against, per measure, and as a fraction of the usual
+# value. Sparse categories have a near-zero median absolute deviation, which would
+# turn a single ordinary order into a deviation of hundreds of standard deviations.
+ALERT_MIN_SPREAD = {'revenue': 100.0, 'orders': 2.0, 'rating': 0.5}
+ALERT_MIN_RELATIVE_SPREAD = 0.1
+
+# 'robust' scores against the median and median absolute deviation,
+# 'zscore' against the mean and standard deviation
+ALERT_METHODS = ['robust', 'zscore']
+
+# Makes the median absolute deviation of normal data match its standard deviation
+MAD_SCALE = 1.4826
+
+# Column label of the all-category daily totals
+TOTAL_CATEGORY_LABEL = 'All categories'
+
+def build_daily_grids(product_lines, review_lines, start_date, end_date):
+    """
+    Lay order lines out as dense (days x categories) arrays of daily totals.
+    
+    Args:
+        product_lines (pandas.DataFrame): Order lines with 'order_id', 'price',
+            'order_purchase_timestamp' and 'product_category_name_english'.
+        review_lines (pandas.DataFrame): The same lines joined with their reviews ('review_score').
+        start_date (str): First day of the grid.
+        end_date (str): Last day of the grid (whole day included).
+    
+    Returns:
+        dict: Daily grids with keys:
+            - dates: DatetimeIndex of the grid's rows
+            - categories: Index of the grid's columns (named categories only)
+            - grids: {measure: array of shape (days, categories)} for ALERT_DAILY_MEASURES;
+              'orders' counts distinct orders with an item in the category, as in the rollup
+    """
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+    categories = pd.Index(sorted(set(product_lines['product_category_name_english'].dropna()) |
+                                 set(review_lines['product_category_name_english'].dropna())))
+    
+    def accumulate(lines, weights=None):
+        # One flat cell index per line, so every cell is summed in a single bincount
+        day_codes = (lines['order_purchase_timestamp'].dt.normalize() - dates[0]).dt.days.to_numpy()
+        category_codes = categories.get_indexer(lines['product_category_name_english'])
+        in_grid = (category_codes >= 0) & (day_codes >= 0) & (day_codes < len(dates))
+        cells = day_codes[in_grid] * len(categories) + category_codes[in_grid]
+        if weights is not None:
+            weights = np.asarray(weights, dtype='float64')[in_grid]
+        grid = np.bincount(cells, weights=weights, minlength=len(dates) * len(categories))
+        return grid.astype('float64').reshape(len(dates), len(categories))
+    
+    reviewed = review_lines[review_lines['review_score'].notna()]
+    grids = {
+        'revenue': accumulate(product_lines, product_lines['price']),
+        'orders': accumulate(product_lines.drop_duplicates(['order_id', 'product_category_name_english'])),
+        'review_score_sum': accumulate(reviewed, reviewed['review_score']),
+        'review_score_count': accumulate(reviewed)
+    }
+    
+    return {'dates': dates, 'categories': categories, 'grids': grids}
+
+def get_alert_values(daily_grids, min_reviews=ALERT_MIN_REVIEWS):
+    """
+    Turn daily grids into the values alerts are scored on, with an extra all-category column.
+    
+    Args:
+        daily_grids (dict): Grids returned by build_daily_grids() or rollups.get_rollup_daily_grids().
+        min_reviews (int): Fewest reviews a daily rating needs; others are NaN.
+    
+    Returns:
+        dict: Array of shape (days, categories + 1) per measure in ALERT_MEASURES.
+    """
+    grids = daily_grids['grids']
+    
+    def with_total(grid):
+        return np.column_stack([grid, grid.sum(axis=1)])
+    
+    review_score_sum = with_total(grids['review_score_sum'])
+    review_score_count = with_total(grids['review_score_count'])
+    
+    return {
+        # Prices are in cents, so rounding drops float noise left by prefix-sum differences
+        'revenue': with_total(grids['revenue']).round(2),
+        'orders': with_total(grids['orders']),
+        'rating': np.where(
+            review_score_count >= min_reviews,
+            review_score_sum / np.maximum(review_score_count, 1),
+            np.nan
+        )
+    }
+
+def score_against_history(values, history_days=ALERT_HISTORY_DAYS, min_history_days=ALERT_MIN_HISTORY_DAYS, method='robust',
+                          min_spread=0.0, min_relative_spread=ALERT_MIN_RELATIVE_SPREAD):
+    """
+    Score every day after the first history_days rows against the days just before it.
+    
+    All columns and days are scored at once on a (days x columns x history_days)
+    view of the array, without copying it.
+    
+    Args:
+        values (numpy.ndarray): Daily values of shape (days, columns); NaN marks days without a value.
+        history_days (int): Days of history each day is compared against.
+        min_history_days (int): Fewest history days with a value for a day to be scored.
+        method (str): 'robust' (median and MAD) or 'zscore' (mean and standard deviation).
+        min_spread (float): Smallest spread a day is scored against, in the unit of values.
+        min_relative_spread (float): Smallest spread as a fraction of the expected value.
+    
+    Returns:
+        tuple: (expected, z_scores), arrays of shape (days - history_days, columns);
+            z_scores is NaN where a day cannot be scored (too little history, or a
+            flat history of zeros without a spread floor).
+    """
+    if method not in ALERT_METHODS:
+        raise ValueError(f"Unknown alert method: {method}")
+    
+    # history[i] holds the history_days rows before row history_days + i
+    history = sliding_window_view(values[:-1], history_days, axis=0)
+    current = values[history_days:]
+    
+    # Histories without any value yield NaN, which is handled below
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if method == 'robust':
+            expected = np.nanmedian(history, axis=-1)
+            spread = MAD_SCALE * np.nanmedian(np.abs(history - expected[..., np.newaxis]), axis=-1)
+        else:
+            expected = np.nanmean(history, axis=-1)
+            spread = np.nanstd(history, axis=-1, ddof=1)
+    
+    # Near-flat histories would make any small change look extreme
+    spread = np.fmax(spread, np.fmax(min_spread, min_relative_spread * np.abs(expected)))
+    
+    observed_days = np.count_nonzero(~np.isnan(history), axis=-1)
+    scored = (observed_days >= min_history_days) & (spread > 0) & ~np.isnan(current)
+    z_scores = np.divide(current - expected, spread, out=np.full(current.shape, np.nan), where=scored)
+    return expected, z_scores
+
+def detect_anomalies(daily_grids, threshold=ALERT_Z_THRESHOLD, history_days=ALERT_HISTORY_DAYS,
+                     min_history_days=ALERT_MIN_HISTORY_DAYS, min_reviews=ALERT_MIN_REVIEWS, method='robust'):
+    """
+    Flag the days on which a category's revenue, orders or rating deviated from its own history.
+    
+    Args:
+        daily_grids (dict): Grids covering history_days before the reported days and the reported days,
+            as returned by build_daily_grids() or rollups.get_rollup_daily_grids().
+        threshold (float): Absolute z-score at or above which a day is flagged.
+        history_days (int): Days of history each day is compared against.
+        min_history_days (int): Fewest history days with a value for a day to be scored.
+        min_reviews (int): Fewest reviews a daily rating needs to be scored.
+        method (str): 'robust' (median and MAD) or 'zscore' (mean and standard deviation).
+    
+    Returns:
+        pandas.DataFrame: One row per flagged day, category and measure, with columns 'date',
+            'category' (TOTAL_CATEGORY_LABEL for the day's total), 'measure', 'value', 'expected'
+            and 'z_score', largest deviation first.
+    """
+    columns = daily_grids['categories'].append(pd.Index([TOTAL_CATEGORY_LABEL]))
+    dates = daily_grids['dates'][history_days:]
+    
+    alerts = []
+    for measure, values in get_alert_values(daily_grids, min_reviews).items():
+        expected, z_scores = score_against_history(values, history_days, min_history_days, method, ALERT_MIN_SPREAD[measure])
+        day_positions, column_positions = np.nonzero(np.abs(np.nan_to_num(z_scores)) >= threshold)
+        alerts.append(pd.DataFrame({
+            'date': dates[day_positions],
+            'category': columns[column_positions],
+            'measure': measure,
+            'value': values[history_days:][day_positions, column_positions],
+            'expected': expected[day_positions, column_positions],
+            'z_score': z_scores[day_positions, column_positions]
+        }))
+    
+    alerts = pd.concat(alerts, ignore_index=True)
+    order = np.argsort(-np.abs(alerts['z_score'].to_numpy()), kind='stable')
+    return alerts.iloc[order].reset_index(drop=True)
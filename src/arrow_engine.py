@@ -0,0 +1,269 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.acero as acero
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from data_processor import (
+    TABLE_SCHEMAS,
+    get_table_cache,
+    get_window_bounds,
+    add_derived_columns,
+    get_delivery_days,
+    clean_product_categories
+)
+
+# Tables the Arrow engine scans
+ARROW_TABLES = ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews', 'order_payment', 'customers']
+
+def open_arrow_datasets(file_paths, table_names=ARROW_TABLES):
+    """
+    Open the Feather copy of every table as an in-memory Arrow dataset.
+    
+    Feather copies are compressed, so the file-backed datasets would decompress
+    them again on every scan; reading them once into memory leaves each query
+    plan only its column and row selection to do.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        table_names (list): Tables to open (default: ARROW_TABLES).
+    
+    Returns:
+        dict: pyarrow.dataset.Dataset per table name.
+    """
+    return {
+        table_name: ds.dataset(ds.dataset(get_table_cache(file_paths[table_name], table_name), format='ipc').to_table())
+        for table_name in table_names
+    }
+
+def declare_scan(dataset, columns, filter_expression=None):
+    """
+    Declare a scan of some columns of a dataset.
+    
+    Only the listed columns are read, and the filter is pushed down to the scan
+    as well as applied by a filter node, as Acero requires. Dictionary
+    (categorical) columns are decoded to strings, since hash joins cannot match
+    or safely carry them; restore_categoricals() re-encodes them.
+    
+    Args:
+        dataset (pyarrow.dataset.Dataset): Dataset returned by open_arrow_datasets().
+        columns (list): Columns to read.
+        filter_expression (pyarrow.compute.Expression, optional): Rows to keep.
+    
+    Returns:
+        pyarrow.acero.Declaration: Plan producing the requested columns.
+    """
+    nodes = [acero.Declaration('scan', acero.ScanNodeOptions(dataset, columns=columns, filter=filter_expression))]
+    if filter_expression is not None:
+        nodes.append(acero.Declaration('filter', acero.FilterNodeOptions(filter_expression)))
+    
+    expressions = [
+        pc.field(column).cast(pa.string()) if pa.types.is_dictionary(dataset.schema.field(column).type) else pc.field(column)
+        for column in columns
+    ]
+    nodes.append(acero.Declaration('project', acero.ProjectNodeOptions(expressions, columns)))
+    return acero.Declaration.from_sequence(nodes)
+
+def declare_join(probe, probe_columns, build, build_columns, keys, join_type='inner'):
+    """
+    Declare a hash join of two inputs on columns named the same on both sides.
+    
+    Acero builds its hash table from the build input, so it should be the
+    smaller one: the rows of a date window rather than a whole table.
+    
+    Args:
+        probe (pyarrow.acero.Declaration): Input streamed through the hash table.
+        probe_columns (list): Probe columns to keep, without the keys.
+        build (pyarrow.acero.Declaration): Input the hash table is built from.
+        build_columns (list): Build columns to keep, keys included.
+        keys (list): Join columns.
+        join_type (str): Acero join type, e.g. 'inner' or 'right outer' to keep
+            every build row (default: 'inner').
+    
+    Returns:
+        tuple: (declaration, columns) of the plan producing the joined rows.
+    """
+    # Acero only honours right_output when left_output is given too
+    options = acero.HashJoinNodeOptions(join_type, keys, keys, left_output=probe_columns, right_output=build_columns)
+    return acero.Declaration('hashjoin', options, inputs=[probe, build]), probe_columns + build_columns
+
+def get_window_filter(start_date, end_date):
+    """
+    Build the purchase-time filter of one date window.
+    
+    Args:
+        start_date (str): First date of the window (inclusive).
+        end_date (str): Last date of the window (inclusive, whole day for a date-only bound).
+    
+    Returns:
+        pyarrow.compute.Expression: Filter on 'order_purchase_timestamp'.
+    """
+    start, end, end_is_exclusive = get_window_bounds(start_date, end_date)
+    timestamp = pc.field('order_purchase_timestamp')
+    start = pa.scalar(pd.Timestamp(start).as_unit('ns').value, pa.timestamp('ns'))
+    end = pa.scalar(pd.Timestamp(end).as_unit('ns').value, pa.timestamp('ns'))
+    return (timestamp >= start) & ((timestamp < end) if end_is_exclusive else (timestamp <= end))
+
+def declare_period_orders(datasets, columns, periods):
+    """
+    Declare the orders of several date windows, each tagged with its period label.
+    
+    Every window is its own filtered scan, so overlapping windows each keep
+    their rows. The scans run right away, since windows are small, and their
+    concatenation feeds a single plan for all periods (an Acero union of the
+    scans crashes the later conversion to pandas).
+    
+    Args:
+        datasets (dict): Datasets returned by open_arrow_datasets().
+        columns (list): Order columns to read.
+        periods (list): (label, start_date, end_date) tuples, as for
+            data_processor.load_period_orders_data().
+    
+    Returns:
+        tuple: (declaration, columns) of the plan producing the tagged orders.
+    """
+    windows = []
+    for label, start_date, end_date in periods:
+        window = declare_scan(datasets['orders'], columns, get_window_filter(start_date, end_date)).to_table(use_threads=True)
+        windows.append(window.append_column('period', pa.array([label] * window.num_rows, pa.string())))
+    orders = acero.TableSourceNodeOptions(pa.concat_tables(windows))
+    return acero.Declaration('table_source', orders), columns + ['period']
+
+def declare_period_lines(datasets, joined_tables, periods):
+    """
+    Declare the plan returning the order lines of several date windows.
+    
+    Args:
+        datasets (dict): Datasets returned by open_arrow_datasets().
+        joined_tables (list): Tables to join onto the orders, as for
+            sqlite_store.build_window_query(): 'ordered_items', 'products' (with category
+            translations), 'order_reviews' and 'customers' (left join, state only).
+        periods (list): (label, start_date, end_date) tuples.
+    
+    Returns:
+        pyarrow.acero.Declaration: Plan producing the windows' order lines with a 'period' column.
+    """
+    def join_table(plan, columns, table_name, keys, table_columns, join_type='inner'):
+        table = declare_scan(datasets[table_name], keys + table_columns)
+        return declare_join(table, table_columns, plan, columns, keys, join_type)
+    
+    plan, columns = declare_period_orders(datasets, TABLE_SCHEMAS['orders']['columns'], periods)
+    
+    if 'customers' in joined_tables:
+        plan, columns = join_table(plan, columns, 'customers', ['customer_id'], ['customer_state'], 'right outer')
+    if 'ordered_items' in joined_tables:
+        plan, columns = join_table(plan, columns, 'ordered_items', ['order_id'], ['product_id', 'seller_id', 'price', 'freight_value'])
+    if 'products' in joined_tables:
+        plan, columns = join_table(plan, columns, 'products', ['product_id'], ['product_category_name'])
+        plan, columns = join_table(plan, columns, 'product_category', ['product_category_name'], ['product_category_name_english'])
+    if 'order_reviews' in joined_tables:
+        plan, columns = join_table(plan, columns, 'order_reviews', ['order_id'], ['review_score'])
+    
+    return plan
+
+def declare_period_order_facts(datasets, periods):
+    """
+    Declare the plan returning the order fact table rows of several date windows.
+    
+    Items, payments and reviews are each joined to the windows' orders and
+    aggregated per order and period before being joined together, so no order
+    is counted once per payment or review.
+    
+    Args:
+        datasets (dict): Datasets returned by open_arrow_datasets().
+        periods (list): (label, start_date, end_date) tuples.
+    
+    Returns:
+        pyarrow.acero.Declaration: Plan producing one row per order and period with at least
+            one item, with the order columns, the aggregates of
+            data_processor.build_order_fact_table() and a 'period' column.
+    """
+    def per_order(table_name, columns, aggregates, order_columns):
+        orders, keys = declare_period_orders(datasets, order_columns, periods)
+        lines, _ = declare_join(declare_scan(datasets[table_name], ['order_id'] + columns), columns, orders, keys, ['order_id'])
+        return acero.Declaration.from_sequence([lines, acero.Declaration('aggregate', acero.AggregateNodeOptions(aggregates, keys=keys))])
+    
+    order_columns = TABLE_SCHEMAS['orders']['columns']
+    items = per_order('ordered_items', ['price', 'freight_value'], [
+        ('price', 'hash_count', pc.CountOptions(mode='all'), 'item_count'),
+        ('price', 'hash_sum', None, 'item_total'),
+        ('freight_value', 'hash_sum', None, 'freight_total')
+    ], order_columns)
+    payments = per_order('order_payment', ['payment_value'], [('payment_value', 'hash_sum', None, 'payment_total')], ['order_id'])
+    reviews = per_order('order_reviews', ['review_score'], [('review_score', 'hash_mean', None, 'review_score')], ['order_id'])
+    
+    keys = ['order_id', 'period']
+    item_columns = order_columns + ['period', 'item_count', 'item_total', 'freight_total']
+    plan, columns = declare_join(payments, ['payment_total'], items, item_columns, keys, 'right outer')
+    plan, _ = declare_join(reviews, ['review_score'], plan, columns, keys, 'right outer')
+    return plan
+
+def restore_categoricals(frame):
+    """
+    Re-encode the columns declare_scan() decoded as categoricals, as load_table() types them.
+    
+    Args:
+        frame (pandas.DataFrame): Query result converted to pandas.
+    
+    Returns:
+        pandas.DataFrame: The same frame with categorical columns.
+    """
+    for schema in TABLE_SCHEMAS.values():
+        for column in schema['categoricals']:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('category')
+    return frame
+
+def run_period_plan(plan, periods):
+    """
+    Run a period-tagged plan and convert its result to pandas.
+    
+    Args:
+        plan (pyarrow.acero.Declaration): Plan producing a 'period' column.
+        periods (list): (label, start_date, end_date) tuples the plan covers.
+    
+    Returns:
+        pandas.DataFrame: Rows of the plan with a categorical 'period' column
+            whose categories follow the order of periods.
+    """
+    # The only conversion to pandas, once the whole plan has run
+    frame = plan.to_table(use_threads=True).to_pandas()
+    frame['period'] = pd.Categorical(frame['period'], categories=[label for label, _, _ in periods])
+    return restore_categoricals(frame)
+
+def load_period_data(datasets, joined_tables, periods):
+    """
+    Run the order-line plan of several date windows into one period-tagged frame.
+    
+    Args:
+        datasets (dict): Datasets returned by open_arrow_datasets().
+        joined_tables (list): Tables to join onto the orders, see declare_period_lines().
+        periods (list): (label, start_date, end_date) tuples, as for
+            data_processor.load_period_orders_data().
+    
+    Returns:
+        pandas.DataFrame: Same layout as the matching data_processor.load_period_*_data() result.
+    """
+    frame = add_derived_columns(run_period_plan(declare_period_lines(datasets, joined_tables, periods), periods), 'orders')
+    if 'product_category_name_english' in frame.columns:
+        frame = clean_product_categories(frame)
+    return frame
+
+def load_period_order_facts(datasets, periods):
+    """
+    Run the order fact plan of several date windows into one period-tagged frame.
+    
+    Args:
+        datasets (dict): Datasets returned by open_arrow_datasets().
+        periods (list): (label, start_date, end_date) tuples, as for load_period_data().
+    
+    Returns:
+        pandas.DataFrame: Rows of data_processor.build_order_fact_table() for every window,
+            with a categorical 'period' column.
+    """
+    order_facts = run_period_plan(declare_period_order_facts(datasets, periods), periods)
+    order_facts['delivery_days'] = get_delivery_days(order_facts)
+    return order_facts[[
+        'order_id', 'order_purchase_timestamp', 'order_status', 'item_count', 'item_total',
+        'freight_total', 'payment_total', 'review_score', 'delivery_days', 'period'
+    ]]
@@ -0,0 +1,235 @@
+import os
+import gzip
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+from report_maker import (
+    load_report_data,
+    load_period_metrics,
+    get_batch_periods,
+    get_report_dates,
+    calculate_report_metrics,
+    get_chart_jobs,
+    read_inline_svg
+)
+from chart_renderer import draw_chart
+
+def time_engine(engine, report_periods, data_dir='data'):
+    """
+    Time one engine loading its data and computing the measures of several report periods.
+    
+    Args:
+        engine (str): Data engine passed to load_report_data().
+        report_periods (list): (start_date, end_date) tuples, as returned by get_batch_periods().
+        data_dir (str): Directory holding the engines' files.
+    
+    Returns:
+        dict: Timings in seconds ('load', 'periods').
+    """
+    start_time = time.perf_counter()
+    report_data = load_report_data(engine, data_dir)
+    load_time = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    for start_date, end_date in report_periods:
+        dates = get_report_dates(start_date, end_date)
+        periods = [
+            ('this_week', dates['this_week_start'], dates['this_week_end']),
+            ('last_week', dates['last_week_start'], dates['last_week_end'])
+        ]
+        load_period_metrics(report_data, periods)
+    period_time = time.perf_counter() - start_time
+    
+    return {'load': load_time, 'periods': period_time}
+
+def run_benchmark(start_date, end_date, engines, cadence_days=7, data_dir='data'):
+    """
+    Run every engine over the same report periods and print their timings side by side.
+    
+    That the engines agree on the numbers is checked by tests/test_engines.py.
+    
+    Args:
+        start_date (str): First day of the first report period.
+        end_date (str): Last day of the last report period.
+        engines (list): Data engines to compare.
+        cadence_days (int): Length of each report period in days.
+        data_dir (str): Directory holding the engines' files.
+    
+    Returns:
+        pandas.DataFrame: One row per engine with load, period and per-period times in seconds.
+    """
+    report_periods = get_batch_periods(start_date, end_date, cadence_days)
+    print(f"Benchmarking {', '.join(engines)} on {len(report_periods)} report periods...")
+    
+    results = {}
+    for engine in engines:
+        # A first run refreshes every cache, so the timed run only measures queries
+        time_engine(engine, report_periods[:1], data_dir)
+        results[engine] = time_engine(engine, report_periods, data_dir)
+    
+    rows = []
+    for engine, result in results.items():
+        rows.append({
+            'engine': engine,
+            'load_seconds': result['load'],
+            'periods_seconds': result['periods'],
+            'seconds_per_period': result['periods'] / max(len(report_periods), 1)
+        })
+    
+    timings = pd.DataFrame(rows).set_index('engine')
+    print(timings.round(3).to_string())
+    return timings
+
+def time_charts(chart_jobs, use_templates):
+    """
+    Time drawing a sequence of charts one after another in this process.
+    
+    Args:
+        chart_jobs (list): (chart_type, chart_args) tuples, as returned by get_chart_jobs().
+        use_templates (bool): Whether to draw on reusable figure templates.
+    
+    Returns:
+        pandas.DataFrame: One row per chart with its 'chart_type' and 'seconds'.
+    """
+    rows = []
+    for chart_type, chart_args in chart_jobs:
+        start_time = time.perf_counter()
+        draw_chart(chart_type, chart_args, use_templates)
+        rows.append({'chart_type': chart_type, 'seconds': time.perf_counter() - start_time})
+    return pd.DataFrame(rows)
+
+def get_benchmark_chart_jobs(report_data, start_date, chart_count, output_dir, chart_format='png'):
+    """
+    Build the chart jobs of 7-day reports starting one day apart.
+    
+    Both chart types alternate as they would in a batch.
+    
+    Args:
+        report_data (dict): Data returned by load_report_data().
+        start_date (str): First day of the first report period.
+        chart_count (int): Number of charts to build jobs for.
+        output_dir (str): Directory the charts are saved to.
+        chart_format (str): Image format of the charts, e.g. 'png'.
+    
+    Returns:
+        list: (chart_type, chart_args) tuples, as returned by get_chart_jobs().
+    """
+    first_day = pd.Timestamp(start_date)
+    chart_jobs = []
+    for day in range((chart_count + 1) // 2):
+        period_start = first_day + pd.Timedelta(days=day)
+        dates = get_report_dates(period_start.strftime('%Y-%m-%d'), (period_start + pd.Timedelta(days=6)).strftime('%Y-%m-%d'))
+        metrics = calculate_report_metrics(report_data, dates)
+        chart_jobs.extend(get_chart_jobs(
+            metrics,
+            os.path.join(output_dir, f"sales_trend_{day}.{chart_format}"),
+            os.path.join(output_dir, f"top_categories_{day}.{chart_format}")
+        ))
+    return chart_jobs[:chart_count]
+
+def run_chart_benchmark(start_date, chart_count=500, data_dir='data'):
+    """
+    Time the chart functions against the figure templates on the same consecutive charts.
+    
+    No chart cache is used.
+    
+    Args:
+        start_date (str): First day of the first report period.
+        chart_count (int): Number of charts to draw with each method.
+        data_dir (str): Directory holding the rollup engine's files.
+    
+    Returns:
+        pandas.DataFrame: Per-chart milliseconds (mean, median, p95) per method and chart type.
+    """
+    report_data = load_report_data('rollup', data_dir)
+    print(f"Benchmarking chart functions and templates on {chart_count} consecutive charts...")
+    chart_jobs = get_benchmark_chart_jobs(report_data, start_date, chart_count, tempfile.mkdtemp(prefix='chart_benchmark_'))
+    
+    timings = []
+    for method, use_templates in [('function', False), ('template', True)]:
+        # One chart of each type first, so font and style setup is not timed
+        time_charts(chart_jobs[:2], use_templates)
+        timing = time_charts(chart_jobs, use_templates)
+        timing['method'] = method
+        timings.append(timing)
+    
+    timings = pd.concat(timings)
+    timings['ms'] = timings['seconds'] * 1000
+    summary = timings.groupby(['method', 'chart_type'])['ms'].agg(
+        mean='mean', median='median', p95=lambda ms: ms.quantile(0.95)
+    ).unstack('method')
+    print(summary.round(1).to_string())
+    
+    per_chart = timings.groupby('method')['ms'].mean()
+    print(f"Mean per chart: {per_chart['function']:.1f} ms with functions, "
+          f"{per_chart['template']:.1f} ms with templates ({per_chart['function'] / per_chart['template']:.1f}x)")
+    return summary
+
+def run_chart_format_benchmark(start_date, chart_count=100, data_dir='data'):
+    """
+    Compare linked PNG charts with inlined SVG charts on render time and bytes sent.
+    
+    PNG bytes are the image files a report links to; SVG bytes are the markup
+    inlined into the report. Gzipped sizes are shown for servers that compress.
+    
+    Args:
+        start_date (str): First day of the first report period.
+        chart_count (int): Number of charts to draw in each format.
+        data_dir (str): Directory holding the rollup engine's files.
+    
+    Returns:
+        pandas.DataFrame: Per-chart milliseconds and bytes per format and chart type.
+    """
+    report_data = load_report_data('rollup', data_dir)
+    print(f"Benchmarking PNG and inline SVG charts on {chart_count} consecutive charts...")
+    output_dir = tempfile.mkdtemp(prefix='chart_benchmark_')
+    
+    timings = []
+    for chart_format in ['png', 'svg']:
+        chart_jobs = get_benchmark_chart_jobs(report_data, start_date, chart_count, output_dir, chart_format)
+        time_charts(chart_jobs[:2], False)
+        timing = time_charts(chart_jobs, False)
+        
+        sizes = []
+        for _, chart_args in chart_jobs:
+            if chart_format == 'svg':
+                body = read_inline_svg(chart_args['output_path']).encode('utf-8')
+            else:
+                with open(chart_args['output_path'], 'rb') as f:
+                    body = f.read()
+            sizes.append((len(body), len(gzip.compress(body))))
+        timing[['bytes', 'gzip_bytes']] = sizes
+        timing['format'] = chart_format
+        timings.append(timing)
+    
+    timings = pd.concat(timings)
+    timings['ms'] = timings['seconds'] * 1000
+    summary = timings.groupby(['chart_type', 'format'])[['ms', 'bytes', 'gzip_bytes']].mean()
+    print(summary.round(1).to_string())
+    
+    per_format = timings.groupby('format')[['ms', 'bytes']].mean()
+    print(f"Mean per chart: PNG {per_format.loc['png', 'ms']:.1f} ms and {per_format.loc['png', 'bytes'] / 1024:.1f} KB, "
+          f"inline SVG {per_format.loc['svg', 'ms']:.1f} ms and {per_format.loc['svg', 'bytes'] / 1024:.1f} KB")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time data engines on the same report periods")
+    parser.add_argument('start_date', nargs='?', default='2017-01-02', help="First day of the first period (YYYY-MM-DD)")
+    parser.add_argument('end_date', nargs='?', default='2018-06-24', help="Last day of the last period (YYYY-MM-DD)")
+    parser.add_argument('--engines', nargs='+', default=['pandas', 'arrow'], choices=['rollup', 'sqlite', 'arrow', 'pandas'],
+                        help="Engines to compare; the first one is the reference")
+    parser.add_argument('--cadence', type=int, default=7, help="Length of each report period in days")
+    parser.add_argument('--charts', type=int, default=None, metavar='N',
+                        help="Instead of the engines, time N consecutive charts from the start date with functions and templates")
+    parser.add_argument('--chart-formats', type=int, default=None, metavar='N',
+                        help="Instead of the engines, compare N consecutive charts as linked PNG and inline SVG")
+    args = parser.parse_args()
+    
+    if args.charts:
+        run_chart_benchmark(args.start_date, args.charts)
+    elif args.chart_formats:
+        run_chart_format_benchmark(args.start_date, args.chart_formats)
+    else:
+        run_benchmark(args.start_date, args.end_date, args.engines, args.cadence)
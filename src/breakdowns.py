@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+
+from data_processor import map_by_category_codes
+
+# Dimensions revenue is broken down by, with the column holding each row's member
+BREAKDOWN_DIMENSIONS = {
+    'seller': 'seller_id',
+    'customer_state': 'customer_state'
+}
+
+# Additive measures stored per dimension member
+BREAKDOWN_MEASURES = [
+    'revenue',
+    'items',
+    'orders',
+    'delivery_days_sum',
+    'delivery_days_count'
+]
+
+# Tables the breakdowns are built from
+BREAKDOWN_SOURCE_TABLES = ['orders', 'ordered_items', 'customers']
+
+def add_customer_states(orders_table, customers_table):
+    """
+    Add each order's customer state, joined through categorical codes of 'customer_id'.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with a categorical 'customer_id' column.
+        customers_table (pandas.DataFrame): Customers with 'customer_id' and 'customer_state'.
+    
+    Returns:
+        pandas.DataFrame: The orders with a categorical 'customer_state' column.
+    """
+    return orders_table.assign(customer_state=map_by_category_codes(
+        orders_table['customer_id'],
+        customers_table['customer_id'],
+        customers_table['customer_state']
+    ))
+
+def build_breakdown_lines(orders_table, order_items_table, customers_table):
+    """
+    Join orders with their item lines and customer states, tagged with their purchase date.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps and derived columns.
+        order_items_table (pandas.DataFrame): Items ordered with prices and sellers.
+        customers_table (pandas.DataFrame): Customers with their states.
+    
+    Returns:
+        pandas.DataFrame: One row per item line, with the columns build_breakdown_facts() needs
+            and 'purchase_date'.
+    """
+    orders_table = add_customer_states(orders_table, customers_table)
+    item_lines = orders_table.merge(order_items_table, on='order_id')
+    item_lines['purchase_date'] = item_lines['order_purchase_timestamp'].dt.normalize()
+    return item_lines
+
+def build_breakdown_facts(item_lines, keys):
+    """
+    Aggregate item lines into one fact row per order and dimension member.
+    
+    Every breakdown measure is a plain sum over these facts:
+    - revenue, items: Sum of item prices and number of item lines
+    - orders: Always 1, so summed facts count distinct orders per member
+    - delivery_days_sum, delivery_days_count: Delivery days of delivered orders,
+      each order counted once per member
+    
+    Args:
+        item_lines (pandas.DataFrame): Item lines with 'order_id', 'price', 'delivery_days'
+            and the columns of BREAKDOWN_DIMENSIONS, e.g. build_breakdown_lines() or
+            period-tagged revenue data.
+        keys (list): Columns kept on every fact, e.g. ['purchase_date'] or ['period'].
+    
+    Returns:
+        pandas.DataFrame: Columns keys, 'order_id', 'dimension', 'member' and BREAKDOWN_MEASURES.
+    """
+    dimension_facts = []
+    for dimension, column in BREAKDOWN_DIMENSIONS.items():
+        facts = item_lines.groupby(keys + ['order_id', column], observed=True).agg(
+            revenue=('price', 'sum'),
+            items=('price', 'size'),
+            delivery_days=('delivery_days', 'first')
+        ).reset_index()
+        
+        facts['orders'] = 1
+        facts['delivery_days_sum'] = facts['delivery_days'].fillna(0)
+        facts['delivery_days_count'] = facts['delivery_days'].notna().astype('int64')
+        facts['dimension'] = dimension
+        facts['member'] = facts[column].astype(str)
+        dimension_facts.append(facts[keys + ['order_id', 'dimension', 'member'] + BREAKDOWN_MEASURES])
+    
+    return pd.concat(dimension_facts, ignore_index=True)
+
+def aggregate_breakdown_facts(breakdown_facts, keys):
+    """
+    Sum breakdown facts per key, dimension and member.
+    
+    Args:
+        breakdown_facts (pandas.DataFrame): Facts returned by build_breakdown_facts(), or any
+            frame with the same key, dimension, member and measure columns (e.g. daily breakdowns).
+        keys (list): Columns to keep, e.g. ['purchase_date'].
+    
+    Returns:
+        pandas.DataFrame: Columns keys, 'dimension', 'member' and BREAKDOWN_MEASURES,
+            sorted by keys.
+    """
+    totals = breakdown_facts.groupby(keys + ['dimension', 'member'], observed=True)[BREAKDOWN_MEASURES].sum()
+    return totals.reset_index()
+
+def build_daily_breakdowns(breakdown_facts):
+    """
+    Sum breakdown facts into one row per purchase date, dimension and member.
+    
+    Args:
+        breakdown_facts (pandas.DataFrame): Facts built with keys=['purchase_date'].
+    
+    Returns:
+        pandas.DataFrame: Columns 'purchase_date', 'dimension', 'member' and BREAKDOWN_MEASURES,
+            sorted by purchase date and without members that have no orders.
+    """
+    daily_breakdowns = aggregate_breakdown_facts(breakdown_facts, ['purchase_date'])
+    return daily_breakdowns[daily_breakdowns['orders'] != 0].reset_index(drop=True)
+
+def unstack_period_breakdowns(period_totals, periods):
+    """
+    Lay per-period breakdown totals out with one column per measure and period.
+    
+    Args:
+        period_totals (pandas.DataFrame): Totals with 'period', 'dimension', 'member' and BREAKDOWN_MEASURES.
+        periods (list): Period labels, in order.
+    
+    Returns:
+        pandas.DataFrame: Rows indexed by ('dimension', 'member'), (measure, period) columns.
+    """
+    period_totals = period_totals.assign(period=pd.Categorical(period_totals['period'], categories=periods))
+    breakdowns = period_totals.groupby(['dimension', 'member', 'period'], observed=False)[BREAKDOWN_MEASURES].sum()
+    breakdowns = breakdowns.unstack('period', fill_value=0)
+    # Without any rows unstack() leaves no columns at all
+    breakdowns = breakdowns.reindex(columns=pd.MultiIndex.from_product(
+        [BREAKDOWN_MEASURES, period_totals['period'].cat.categories], names=[None, 'period']
+    ), fill_value=0)
+    
+    # Drop members without activity in any period
+    return breakdowns[breakdowns.xs('items', axis=1, level=0).sum(axis=1) > 0]
+
+def get_period_breakdowns(period_revenue_data):
+    """
+    Break period-tagged revenue data down by seller and customer state.
+    
+    Args:
+        period_revenue_data (pandas.DataFrame): Revenue data with 'period', 'customer_state'
+            and 'seller_id' columns.
+    
+    Returns:
+        pandas.DataFrame: Same layout as unstack_period_breakdowns()
+    """
+    period_facts = build_breakdown_facts(period_revenue_data, ['period'])
+    periods = list(period_revenue_data['period'].cat.categories)
+    return unstack_period_breakdowns(aggregate_breakdown_facts(period_facts, ['period']), periods)
+
+def get_rollup_period_breakdowns(daily_breakdowns, periods):
+    """
+    Break several date windows down by seller and customer state from the daily breakdowns.
+    
+    Args:
+        daily_breakdowns (pandas.DataFrame): Breakdowns returned by build_daily_breakdowns().
+        periods (list): (label, start_date, end_date) tuples, as for load_period_orders_data().
+    
+    Returns:
+        pandas.DataFrame: Same layout as unstack_period_breakdowns()
+    """
+    purchase_dates = daily_breakdowns['purchase_date'].to_numpy()
+    windows = []
+    for label, start_date, end_date in periods:
+        start_position = np.searchsorted(purchase_dates, np.datetime64(pd.Timestamp(start_date).normalize()), side='left')
+        end_position = np.searchsorted(purchase_dates, np.datetime64(pd.Timestamp(end_date).normalize()), side='right')
+        windows.append(daily_breakdowns.iloc[start_position:end_position].assign(period=label))
+    
+    return unstack_period_breakdowns(pd.concat(windows, ignore_index=True), [label for label, _, _ in periods])
+
+def get_seller_labels(sellers_table):
+    """
+    Build a readable label for every seller: city, state and the start of its id.
+    
+    Args:
+        sellers_table (pandas.DataFrame): Sellers with 'seller_id', 'seller_city' and 'seller_state'.
+    
+    Returns:
+        pandas.Series: Labels indexed by seller id.
+    """
+    seller_ids = sellers_table['seller_id'].astype(str)
+    labels = (
+        sellers_table['seller_city'].astype(str).str.title() + ', '
+        + sellers_table['seller_state'].astype(str) + ' ('
+        + seller_ids.str[:8] + ')'
+    )
+    return pd.Series(labels.to_numpy(), index=seller_ids.to_numpy())
@@ -0,0 +1,223 @@
+import os
+import json
+import shutil
+import hashlib
+import matplotlib
+
+import visualizations
+from visualizations import setup_colors
+from chart_data import IMAGE_FORMATS
+
+# Size the plots directory may grow to before charts are evicted, counting linked files once
+CHART_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Size eviction trims the plots directory back to, leaving room for the next charts
+CHART_CACHE_TRIM_BYTES = 192 * 1024 * 1024
+
+# Running size of each set of chart directories in this process: what the last
+# eviction left, plus the charts this process stored since
+_directory_bytes = {}
+
+# Hash of the chart code and style, computed once per process
+_code_version = None
+
+def get_code_version():
+    """
+    Hash the source of the chart functions and the matplotlib version they ran with.
+    
+    Returns:
+        str: Hex digest that changes whenever a chart could come out differently.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256(matplotlib.__version__.encode('utf-8'))
+        with open(visualizations.__file__, 'rb') as f:
+            digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def _json_default(value):
+    # Chart inputs may hold numpy arrays and scalars
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def canonicalize_chart_value(value):
+    """
+    Round the floats in a chart input, so that summation noise does not change its key.
+    
+    Engines sum floats in different orders, and a chart of 13980.199999999999
+    looks the same as one of 13980.2.
+    
+    Args:
+        value: Chart input; lists, tuples, dicts and numpy arrays are walked.
+    
+    Returns:
+        The same value with floats rounded to 6 decimals and arrays turned into lists.
+    """
+    if isinstance(value, float):
+        return round(value, 6)
+    if hasattr(value, 'tolist'):
+        return canonicalize_chart_value(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [canonicalize_chart_value(item) for item in value]
+    if isinstance(value, dict):
+        return {name: canonicalize_chart_value(item) for name, item in value.items()}
+    return value
+
+def get_chart_extension(output_path):
+    """
+    Get the extension a chart is saved and cached with.
+    
+    Args:
+        output_path (str): Path of the chart image.
+    
+    Returns:
+        str: Lower-case extension including the dot, e.g. '.png'.
+    """
+    return os.path.splitext(output_path)[1].lower()
+
+def get_chart_key(chart_type, chart_args, use_templates=False):
+    """
+    Build the content address of a chart from everything that decides how it looks.
+    
+    Args:
+        chart_type (str): Chart type, e.g. 'sales_trend'.
+        chart_args (dict): Keyword arguments of the chart function; only the image format
+            of 'output_path' counts.
+        use_templates (bool): Whether the chart is drawn on a reusable figure template,
+            whose layout can differ slightly from a freshly built figure.
+    
+    Returns:
+        str: Hex digest naming the chart in the cache.
+    """
+    inputs = {
+        'chart_type': chart_type,
+        'args': {name: value for name, value in chart_args.items() if name != 'output_path'},
+        'colors': setup_colors(),
+        'code': get_code_version(),
+        'template': use_templates,
+        'format': get_chart_extension(chart_args['output_path'])
+    }
+    payload = json.dumps(canonicalize_chart_value(inputs), sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def link_file(source_path, target_path):
+    """
+    Point target_path at the content of source_path, by hard link where the filesystem allows.
+    
+    The target is replaced atomically, so readers never see a partial file.
+    
+    Args:
+        source_path (str): Existing file.
+        target_path (str): Path to create or replace.
+    """
+    if os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+        return
+    
+    temp_path = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        os.link(source_path, temp_path)
+    except OSError:
+        shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target_path)
+
+def fetch_cached_chart(cache_dir, key, output_path):
+    """
+    Place a cached chart at output_path if the cache holds it.
+    
+    Args:
+        cache_dir (str): Directory of the content-addressed charts.
+        key (str): Chart key returned by get_chart_key().
+        output_path (str): Path the chart is expected at.
+    
+    Returns:
+        bool: True on a cache hit.
+    """
+    cached_path = os.path.join(cache_dir, key + get_chart_extension(output_path))
+    try:
+        link_file(cached_path, output_path)
+        # Hard links share their timestamps, so this marks every copy as recently used
+        os.utime(cached_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+def store_chart(cache_dir, key, output_path):
+    """
+    Add a freshly rendered chart to the cache.
+    
+    Args:
+        cache_dir (str): Directory of the content-addressed charts.
+        key (str): Chart key returned by get_chart_key().
+        output_path (str): Path the chart was saved to.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    link_file(output_path, os.path.join(cache_dir, key + get_chart_extension(output_path)))
+
+def evict_charts(directories, max_bytes=CHART_CACHE_MAX_BYTES):
+    """
+    Delete the least recently used charts until the directories fit in max_bytes.
+    
+    Files hard-linked to each other are one chart: their size counts once, and
+    they are deleted together.
+    
+    Args:
+        directories (list): Directories holding chart images and their cache.
+        max_bytes (int): Size to trim the directories back to.
+    
+    Returns:
+        tuple: (evicted, total_bytes), the number of charts deleted and the size left.
+    """
+    extensions = tuple(f".{image_format}" for image_format in IMAGE_FORMATS)
+    charts = {}
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file(follow_symlinks=False) and entry.name.endswith(extensions):
+                stat = entry.stat(follow_symlinks=False)
+                chart = charts.setdefault((stat.st_dev, stat.st_ino), {'size': stat.st_size, 'mtime': stat.st_mtime, 'paths': []})
+                chart['paths'].append(entry.path)
+    
+    total_bytes = sum(chart['size'] for chart in charts.values())
+    evicted = 0
+    for chart in sorted(charts.values(), key=lambda chart: chart['mtime']):
+        if total_bytes <= max_bytes:
+            break
+        for path in chart['paths']:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker got there first
+                pass
+        total_bytes -= chart['size']
+        evicted += 1
+    return evicted, total_bytes
+
+def account_chart(directories, chart_bytes, max_bytes=CHART_CACHE_MAX_BYTES, trim_bytes=CHART_CACHE_TRIM_BYTES):
+    """
+    Add a stored chart to the running size of its directories, evicting once it passes max_bytes.
+    
+    Only the first chart of a process and the ones that push the running size
+    past max_bytes scan the directories; eviction then trims them to trim_bytes,
+    so many charts fit before the next scan. Charts stored by other processes
+    are only seen by that next scan.
+    
+    Args:
+        directories (list): Directories holding chart images and their cache, see evict_charts().
+        chart_bytes (int): Size of the stored chart.
+        max_bytes (int): Size the directories may grow to.
+        trim_bytes (int): Size eviction trims the directories back to.
+    
+    Returns:
+        int: Number of charts deleted.
+    """
+    key = tuple(os.path.abspath(directory) for directory in directories)
+    total_bytes = _directory_bytes.get(key)
+    if total_bytes is not None and total_bytes + chart_bytes <= max_bytes:
+        _directory_bytes[key] = total_bytes + chart_bytes
+        return 0
+    
+    evicted, _directory_bytes[key] = evict_charts(directories, trim_bytes)
+    return evicted
@@ -0,0 +1,49 @@
+# Color palette of the charts, matching the report CSS variables. Kept free of
+# matplotlib, so reports whose charts the browser draws never import it
+CHART_COLORS = {
+    'primary': '#263A47',
+    'secondary': '#445B6A',
+    'accent': '#728495',
+    'background': '#98A9BE',
+    'highlight': '#84C5DB',
+    'positive': '#27ae60',
+    'negative': '#e74c3c'
+}
+
+# Image formats charts can be saved in, picked by the output path's extension
+IMAGE_FORMATS = ['png', 'svg']
+
+# Ways a report can carry its charts: image files, or 'json' data drawn by the browser
+CHART_FORMATS = IMAGE_FORMATS + ['json']
+
+def get_chart_data(chart_jobs):
+    """
+    Turn a report's chart jobs into the series the browser draws its charts from.
+    
+    Categories are cut to max_categories and sorted by sales, as
+    create_top_categories_chart() does.
+    
+    Args:
+        chart_jobs (list): (chart_type, chart_args) tuples, as returned by
+            report_maker.get_chart_jobs(); output paths are ignored.
+    
+    Returns:
+        dict: JSON-serialisable 'colors', 'sales_trend' and 'top_categories' entries.
+    """
+    chart_data = {'colors': dict(CHART_COLORS)}
+    for chart_type, chart_args in chart_jobs:
+        if chart_type == 'sales_trend':
+            chart_data['sales_trend'] = {
+                'days': [str(day) for day in chart_args['day_names'] or []],
+                'revenue': [float(value) for value in chart_args['daily_revenue'] or []],
+                'orders': [float(value) for value in chart_args['order_counts'] or []]
+            }
+        elif chart_type == 'top_categories':
+            max_categories = chart_args.get('max_categories', 5)
+            top_categories = list(zip(chart_args['categories'] or [], chart_args['sales'] or []))[:max_categories]
+            top_categories.sort(key=lambda category: category[1], reverse=True)
+            chart_data['top_categories'] = {
+                'categories': [str(category) for category, _ in top_categories],
+                'sales': [float(sales) for _, sales in top_categories]
+            }
+    return chart_data
@@ -0,0 +1,230 @@
+import os
+import signal
+import multiprocessing
+import matplotlib.pyplot as plt
+
+from visualizations import (
+    setup_visualization_style,
+    create_sales_trend_chart,
+    create_top_categories_chart,
+    SalesTrendTemplate,
+    TopCategoriesTemplate
+)
+
+from chart_cache import get_chart_key, fetch_cached_chart, store_chart, account_chart
+
+# Chart types a render job can ask for
+CHART_FUNCTIONS = {
+    'sales_trend': create_sales_trend_chart,
+    'top_categories': create_top_categories_chart
+}
+
+# Reusable figure of each chart type, and how many bars a chart's arguments ask for
+CHART_TEMPLATES = {
+    'sales_trend': (SalesTrendTemplate, lambda chart_args: len(chart_args['day_names'] or [])),
+    'top_categories': (TopCategoriesTemplate, lambda chart_args: min(len(chart_args['categories'] or []), chart_args.get('max_categories', 5)))
+}
+
+# What can become of a chart job: reused from the cache, rendered, or failed
+CHART_OUTCOMES = ['hit', 'miss', 'failed']
+
+# Outcomes of the charts rendered in this process
+chart_counts = dict.fromkeys(CHART_OUTCOMES, 0)
+
+# Whether this process already set up the backend, fonts and theme
+_style_ready = False
+
+# Figure templates built in this process, keyed by chart type and bar count
+_templates = {}
+
+def init_chart_style():
+    """
+    Select the Agg backend and apply the report style, once per process.
+    """
+    global _style_ready
+    if not _style_ready:
+        plt.switch_backend('Agg')
+        setup_visualization_style()
+        _style_ready = True
+
+def draw_chart(chart_type, chart_args, use_templates=False):
+    """
+    Draw and save one chart, with its function or with a reusable figure template.
+    
+    Args:
+        chart_type (str): Key in CHART_FUNCTIONS.
+        chart_args (dict): Keyword arguments of the chart function, including 'output_path'.
+        use_templates (bool): Whether to update a figure kept from earlier charts
+            of the same type and size instead of building a new one.
+    
+    Returns:
+        bool: True if the chart was saved.
+    """
+    init_chart_style()
+    if not use_templates:
+        return CHART_FUNCTIONS[chart_type](**chart_args)
+    
+    template_class, get_bar_count = CHART_TEMPLATES[chart_type]
+    bar_count = get_bar_count(chart_args)
+    if bar_count == 0:
+        # Nothing to template; the function reports the invalid input
+        return CHART_FUNCTIONS[chart_type](**chart_args)
+    if (chart_type, bar_count) not in _templates:
+        _templates[chart_type, bar_count] = template_class(bar_count)
+    return _templates[chart_type, bar_count].render(**chart_args)
+
+def render_chart(chart_type, chart_args, cache_dir=None, use_templates=False):
+    """
+    Produce one chart in the current process, reusing a cached image of the same inputs.
+    
+    The outcome is counted in chart_counts.
+    
+    Args:
+        chart_type (str): Key in CHART_FUNCTIONS.
+        chart_args (dict): Keyword arguments of the chart function, including 'output_path'.
+        cache_dir (str, optional): Directory of content-addressed charts; charts are
+            always rendered if None.
+        use_templates (bool): Whether to draw on reusable figure templates, see draw_chart().
+    
+    Returns:
+        str: One of CHART_OUTCOMES.
+    """
+    output_path = chart_args['output_path']
+    key = get_chart_key(chart_type, chart_args, use_templates) if cache_dir else None
+    if key and fetch_cached_chart(cache_dir, key, output_path):
+        outcome = 'hit'
+    else:
+        if key and os.path.exists(output_path):
+            # The old image may be a hard link into the cache, which saving over it would overwrite
+            os.remove(output_path)
+        try:
+            saved = draw_chart(chart_type, chart_args, use_templates)
+        except Exception as e:
+            print(f"Error rendering {chart_type} chart: {e}")
+            plt.close('all')
+            saved = False
+        
+        outcome = 'miss' if saved else 'failed'
+        if saved and key:
+            store_chart(cache_dir, key, output_path)
+            account_chart([os.path.dirname(output_path), cache_dir], os.path.getsize(output_path))
+    
+    chart_counts[outcome] += 1
+    return outcome
+
+def _chart_worker(jobs, counts, use_templates):
+    """
+    Render chart jobs from a queue until a None job arrives.
+    
+    Args:
+        jobs (multiprocessing.JoinableQueue): (chart_type, chart_args, cache_dir) jobs.
+        counts (multiprocessing.Array): Shared counts of each of CHART_OUTCOMES.
+        use_templates (bool): Whether to draw on reusable figure templates.
+    """
+    # Ctrl+C reaches the whole process group; the creating process stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_chart_style()
+    while True:
+        job = jobs.get()
+        try:
+            if job is None:
+                return
+            outcome = CHART_OUTCOMES.index(render_chart(*job, use_templates=use_templates))
+            with counts.get_lock():
+                counts[outcome] += 1
+        finally:
+            jobs.task_done()
+
+class ChartRenderer:
+    """
+    Renders charts in worker processes that set up matplotlib once and then take jobs from a queue.
+    
+    Jobs return immediately, so the charts of a report render concurrently
+    with each other and with the rest of the report. The renderer can be
+    handed to forked or spawned processes, which then submit to the same
+    workers; the process that created it waits for and stops them.
+    """
+    
+    def __init__(self, processes=None, use_templates=False):
+        """
+        Args:
+            processes (int, optional): Number of worker processes (default: CPU count).
+            use_templates (bool): Whether workers keep a figure per chart type and size and
+                only update its data, which pays off over many charts.
+        """
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        self.use_templates = use_templates
+        self.jobs = context.JoinableQueue()
+        self.counts = context.Array('q', len(CHART_OUTCOMES))
+        self.workers = [
+            context.Process(target=_chart_worker, args=(self.jobs, self.counts, use_templates), daemon=True)
+            for _ in range(processes or os.cpu_count() or 1)
+        ]
+        for worker in self.workers:
+            worker.start()
+    
+    def __getstate__(self):
+        # Only the queue travels to other processes; the workers stay with their creator
+        return {'use_templates': self.use_templates, 'jobs': self.jobs, 'counts': self.counts, 'workers': []}
+    
+    def submit(self, chart_type, chart_args, cache_dir=None):
+        """
+        Queue one chart for rendering.
+        
+        Args:
+            chart_type (str): Key in CHART_FUNCTIONS.
+            chart_args (dict): Keyword arguments of the chart function, including 'output_path'.
+            cache_dir (str, optional): Directory of content-addressed charts, see render_chart().
+        """
+        self.jobs.put((chart_type, chart_args, cache_dir))
+    
+    def render(self, chart_type, chart_args, cache_dir=None):
+        """
+        Render one chart in the calling process right away, counted with the workers' charts.
+        
+        For charts the caller needs before it can go on, e.g. to inline them.
+        
+        Args:
+            chart_type (str): Key in CHART_FUNCTIONS.
+            chart_args (dict): Keyword arguments of the chart function, including 'output_path'.
+            cache_dir (str, optional): Directory of content-addressed charts, see render_chart().
+        
+        Returns:
+            str: One of CHART_OUTCOMES.
+        """
+        outcome = render_chart(chart_type, chart_args, cache_dir, self.use_templates)
+        with self.counts.get_lock():
+            self.counts[CHART_OUTCOMES.index(outcome)] += 1
+        return outcome
+    
+    def get_counts(self):
+        """
+        Count the outcomes of the charts rendered so far.
+        
+        Returns:
+            dict: Number of jobs per outcome in CHART_OUTCOMES.
+        """
+        with self.counts.get_lock():
+            return dict(zip(CHART_OUTCOMES, self.counts[:]))
+    
+    def wait(self):
+        """
+        Block until every chart queued so far, from any process, is rendered.
+        """
+        self.jobs.join()
+    
+    def close(self):
+        """
+        Finish the queued charts and stop the workers.
+        """
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
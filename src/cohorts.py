@@ -0,0 +1,232 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from data_processor import load_table, get_window_bounds, map_by_category_codes
+from ingest import get_source_keys
+
+# Tables customer cohorts are built from
+COHORT_SOURCE_TABLES = ['orders', 'customers']
+
+# Layout of the persisted cohorts; files written with another layout are rebuilt
+COHORT_LAYOUT = {'cohort_days': 7, 'week_start': 'monday'}
+
+def get_customer_runs(customers):
+    """
+    Find where each customer's run of rows starts in an array sorted by customer.
+    
+    Args:
+        customers (numpy.ndarray): Customer codes, sorted so each customer's rows are contiguous.
+    
+    Returns:
+        tuple: (run_starts, run_lengths) arrays, one entry per customer.
+    """
+    run_starts = np.concatenate([[0], np.flatnonzero(np.diff(customers)) + 1]) if len(customers) else np.array([], dtype='int64')
+    run_lengths = np.diff(np.append(run_starts, len(customers)))
+    return run_starts, run_lengths
+
+def build_customer_index(orders_table, customers_table):
+    """
+    Sort orders by customer, then purchase time, and number each customer's orders.
+    
+    Customers are identified by 'customer_unique_id', joined through categorical
+    codes of 'customer_id' (every order gets a new customer_id). Each customer's
+    orders form one contiguous run of the sorted arrays, so per-customer values
+    come from the run boundaries instead of a groupby.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with 'customer_id' and parsed timestamps.
+        customers_table (pandas.DataFrame): Customers with 'customer_id' and 'customer_unique_id'.
+    
+    Returns:
+        pandas.DataFrame: One row per order with a known customer, sorted by customer and time:
+            - customer: Integer code of the customer's unique id
+            - order_purchase_timestamp: Purchase time of the order
+            - first_purchase_timestamp: Purchase time of the customer's first order
+            - order_number: 0 for the customer's first order, 1 for the second, ...
+    """
+    unique_ids = map_by_category_codes(
+        orders_table['customer_id'],
+        customers_table['customer_id'],
+        customers_table['customer_unique_id']
+    )
+    customers = unique_ids.cat.codes.to_numpy()
+    timestamps = orders_table['order_purchase_timestamp'].to_numpy()
+    
+    known = (customers >= 0) & ~np.isnat(timestamps)
+    customers, timestamps = customers[known], timestamps[known]
+    
+    order = np.lexsort((timestamps, customers))
+    customers, timestamps = customers[order], timestamps[order]
+    run_starts, run_lengths = get_customer_runs(customers)
+    
+    return pd.DataFrame({
+        'customer': customers,
+        'order_purchase_timestamp': timestamps,
+        'first_purchase_timestamp': np.repeat(timestamps[run_starts], run_lengths),
+        'order_number': np.arange(len(customers)) - np.repeat(run_starts, run_lengths)
+    })
+
+def get_week_numbers(timestamps):
+    """
+    Number the Monday-to-Sunday weeks timestamps fall in.
+    
+    Args:
+        timestamps (numpy.ndarray): datetime64 values.
+    
+    Returns:
+        numpy.ndarray: Week numbers; week 0 starts on Monday 1969-12-29.
+    """
+    # 1970-01-01 was a Thursday, three days after the Monday starting week 0
+    return (timestamps.astype('datetime64[D]').astype('int64') + 3) // 7
+
+def get_week_starts(week_numbers):
+    """
+    Convert week numbers back into the Monday each week starts on.
+    
+    Args:
+        week_numbers (numpy.ndarray): Week numbers returned by get_week_numbers().
+    
+    Returns:
+        pandas.DatetimeIndex: First day of each week.
+    """
+    return pd.to_datetime(np.asarray(week_numbers, dtype='int64') * 7 - 3, unit='D')
+
+def build_cohort_matrix(customer_index):
+    """
+    Count the active customers of every weekly cohort in each week since its first order.
+    
+    Args:
+        customer_index (pandas.DataFrame): Index returned by build_customer_index().
+    
+    Returns:
+        pandas.DataFrame: One row per cohort, indexed by the Monday of the week of its
+            customers' first order ('cohort_week'); column i counts the cohort's customers
+            with an order i weeks later, so column 0 is the cohort size.
+    """
+    customers = customer_index['customer'].to_numpy()
+    cohort_weeks = get_week_numbers(customer_index['first_purchase_timestamp'].to_numpy())
+    week_offsets = get_week_numbers(customer_index['order_purchase_timestamp'].to_numpy()) - cohort_weeks
+    
+    # Orders are sorted by customer and time, so a customer's orders in the same
+    # week are adjacent: each customer is counted once per week at its first one
+    is_first_in_week = np.ones(len(customers), dtype=bool)
+    is_first_in_week[1:] = (np.diff(customers) != 0) | (np.diff(week_offsets) != 0)
+    
+    first_week = cohort_weeks.min() if len(cohort_weeks) else 0
+    rows = cohort_weeks[is_first_in_week] - first_week
+    columns = week_offsets[is_first_in_week]
+    n_rows = int(rows.max()) + 1 if len(rows) else 0
+    n_columns = int(columns.max()) + 1 if len(columns) else 0
+    
+    counts = np.bincount(rows * n_columns + columns, minlength=n_rows * n_columns).reshape(n_rows, n_columns)
+    return pd.DataFrame(
+        counts,
+        index=pd.Index(get_week_starts(first_week + np.arange(n_rows)), name='cohort_week'),
+        columns=pd.RangeIndex(n_columns, name='weeks_since_first_order')
+    )
+
+def get_period_customers(customer_index, periods):
+    """
+    List the customers with orders in each period, flagging those who had ordered before.
+    
+    Args:
+        customer_index (pandas.DataFrame): Index returned by build_customer_index().
+        periods (list): (label, start_date, end_date) tuples, as for
+            data_processor.load_period_orders_data().
+    
+    Returns:
+        pandas.DataFrame: One row per customer and period with 'customer', 'is_returning'
+            (an order of the period was not the customer's first) and a categorical 'period'.
+    """
+    customers = customer_index['customer'].to_numpy()
+    timestamps = customer_index['order_purchase_timestamp'].to_numpy()
+    is_repeat_order = customer_index['order_number'].to_numpy() > 0
+    
+    period_customers = []
+    for label, start_date, end_date in periods:
+        start, end, end_is_exclusive = get_window_bounds(start_date, end_date)
+        end = np.datetime64(end)
+        in_window = (timestamps >= np.datetime64(start)) & ((timestamps < end) if end_is_exclusive else (timestamps <= end))
+        
+        # Masking keeps the customer sort, so each customer is still one run
+        window_customers = customers[in_window]
+        run_starts, _ = get_customer_runs(window_customers)
+        is_returning = np.maximum.reduceat(is_repeat_order[in_window], run_starts) if len(run_starts) else np.array([], dtype=bool)
+        period_customers.append(pd.DataFrame({
+            'period': label,
+            'customer': window_customers[run_starts],
+            'is_returning': is_returning.astype(bool)
+        }))
+    
+    period_customers = pd.concat(period_customers, ignore_index=True)
+    period_customers['period'] = pd.Categorical(period_customers['period'], categories=[label for label, _, _ in periods])
+    return period_customers
+
+def get_cohort_paths(cohort_dir):
+    """
+    Build the paths of the files cohorts are cached in.
+    
+    Args:
+        cohort_dir (str): Directory holding the cached cohorts.
+    
+    Returns:
+        dict: Paths of the customer index, cohort matrix and state file.
+    """
+    return {
+        'customer_index': os.path.join(cohort_dir, 'customer_index.feather'),
+        'cohort_matrix': os.path.join(cohort_dir, 'cohort_matrix.feather'),
+        'state': os.path.join(cohort_dir, 'cohort_state.json')
+    }
+
+def update_cohorts(file_paths, cohort_dir, verbose=True):
+    """
+    Load the customer index and cohort matrix, rebuilding them if the orders or customers changed.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        cohort_dir (str): Directory holding the cached cohorts.
+        verbose (bool): Whether to print whether the cache was used (default: True).
+    
+    Returns:
+        dict: 'customer_index' as returned by build_customer_index() and
+            'cohort_matrix' as returned by build_cohort_matrix().
+    """
+    paths = get_cohort_paths(cohort_dir)
+    source_keys = get_source_keys(file_paths, COHORT_SOURCE_TABLES)
+    
+    state = None
+    if all(os.path.exists(path) for path in paths.values()):
+        with open(paths['state'], 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    
+    if state is not None and state['source_keys'] == source_keys and state.get('layout') == COHORT_LAYOUT:
+        if verbose:
+            print("Customer cohorts are up to date")
+        cohort_matrix = pd.read_feather(paths['cohort_matrix']).set_index('cohort_week')
+        cohort_matrix.columns = pd.RangeIndex(len(cohort_matrix.columns), name='weeks_since_first_order')
+        return {'customer_index': pd.read_feather(paths['customer_index']), 'cohort_matrix': cohort_matrix}
+    
+    if verbose:
+        print("Building customer cohorts from source tables...")
+    customer_index = build_customer_index(
+        load_table(file_paths['orders'], 'orders'),
+        load_table(file_paths['customers'], 'customers')
+    )
+    cohort_matrix = build_cohort_matrix(customer_index)
+    
+    # Write through temporary files, and the state file last, as ingest does
+    os.makedirs(cohort_dir, exist_ok=True)
+    frames = {
+        'customer_index': customer_index,
+        'cohort_matrix': cohort_matrix.rename(columns=str).reset_index()
+    }
+    for name, frame in frames.items():
+        frame.to_feather(paths[name] + '.tmp')
+        os.replace(paths[name] + '.tmp', paths[name])
+    with open(paths['state'] + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'source_keys': source_keys, 'layout': COHORT_LAYOUT}, f)
+    os.replace(paths['state'] + '.tmp', paths['state'])
+    
+    return {'customer_index': customer_index, 'cohort_matrix': cohort_matrix}
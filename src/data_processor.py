@@ -1,6 +1,11 @@
+import io
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 def load_files_paths():
     """
@@ -11,7 +16,8 @@ def load_files_paths():
     
     Returns:
         dict: Dictionary containing file paths for orders, products, ordered_items,
-             product_category, customers, order_reviews, and order_payment tables.
+             product_category, customers, order_reviews, order_payment and sellers tables.
+             The sellers table defaults to the copy shipped in data/input.
     """
     load_dotenv()
     file_paths = {
@@ -21,44 +27,589 @@ def load_files_paths():
         'product_category': os.getenv('product_category_file_path'),
         'customers': os.getenv('customers_table_file_path'),
         'order_reviews': os.getenv('order_reviews_table_file_path'),
-        'order_payment': os.getenv('order_payment_table_file_path')
+        'order_payment': os.getenv('order_payment_table_file_path'),
+        'sellers': os.getenv('sellers_table_file_path', 'data/input/olist_sellers_dataset.csv')
     }
     return file_paths
 
-def load_table(file_path):
+# Columns each table contributes to the report, with their types. Anything not
+# listed here is never parsed, so the merged frames carry only used columns.
+# 'derived' columns are computed from the parsed ones by add_derived_columns().
+TABLE_SCHEMAS = {
+    'orders': {
+        'columns': ['order_id', 'customer_id', 'order_status', 'order_purchase_timestamp', 'order_delivered_customer_date', 'order_estimated_delivery_date'],
+        'dtypes': {},
+        'datetimes': ['order_purchase_timestamp', 'order_delivered_customer_date', 'order_estimated_delivery_date'],
+        'categoricals': ['customer_id', 'order_status'],
+        'derived': ['delivery_time_days', 'delivery_days', 'delivered_on_time']
+    },
+    'ordered_items': {
+        'columns': ['order_id', 'product_id', 'seller_id', 'price', 'freight_value'],
+        'dtypes': {'price': 'float64', 'freight_value': 'float64'},
+        'datetimes': [],
+        'categoricals': ['seller_id'],
+        'derived': []
+    },
+    'products': {
+        'columns': ['product_id', 'product_category_name'],
+        'dtypes': {},
+        'datetimes': [],
+        'categoricals': [],
+        'derived': []
+    },
+    'product_category': {
+        'columns': ['product_category_name', 'product_category_name_english'],
+        'dtypes': {},
+        'datetimes': [],
+        'categoricals': [],
+        'derived': []
+    },
+    'order_reviews': {
+        'columns': ['order_id', 'review_score'],
+        'dtypes': {'review_score': 'int8'},
+        'datetimes': [],
+        'categoricals': [],
+        'derived': []
+    },
+    'order_payment': {
+        'columns': ['order_id', 'payment_value'],
+        'dtypes': {'payment_value': 'float64'},
+        'datetimes': [],
+        'categoricals': [],
+        'derived': []
+    },
+    'customers': {
+        'columns': ['customer_id', 'customer_unique_id', 'customer_state'],
+        'dtypes': {},
+        'datetimes': [],
+        'categoricals': ['customer_id', 'customer_unique_id', 'customer_state'],
+        'derived': []
+    },
+    'sellers': {
+        'columns': ['seller_id', 'seller_city', 'seller_state'],
+        'dtypes': {},
+        'datetimes': [],
+        'categoricals': ['seller_id'],
+        'derived': []
+    }
+}
+
+def get_read_options(table_name):
+    """
+    Translate a table's schema into pd.read_csv options.
+    
+    Args:
+        table_name (str): Key of the table in TABLE_SCHEMAS, or None.
+        
+    Returns:
+        dict: usecols, dtype and parse_dates options (empty when the table has no schema).
+    """
+    schema = TABLE_SCHEMAS.get(table_name)
+    if schema is None:
+        return {'usecols': [], 'dtype': {}, 'parse_dates': []}
+    
+    dtype = dict(schema['dtypes'])
+    dtype.update({column: 'category' for column in schema['categoricals']})
+    return {
+        'usecols': list(schema['columns']),
+        'dtype': dtype,
+        'parse_dates': list(schema['datetimes'])
+    }
+
+def get_table_cache_paths(file_path):
+    """
+    Build the paths of the columnar cache kept next to a CSV file.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        
+    Returns:
+        tuple: (data_path, key_path) for the Feather copy and its JSON cache key.
+    """
+    base_path = os.path.splitext(file_path)[0]
+    return f"{base_path}.cache.feather", f"{base_path}.cache.json"
+
+def build_table_cache_key(file_path, read_options):
+    """
+    Build the key that identifies the current state of a CSV file.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        read_options (dict): Options passed to pd.read_csv (usecols, dtype, parse_dates).
+        
+    Returns:
+        dict: Absolute path, size, modification time and read options of the file.
+    """
+    file_stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'read_options': read_options
+    }
+
+def sort_categories(table):
+    """
+    Sort the categories of every categorical column.
+    
+    read_csv() orders categories chunk by chunk, so without this their order
+    would depend on how much of the file was parsed at once.
+    
+    Args:
+        table (pandas.DataFrame): Parsed table.
+        
+    Returns:
+        pandas.DataFrame: The same table with sorted categories.
+    """
+    for column in table.columns:
+        if isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].cat.reorder_categories(table[column].cat.categories.sort_values())
+    return table
+
+def get_file_digest(file_path, size):
+    """
+    Hash the first size bytes of a file.
+    
+    Args:
+        file_path (str): Path to the file.
+        size (int): Number of bytes to hash, e.g. the 'size' of a build_table_cache_key() key.
+        
+    Returns:
+        str: Hex digest of the bytes.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        remaining = size
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+def get_appended_offset(cache_key, stored_key, stored_digest):
+    """
+    Check whether a CSV file only had rows appended since an earlier state of it.
+    
+    Args:
+        cache_key (dict): Current key of the file, built by build_table_cache_key().
+        stored_key (dict): Key of the earlier state.
+        stored_digest (str): get_file_digest() of the earlier state, or None if unknown.
+        
+    Returns:
+        int or None: Size of the earlier state, where the appended rows start, or None
+            when the file was changed in any other way.
+    """
+    if stored_digest is None or not stored_key or any(
+        stored_key.get(name) != cache_key[name] for name in ['path', 'read_options']
+    ):
+        return None
+    
+    offset = stored_key['size']
+    if not 0 < offset < cache_key['size']:
+        return None
+    with open(cache_key['path'], 'rb') as f:
+        # Appended rows start on a line of their own
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            return None
+    if get_file_digest(cache_key['path'], offset) != stored_digest:
+        return None
+    return offset
+
+def read_appended_rows(file_path, table_name, offset):
+    """
+    Parse the rows of a CSV file that start at a byte offset, as load_table() would parse them.
+    
+    Args:
+        file_path (str): Path to the CSV file.
+        table_name (str): Table key in TABLE_SCHEMAS, or None.
+        offset (int): Byte offset returned by get_appended_offset().
+        
+    Returns:
+        pandas.DataFrame: The rows, without derived columns.
+    """
+    read_options = get_read_options(table_name)
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        rows = f.read()
+    
+    table = pd.read_csv(
+        io.BytesIO(header + rows),
+        usecols=read_options['usecols'] or None,
+        dtype=read_options['dtype'] or None,
+        parse_dates=read_options['parse_dates'] or None
+    )
+    # A few rows may leave a date column empty, which read_csv() does not parse as dates
+    for column in read_options['parse_dates']:
+        table[column] = pd.to_datetime(table[column])
+    return sort_categories(table)
+
+def append_table_rows(table, appended_rows):
+    """
+    Add appended rows to a parsed table, as parsing the whole file at once would.
+    
+    Categorical columns get the sorted union of both sets of categories, like
+    load_table() gives them.
+    
+    Args:
+        table (pandas.DataFrame): Table parsed from the start of the file.
+        appended_rows (pandas.DataFrame): Rows returned by read_appended_rows().
+        
+    Returns:
+        pandas.DataFrame or None: All rows, or None when a column of the appended rows
+            parsed to another dtype, which only parsing the whole file settles.
+    """
+    if list(appended_rows.columns) != list(table.columns):
+        return None
+    
+    columns = {}
+    for column in table.columns:
+        old_values, new_values = table[column], appended_rows[column]
+        if isinstance(old_values.dtype, pd.CategoricalDtype) and isinstance(new_values.dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([old_values, new_values], sort_categories=True)
+        elif old_values.dtype == new_values.dtype:
+            columns[column] = np.concatenate([old_values.to_numpy(), new_values.to_numpy()])
+        else:
+            return None
+    return pd.DataFrame(columns)
+
+def read_table_cache(file_path, cache_key):
+    """
+    Read the columnar copy of a CSV file if it matches the current cache key.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        cache_key (dict): Key built by build_table_cache_key().
+        
+    Returns:
+        pandas.DataFrame or None: Cached table, or None when missing or stale.
+    """
+    data_path, key_path = get_table_cache_paths(file_path)
+    if not os.path.exists(data_path) or not os.path.exists(key_path):
+        return None
+    
+    try:
+        with open(key_path, 'r', encoding='utf-8') as f:
+            stored_key = json.load(f)
+        stored_key.pop('digest', None)
+        if stored_key != cache_key:
+            return None
+        return pd.read_feather(data_path)
+    except Exception as e:
+        print(f"Ignoring unreadable table cache {data_path}: {e}")
+        return None
+
+def read_appended_table_cache(file_path, table_name, cache_key):
+    """
+    Bring a stale columnar copy up to date by parsing only the rows appended to the CSV since.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        table_name (str): Table key in TABLE_SCHEMAS, or None.
+        cache_key (dict): Key built by build_table_cache_key().
+        
+    Returns:
+        pandas.DataFrame or None: Up-to-date table, or None when there is no copy or the
+            file was changed in another way than by appending rows.
+    """
+    data_path, key_path = get_table_cache_paths(file_path)
+    if not os.path.exists(data_path) or not os.path.exists(key_path):
+        return None
+    
+    try:
+        with open(key_path, 'r', encoding='utf-8') as f:
+            stored_key = json.load(f)
+        offset = get_appended_offset(cache_key, stored_key, stored_key.pop('digest', None))
+        if offset is None:
+            return None
+        return append_table_rows(pd.read_feather(data_path), read_appended_rows(file_path, table_name, offset))
+    except Exception as e:
+        print(f"Ignoring unreadable table cache {data_path}: {e}")
+        return None
+
+def write_table_cache(file_path, table, cache_key):
+    """
+    Write a typed columnar copy of a parsed CSV file next to the source.
+    
+    The Feather file is written first and the key last, both through a
+    temporary file, so a half-written cache is never considered valid. The
+    key also holds a digest of the file, so rows appended later can be
+    recognised and parsed on their own.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        table (pandas.DataFrame): Parsed table to cache.
+        cache_key (dict): Key built by build_table_cache_key().
+    """
+    data_path, key_path = get_table_cache_paths(file_path)
+    try:
+        table.to_feather(data_path + '.tmp')
+        os.replace(data_path + '.tmp', data_path)
+        with open(key_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(dict(cache_key, digest=get_file_digest(file_path, cache_key['size'])), f)
+        os.replace(key_path + '.tmp', key_path)
+    except Exception as e:
+        print(f"Could not write table cache {data_path}: {e}")
+
+def load_table(file_path, table_name=None, use_cache=True):
     """
     Load CSV file into a pandas DataFrame.
     
+    When table_name has an entry in TABLE_SCHEMAS, only the listed columns are
+    read, with their dtypes, datetimes and categoricals applied at parse time.
+    A typed Feather copy of the parsed table is kept next to the CSV and reused
+    while the file's path, size and modification time are unchanged, so parsed
+    datetime and categorical columns come back without re-parsing the CSV.
+    When rows were only appended to the CSV, just those rows are parsed and
+    added to the copy.
+    
     Args:
         file_path (str): Path to the CSV file.
+        table_name (str, optional): Table key in TABLE_SCHEMAS (e.g. 'orders').
+        use_cache (bool): Whether to read and write the columnar cache (default: True).
         
     Returns:
         pandas.DataFrame: DataFrame containing the data from the CSV file.
     """
-    table = pd.read_csv(file_path)
+    read_options = get_read_options(table_name)
+    
+    if use_cache:
+        cache_key = build_table_cache_key(file_path, read_options)
+        table = read_table_cache(file_path, cache_key)
+        if table is not None:
+            return add_derived_columns(table, table_name)
+        
+        table = read_appended_table_cache(file_path, table_name, cache_key)
+        if table is not None:
+            write_table_cache(file_path, table, cache_key)
+            return add_derived_columns(table, table_name)
+    
+    table = sort_categories(pd.read_csv(
+        file_path,
+        usecols=read_options['usecols'] or None,
+        dtype=read_options['dtype'] or None,
+        parse_dates=read_options['parse_dates'] or None
+    ))
+    
+    if use_cache:
+        write_table_cache(file_path, table, cache_key)
+    return add_derived_columns(table, table_name)
+
+def get_table_cache(file_path, table_name=None):
+    """
+    Make sure the typed columnar copy of a CSV file is current, without loading it.
+    
+    Args:
+        file_path (str): Path to the source CSV file.
+        table_name (str, optional): Table key in TABLE_SCHEMAS (e.g. 'orders').
+        
+    Returns:
+        str: Path to the Feather copy, as written by load_table() (without derived columns).
+    """
+    cache_key = build_table_cache_key(file_path, get_read_options(table_name))
+    data_path, key_path = get_table_cache_paths(file_path)
+    
+    stored_key = None
+    if os.path.exists(data_path) and os.path.exists(key_path):
+        with open(key_path, 'r', encoding='utf-8') as f:
+            stored_key = json.load(f)
+        stored_key.pop('digest', None)
+    
+    if stored_key != cache_key:
+        # Loading the table writes a fresh copy
+        load_table(file_path, table_name)
+    return data_path
+
+def get_delivery_days(operational_insights_data):
+    """
+    Calculate per-row delivery time in days for delivered orders.
+    
+    Orders loaded with load_table() carry this as a precomputed
+    'delivery_days' column, which is returned as-is.
+    
+    Args:
+        operational_insights_data (DataFrame): Operations data with datetime columns
+                                             'order_delivered_customer_date' and
+                                             'order_purchase_timestamp', and 'order_status'
+    
+    Returns:
+        Series: Delivery time in days, NaN for orders that are not delivered or
+                took 50 days or more (outliers)
+    """
+    if 'delivery_days' in operational_insights_data.columns:
+        return operational_insights_data['delivery_days']
+    
+    # Keep delivered orders with delivery times less than 50 days
+    delivery_days = get_delivery_time_days(operational_insights_data)
+    return delivery_days.where(delivery_days < 50)
+
+def get_delivery_time_days(operational_insights_data):
+    """
+    Calculate per-row delivery time in days for delivered orders, long deliveries included.
+    
+    Unlike get_delivery_days(), nothing is dropped as an outlier, so percentiles
+    of this show how long the slowest deliveries really took.
+    
+    Orders loaded with load_table() carry this as a precomputed
+    'delivery_time_days' column, which is returned as-is.
+    
+    Args:
+        operational_insights_data (DataFrame): Operations data with datetime columns
+                                             'order_delivered_customer_date' and
+                                             'order_purchase_timestamp', and 'order_status'
+    
+    Returns:
+        Series: Delivery time in days, NaN for orders that are not delivered
+    """
+    if 'delivery_time_days' in operational_insights_data.columns:
+        return operational_insights_data['delivery_time_days']
+    
+    # Calculate delivery times and convert to days
+    delivery_times = operational_insights_data['order_delivered_customer_date'] - operational_insights_data['order_purchase_timestamp']
+    delivery_days = delivery_times.dt.total_seconds() / (86400)  # 86400 seconds in a day
+    
+    is_delivered = operational_insights_data['order_status'] == 'delivered'
+    return delivery_days.where(is_delivered)
+
+def get_on_time_deliveries(operational_insights_data):
+    """
+    Flag delivered orders that arrived by their estimated delivery date.
+    
+    Orders loaded with load_table() carry this as a precomputed
+    'delivered_on_time' column, which is returned as-is.
+    
+    Args:
+        operational_insights_data (DataFrame): Operations data with datetime columns
+                                             'order_delivered_customer_date' and
+                                             'order_estimated_delivery_date', and 'order_status'
+    
+    Returns:
+        Series: 1.0 for deliveries on or before the estimated day, 0.0 for late ones,
+                NaN for orders that are not delivered or lack either date
+    """
+    if 'delivered_on_time' in operational_insights_data.columns:
+        return operational_insights_data['delivered_on_time']
+    
+    delivered_date = operational_insights_data['order_delivered_customer_date']
+    estimated_date = operational_insights_data['order_estimated_delivery_date']
+    
+    # The estimate is a whole day, so any delivery during that day is on time
+    is_on_time = (delivered_date.dt.normalize() <= estimated_date).astype('float64')
+    is_delivered = operational_insights_data['order_status'] == 'delivered'
+    return is_on_time.where(is_delivered & delivered_date.notna() & estimated_date.notna())
+
+def add_derived_columns(table, table_name):
+    """
+    Compute a table's derived columns from its parsed columns.
+    
+    For orders these are 'delivery_time_days' (see get_delivery_time_days()),
+    'delivery_days' (see get_delivery_days()) and 'delivered_on_time'
+    (see get_on_time_deliveries()), so delivery metrics are reductions
+    over ready-made float columns.
+    
+    Args:
+        table (pandas.DataFrame): Table as loaded by load_table().
+        table_name (str): Key of the table in TABLE_SCHEMAS, or None.
+        
+    Returns:
+        pandas.DataFrame: The same table with the derived columns added.
+    """
+    if table_name == 'orders':
+        table['delivery_time_days'] = get_delivery_time_days(table)
+        table['delivery_days'] = get_delivery_days(table)
+        table['delivered_on_time'] = get_on_time_deliveries(table)
     return table
 
+def sort_orders_by_purchase_time(orders_table):
+    """
+    Sort orders once by purchase timestamp so date windows can be binary-searched.
+    
+    Args:
+        orders_table (pandas.DataFrame): DataFrame containing order data.
+        
+    Returns:
+        pandas.DataFrame: Orders sorted by order_purchase_timestamp with a fresh
+            RangeIndex, flagged in attrs['sorted_by'] so later calls skip the sort.
+    """
+    if orders_table.attrs.get('sorted_by') == 'order_purchase_timestamp':
+        return orders_table
+    
+    if not pd.api.types.is_datetime64_any_dtype(orders_table['order_purchase_timestamp']):
+        orders_table = orders_table.assign(order_purchase_timestamp=pd.to_datetime(orders_table['order_purchase_timestamp']))
+    
+    sorted_orders = orders_table.sort_values('order_purchase_timestamp', kind='mergesort', ignore_index=True)
+    sorted_orders.attrs['sorted_by'] = 'order_purchase_timestamp'
+    return sorted_orders
+
+def get_window_bounds(start_date, end_date):
+    """
+    Resolve the bounds of an inclusive date window.
+    
+    Args:
+        start_date (str): First date of the window (inclusive).
+        end_date (str): Last date of the window (inclusive). A date without a time
+            of day covers the whole day.
+            
+    Returns:
+        tuple: (start, end, end_is_exclusive). For a date-only end, end is midnight
+            of the following day and excluded; otherwise end itself is included.
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    
+    if end == end.normalize():
+        # Date-only bound: stop before midnight of the following day
+        return start, end + pd.Timedelta(days=1), True
+    return start, end, False
+
+def get_orders_window(sorted_orders, start_date, end_date):
+    """
+    Slice the orders placed between two dates out of the time-sorted orders table.
+    
+    The window bounds are found with a binary search, so each window costs
+    O(log n) and the result is a slice of the sorted table rather than a copy
+    built from a boolean mask.
+    
+    Args:
+        sorted_orders (pandas.DataFrame): Orders returned by sort_orders_by_purchase_time().
+        start_date (str): First date of the window (inclusive).
+        end_date (str): Last date of the window (inclusive). A date without a time
+            of day covers the whole day, so '2017-05-07' includes orders placed at 18:30.
+            
+    Returns:
+        pandas.DataFrame: Orders placed inside the window.
+    """
+    timestamps = sorted_orders['order_purchase_timestamp']
+    start, end, end_is_exclusive = get_window_bounds(start_date, end_date)
+    
+    start_position = timestamps.searchsorted(start, side='left')
+    end_position = timestamps.searchsorted(end, side='left' if end_is_exclusive else 'right')
+    
+    return sorted_orders.iloc[start_position:end_position]
+
 def load_orders_data(orders_table, this_week_start_date, this_week_last_date, last_week_start_date, last_week_end_date):
     """
     Filter orders data by date range for current and previous week.
     
     Args:
-        orders_table (pandas.DataFrame): DataFrame containing order data.
+        orders_table (pandas.DataFrame): DataFrame containing order data, ideally
+            already passed through sort_orders_by_purchase_time().
         this_week_start_date (str): Start date for current week analysis.
-        this_week_last_date (str): End date for current week analysis.
+        this_week_last_date (str): End date for current week analysis (whole day included).
         last_week_start_date (str): Start date for previous week analysis.
-        last_week_end_date (str): End date for previous week analysis.
+        last_week_end_date (str): End date for previous week analysis (whole day included).
         
     Returns:
         tuple: Two DataFrames containing:
             - this_week_orders_data: Orders for the current week
             - last_week_orders_data: Orders for the previous week
     """
-    orders_table['order_purchase_timestamp'] = pd.to_datetime(orders_table['order_purchase_timestamp'])
-    this_week_mask = (orders_table['order_purchase_timestamp'] >= this_week_start_date) & (orders_table['order_purchase_timestamp'] <= this_week_last_date)
-    last_week_mask = (orders_table['order_purchase_timestamp'] >= last_week_start_date) & (orders_table['order_purchase_timestamp'] <= last_week_end_date)
-    this_week_orders_data = orders_table[this_week_mask]
-    last_week_orders_data = orders_table[last_week_mask]
+    sorted_orders = sort_orders_by_purchase_time(orders_table)
+    this_week_orders_data = get_orders_window(sorted_orders, this_week_start_date, this_week_last_date)
+    last_week_orders_data = get_orders_window(sorted_orders, last_week_start_date, last_week_end_date)
     return this_week_orders_data, last_week_orders_data
 
 def load_revenue_data(this_week_orders_data, last_week_orders_data, order_items_table):
@@ -76,14 +627,43 @@ def load_revenue_data(this_week_orders_data, last_week_orders_data, order_items_
             - last_week_revenue_data: Revenue data for the previous week
             
     Note:
-        Removes unnecessary columns to focus on revenue calculation.
+        Only the columns listed in TABLE_SCHEMAS are present, so no columns need dropping.
     """
     this_week_revenue_data = this_week_orders_data.merge(order_items_table, on="order_id")
     last_week_revenue_data = last_week_orders_data.merge(order_items_table, on="order_id")
-    this_week_revenue_data.drop(columns = ['customer_id', 'order_item_id', 'shipping_limit_date', 'freight_value', 'seller_id', 'order_estimated_delivery_date', 'order_delivered_carrier_date', 'order_approved_at'], inplace=True)
-    last_week_revenue_data.drop(columns = ['customer_id', 'order_item_id', 'shipping_limit_date', 'freight_value', 'seller_id', 'order_estimated_delivery_date', 'order_delivered_carrier_date', 'order_approved_at'], inplace=True)
     return this_week_revenue_data, last_week_revenue_data
 
+def map_by_category_codes(keys, lookup_keys, lookup_values):
+    """
+    Look up a value for every row through integer category codes.
+    
+    Each distinct key is matched against the lookup table once; rows are then
+    mapped with array lookups on their category codes, so the cost of the
+    string matching does not grow with the number of rows.
+    
+    Args:
+        keys (pandas.Series): Categorical keys to look up, e.g. orders' 'customer_id'.
+        lookup_keys (pandas.Series): Unique keys of the lookup table, e.g. customers' 'customer_id'.
+        lookup_values (pandas.Series): Categorical values of the lookup table, aligned with lookup_keys.
+    
+    Returns:
+        pandas.Series: Categorical value of every row (NaN for keys not in the lookup table),
+            with the index of keys and the name of lookup_values.
+    """
+    keys = keys.astype('category')
+    lookup_values = lookup_values.astype('category')
+    
+    # Position of each distinct key in the lookup table (-1 when missing)
+    category_positions = np.append(pd.Index(lookup_keys).get_indexer(keys.cat.categories), -1)
+    row_positions = category_positions[keys.cat.codes.to_numpy()]
+    
+    value_codes = np.append(lookup_values.cat.codes.to_numpy(), -1)[row_positions]
+    return pd.Series(
+        pd.Categorical.from_codes(value_codes, lookup_values.cat.categories),
+        index=keys.index,
+        name=lookup_values.name
+    )
+
 def clean_product_categories(df, column_name='product_category_name_english'):
     """
     Clean product category names by converting underscores to spaces and capitalizing words.
@@ -143,23 +723,18 @@ def load_products_data(this_week_revenue_data, last_week_revenue_data, products_
             - last_week_products_data: Enhanced product data for previous week
             
     Note:
-        - Removes unnecessary product details
         - Merges product category translations
-        - Cleans category names for better readability
+        - Cleans category names on the translation table before merging
     """
     this_week_products_data = this_week_revenue_data.merge(products_table, on="product_id")
     last_week_products_data = last_week_revenue_data.merge(products_table, on="product_id")
     
-    this_week_products_data.drop(columns=['product_width_cm', 'product_height_cm', 'product_length_cm', 'product_weight_g', 'product_photos_qty', 'product_description_lenght', 'product_name_lenght', 'product_id', 'order_status', 'order_id'], inplace=True)
-    last_week_products_data.drop(columns=['product_width_cm', 'product_height_cm', 'product_length_cm', 'product_weight_g', 'product_photos_qty', 'product_description_lenght', 'product_name_lenght', 'product_id', 'order_status', 'order_id'], inplace=True)
+    # Clean and format the ~70 category names once instead of every merged row
+    products_names_tabel = clean_product_categories(products_names_tabel.copy())
     
     this_week_products_data = this_week_products_data.merge(products_names_tabel, on="product_category_name")
     last_week_products_data = last_week_products_data.merge(products_names_tabel, on="product_category_name")
     
-    # Clean and format product categories
-    this_week_products_data = clean_product_categories(this_week_products_data)
-    last_week_products_data = clean_product_categories(last_week_products_data)
-    
     return this_week_products_data, last_week_products_data
 
 def load_operational_insights_data(this_week_revenue_data, last_week_revenue_data, order_reviews_table):
@@ -177,14 +752,116 @@ def load_operational_insights_data(this_week_revenue_data, last_week_revenue_dat
             - last_week_operational_insights_data: Operational metrics for previous week
             
     Note:
-        Removes unnecessary detail columns to focus on operational metrics.
+        Only the columns listed in TABLE_SCHEMAS are present, so no columns need dropping.
     """
     this_week_operational_insights_data = this_week_revenue_data.merge(order_reviews_table, on="order_id")
     last_week_operational_insights_data = last_week_revenue_data.merge(order_reviews_table, on="order_id")
-    this_week_operational_insights_data.drop(columns=['review_answer_timestamp', 'review_creation_date', 'review_comment_message', 'review_comment_title', 'review_id', 'product_id', 'price', 'order_id'], inplace=True)
-    last_week_operational_insights_data.drop(columns=['review_answer_timestamp', 'review_creation_date', 'review_comment_message', 'review_comment_title', 'review_id', 'product_id', 'price', 'order_id'], inplace=True)
     return this_week_operational_insights_data, last_week_operational_insights_data
 
+def load_period_orders_data(orders_table, periods):
+    """
+    Cut several date windows out of the orders table into one period-tagged frame.
+    
+    Args:
+        orders_table (pandas.DataFrame): DataFrame containing order data.
+        periods (list): (label, start_date, end_date) tuples, e.g.
+            [('this_week', '2017-05-01', '2017-05-07'), ('last_week', '2017-04-24', '2017-04-30')].
+            Any number of periods is supported and windows may overlap.
+            
+    Returns:
+        pandas.DataFrame: Orders of every window, with a categorical 'period'
+            column whose categories follow the order of periods.
+    """
+    sorted_orders = sort_orders_by_purchase_time(orders_table)
+    period_labels = [label for label, _, _ in periods]
+    
+    windows = [get_orders_window(sorted_orders, start_date, end_date) for _, start_date, end_date in periods]
+    period_orders_data = pd.concat(windows, ignore_index=True)
+    period_orders_data['period'] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(windows)), [len(window) for window in windows]),
+        categories=period_labels
+    )
+    return period_orders_data
+
+def load_period_revenue_data(period_orders_data, order_items_table):
+    """
+    Merge period-tagged orders with order items in a single join.
+    
+    Args:
+        period_orders_data (pandas.DataFrame): Orders returned by load_period_orders_data().
+        order_items_table (pandas.DataFrame): Items ordered with prices.
+        
+    Returns:
+        pandas.DataFrame: Revenue data for every period, keyed by the 'period' column.
+    """
+    return period_orders_data.merge(order_items_table, on="order_id")
+
+def load_period_products_data(period_revenue_data, products_table, products_names_tabel):
+    """
+    Merge period-tagged revenue data with products and category translations.
+    
+    Args:
+        period_revenue_data (pandas.DataFrame): Revenue data returned by load_period_revenue_data().
+        products_table (pandas.DataFrame): Product information.
+        products_names_tabel (pandas.DataFrame): Product category name translations.
+        
+    Returns:
+        pandas.DataFrame: Product data for every period, keyed by the 'period' column.
+    """
+    products_names_tabel = clean_product_categories(products_names_tabel.copy())
+    period_products_data = period_revenue_data.merge(products_table, on="product_id")
+    return period_products_data.merge(products_names_tabel, on="product_category_name")
+
+def load_period_operational_insights_data(period_revenue_data, order_reviews_table):
+    """
+    Merge period-tagged revenue data with order reviews in a single join.
+    
+    Args:
+        period_revenue_data (pandas.DataFrame): Revenue data returned by load_period_revenue_data().
+        order_reviews_table (pandas.DataFrame): Customer reviews of orders.
+        
+    Returns:
+        pandas.DataFrame: Operational data for every period, keyed by the 'period' column.
+    """
+    return period_revenue_data.merge(order_reviews_table, on="order_id")
+
+def build_order_fact_table(orders_table, order_items_table, order_payments_table, order_reviews_table):
+    """
+    Build the order-level fact table: one row per order with at least one item line.
+    
+    Item lines are aggregated with a single groupby, so order counts and average
+    order values are read off one row per order instead of one row per item line.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps.
+        order_items_table (pandas.DataFrame): Items ordered with prices and freight values.
+        order_payments_table (pandas.DataFrame): Payments with 'payment_value'.
+        order_reviews_table (pandas.DataFrame): Customer reviews of orders.
+        
+    Returns:
+        pandas.DataFrame: Columns 'order_id', 'order_purchase_timestamp', 'order_status',
+            'item_count', 'item_total', 'freight_total', 'payment_total' (NaN without payments),
+            'review_score' (mean of the order's reviews, NaN without reviews) and
+            'delivery_days' (NaN for undelivered orders), in the order of orders_table.
+    """
+    item_totals = order_items_table.groupby('order_id', sort=False).agg(
+        item_count=('price', 'size'),
+        item_total=('price', 'sum'),
+        freight_total=('freight_value', 'sum')
+    )
+    
+    order_fact_table = orders_table[['order_id', 'order_purchase_timestamp', 'order_status']].join(
+        item_totals, on='order_id', how='inner'
+    )
+    order_fact_table['payment_total'] = order_fact_table['order_id'].map(
+        order_payments_table.groupby('order_id')['payment_value'].sum()
+    )
+    order_fact_table['review_score'] = order_fact_table['order_id'].map(
+        order_reviews_table.groupby('order_id')['review_score'].mean()
+    )
+    order_fact_table['delivery_days'] = get_delivery_days(orders_table)
+    return order_fact_table.reset_index(drop=True)
+
 def prepare_sales_trend_data(revenue_data):
     """
     Prepare daily aggregated sales and order data for trend visualization,
@@ -199,31 +876,18 @@ def prepare_sales_trend_data(revenue_data):
             - daily_revenue: List of total revenue values for each day
             - order_counts: List of order counts for each day
     """
-    # Ensure timestamp is datetime type
-    daily_data = revenue_data.copy()
-    daily_data['order_purchase_timestamp'] = pd.to_datetime(daily_data['order_purchase_timestamp'])
-    
-    # Extract day of week information
-    daily_data['day_of_week'] = daily_data['order_purchase_timestamp'].dt.dayofweek  
-    daily_data['day_name'] = daily_data['order_purchase_timestamp'].dt.day_name()
-    daily_data['day_abbr'] = daily_data['order_purchase_timestamp'].dt.strftime('%a')
+    # Timestamps are parsed at load, so the day of week is read straight off them
+    day_of_week = revenue_data['order_purchase_timestamp'].dt.dayofweek
     
-    # Group by day of week to get daily totals
-    grouped_revenue = daily_data.groupby('day_of_week').agg({
-        'price': 'sum',
-        'day_abbr': 'first'  # Get the day abbreviation
-    })
+    # Group by day of week to get daily totals, sorted Monday first
+    grouped_revenue = revenue_data['price'].groupby(day_of_week).sum().sort_index()
     
     # Count unique orders per day of week
-    order_counts = daily_data.groupby('day_of_week')['order_id'].nunique()
-    
-    # Sort by day of week (Monday first)
-    grouped_revenue = grouped_revenue.sort_index()
-    order_counts = order_counts.sort_index()
+    order_counts = revenue_data['order_id'].groupby(day_of_week).nunique().sort_index()
     
     # Create lists for visualization function
-    day_names = grouped_revenue['day_abbr'].tolist()
-    revenue_values = grouped_revenue['price'].tolist()
+    day_names = [pd.Timestamp(2024, 1, 1 + day).strftime('%a') for day in grouped_revenue.index]
+    revenue_values = grouped_revenue.tolist()
     count_values = order_counts.tolist()
     
     return day_names, revenue_values, count_values
\ No newline at end of file
@@ -0,0 +1,488 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from data_processor import (
+    load_files_paths,
+    load_table,
+    get_read_options,
+    build_table_cache_key,
+    get_file_digest,
+    get_appended_offset
+)
+from rollups import (
+    ROLLUP_SOURCE_TABLES,
+    ROLLUP_MEASURES,
+    build_order_facts,
+    aggregate_order_facts
+)
+from sketches import (
+    SKETCH_MEASURES,
+    build_daily_sketches,
+    aggregate_daily_sketches
+)
+from breakdowns import (
+    BREAKDOWN_DIMENSIONS,
+    BREAKDOWN_MEASURES,
+    BREAKDOWN_SOURCE_TABLES,
+    build_breakdown_lines,
+    build_breakdown_facts,
+    aggregate_breakdown_facts,
+    build_daily_breakdowns
+)
+
+# Tables every persisted aggregate is built from
+INGEST_SOURCE_TABLES = ROLLUP_SOURCE_TABLES + [
+    table_name for table_name in BREAKDOWN_SOURCE_TABLES if table_name not in ROLLUP_SOURCE_TABLES
+]
+
+# Tables whose rows belong to a single order; the rest (products, categories,
+# customers) touch any number of orders and trigger a full rebuild when they change
+ORDER_TABLES = ['orders', 'ordered_items', 'order_reviews']
+
+# Weight of each order table's rows in an order's hash, so that moving a row
+# from one table to another changes it
+ORDER_HASH_WEIGHTS = {'orders': 1, 'ordered_items': 3, 'order_reviews': 5}
+
+# Layout of the persisted aggregates; a state written with another layout is rebuilt
+INGEST_LAYOUT = {
+    'rollup_measures': ROLLUP_MEASURES,
+    'sketch_measures': SKETCH_MEASURES,
+    'breakdown_dimensions': list(BREAKDOWN_DIMENSIONS),
+    'breakdown_measures': BREAKDOWN_MEASURES,
+    'order_hash_tables': ORDER_TABLES
+}
+
+def get_ingest_paths(rollup_dir):
+    """
+    Build the paths of the files the ingestion state is persisted in.
+    
+    Args:
+        rollup_dir (str): Directory holding the persisted aggregates.
+    
+    Returns:
+        dict: Paths of the daily rollup, daily sketches, daily breakdowns, order facts,
+            breakdown facts, order hashes and state file.
+    """
+    return {
+        'daily_rollup': os.path.join(rollup_dir, 'daily_rollup.feather'),
+        'daily_sketches': os.path.join(rollup_dir, 'daily_sketches.feather'),
+        'daily_breakdowns': os.path.join(rollup_dir, 'daily_breakdowns.feather'),
+        'order_facts': os.path.join(rollup_dir, 'order_facts.feather'),
+        'breakdown_facts': os.path.join(rollup_dir, 'breakdown_facts.feather'),
+        'order_hashes': os.path.join(rollup_dir, 'order_hashes.feather'),
+        'state': os.path.join(rollup_dir, 'ingest_state.json')
+    }
+
+def get_source_keys(file_paths, table_names=INGEST_SOURCE_TABLES):
+    """
+    Build the cache keys of every table the aggregates are built from.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        table_names (list): Tables to key (default: INGEST_SOURCE_TABLES).
+    
+    Returns:
+        dict: build_table_cache_key() result for each table.
+    """
+    return {
+        table_name: build_table_cache_key(file_paths[table_name], get_read_options(table_name))
+        for table_name in table_names
+    }
+
+def hash_order_rows(order_ids, rows):
+    """
+    Sum the row hashes of an order table per order, wrapping at 64 bits.
+    
+    The sum does not depend on row order, and rows hashed separately add up
+    to the hash of all of them. Rows of orders not in order_ids are left out.
+    
+    Args:
+        order_ids (pandas.Index): Unique ids of the orders to hash.
+        rows (pandas.DataFrame): Rows of one of ORDER_TABLES.
+    
+    Returns:
+        numpy.ndarray: uint64 hash of each order's rows, 0 for orders without rows.
+    """
+    positions = order_ids.get_indexer(rows['order_id'])
+    row_hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    hashes = np.zeros(len(order_ids), dtype='uint64')
+    with np.errstate(over='ignore'):
+        np.add.at(hashes, positions[positions >= 0], row_hashes[positions >= 0])
+    return hashes
+
+def combine_order_hashes(orders_table, table_hashes):
+    """
+    Combine the hashes of every order table into one hash per order.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps.
+        table_hashes (dict): hash_order_rows() result for each of ORDER_TABLES.
+    
+    Returns:
+        pandas.DataFrame: Columns 'order_id', 'order_purchase_timestamp', one
+            '<table>_hash' column per order table and their weighted sum 'row_hash'.
+    """
+    order_hashes = pd.DataFrame({
+        'order_id': orders_table['order_id'].to_numpy(),
+        'order_purchase_timestamp': orders_table['order_purchase_timestamp'].to_numpy()
+    })
+    row_hashes = np.zeros(len(order_hashes), dtype='uint64')
+    with np.errstate(over='ignore'):
+        for table_name in ORDER_TABLES:
+            order_hashes[f'{table_name}_hash'] = table_hashes[table_name]
+            row_hashes = row_hashes + table_hashes[table_name] * np.uint64(ORDER_HASH_WEIGHTS[table_name])
+    order_hashes['row_hash'] = row_hashes
+    return order_hashes
+
+def hash_orders(orders_table, order_items_table, order_reviews_table):
+    """
+    Hash every order together with its item lines and reviews.
+    
+    The result changes when any row of the order is added, removed or edited.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps.
+        order_items_table (pandas.DataFrame): Items ordered with prices.
+        order_reviews_table (pandas.DataFrame): Customer reviews of orders.
+    
+    Returns:
+        pandas.DataFrame: Layout of combine_order_hashes().
+    """
+    order_ids = pd.Index(orders_table['order_id'])
+    tables = {'orders': orders_table, 'ordered_items': order_items_table, 'order_reviews': order_reviews_table}
+    return combine_order_hashes(orders_table, {
+        table_name: hash_order_rows(order_ids, table) for table_name, table in tables.items()
+    })
+
+def update_order_hashes(stored_order_hashes, tables, appended_rows):
+    """
+    Bring the order hashes of the last run up to date, hashing only rows it has not seen.
+    
+    New orders are hashed in full. Of the orders seen before, a table whose
+    file only had rows appended adds the hashes of those rows, an unchanged
+    table keeps its stored hashes, and any other table is hashed again.
+    
+    Args:
+        stored_order_hashes (pandas.DataFrame): Hashes persisted by the last run.
+        tables (dict): Current ORDER_TABLES, as loaded by load_table().
+        appended_rows (dict): For each changed order table, the number of leading rows
+            the last run hashed when rows were only appended since, or None when the
+            table must be hashed again; unchanged tables are left out.
+    
+    Returns:
+        pandas.DataFrame: Same result as hash_orders() on the current tables.
+    """
+    orders_table = tables['orders']
+    order_ids = pd.Index(orders_table['order_id'])
+    stored = stored_order_hashes.set_index('order_id')
+    new_order_ids = order_ids[~order_ids.isin(stored.index)]
+    
+    table_hashes = {}
+    for table_name in ORDER_TABLES:
+        table = tables[table_name]
+        offset = appended_rows.get(table_name, len(table))
+        if offset is None:
+            table_hashes[table_name] = hash_order_rows(order_ids, table)
+            continue
+        
+        # Rows of new orders, wherever they are, and rows appended to orders seen before
+        rows = table.iloc[offset:]
+        rows = rows[~rows['order_id'].isin(new_order_ids)]
+        if len(new_order_ids):
+            rows = pd.concat([table[table['order_id'].isin(new_order_ids)], rows])
+        with np.errstate(over='ignore'):
+            table_hashes[table_name] = (
+                stored[f'{table_name}_hash'].reindex(order_ids, fill_value=0).to_numpy() + hash_order_rows(order_ids, rows)
+            )
+    
+    return combine_order_hashes(orders_table, table_hashes)
+
+def find_changed_orders(order_hashes, stored_order_hashes, high_water_mark):
+    """
+    Compare current order hashes against the ones stored by the last run.
+    
+    Args:
+        order_hashes (pandas.DataFrame): Current hashes returned by hash_orders().
+        stored_order_hashes (pandas.DataFrame): Hashes persisted by the last run.
+        high_water_mark (Timestamp): Latest purchase timestamp seen by the last run.
+    
+    Returns:
+        dict: Order id arrays keyed 'new' (placed after the high-water mark or never
+            seen), 'changed' (seen before, different hash) and 'removed' (no longer present).
+    """
+    stored = stored_order_hashes.set_index('order_id')['row_hash']
+    current = order_hashes.set_index('order_id')['row_hash']
+    
+    is_new = (order_hashes['order_purchase_timestamp'] > high_water_mark).to_numpy() | ~current.index.isin(stored.index)
+    known = current[~is_new]
+    is_changed = known.to_numpy() != stored.reindex(known.index).to_numpy()
+    
+    return {
+        'new': current.index[is_new].to_numpy(),
+        'changed': known.index[is_changed].to_numpy(),
+        'removed': stored.index[~stored.index.isin(current.index)].to_numpy()
+    }
+
+def get_source_digests(source_keys, state=None):
+    """
+    Digest the files of ORDER_TABLES, reusing the digests of the last run for unchanged files.
+    
+    Args:
+        source_keys (dict): Keys returned by get_source_keys().
+        state (dict, optional): State returned by load_ingest_state().
+    
+    Returns:
+        dict: data_processor.get_file_digest() of each order table's file.
+    """
+    state = state or {}
+    source_digests = {}
+    for table_name in ORDER_TABLES:
+        source_key = source_keys[table_name]
+        if state.get('source_keys', {}).get(table_name) == source_key and table_name in state.get('source_digests', {}):
+            source_digests[table_name] = state['source_digests'][table_name]
+        else:
+            source_digests[table_name] = get_file_digest(source_key['path'], source_key['size'])
+    return source_digests
+
+def save_ingest_state(paths, aggregates, order_hashes, source_keys, source_digests, row_counts):
+    """
+    Persist the aggregates, facts, order hashes and source keys of a run.
+    
+    Every file is written through a temporary file, and the state file last,
+    so an interrupted run leaves the previous state in place. The row count
+    and a digest of each order table are kept too, so the next run can tell
+    rows appended to the file from other edits.
+    
+    Args:
+        paths (dict): Paths returned by get_ingest_paths().
+        aggregates (dict): Frames to persist, keyed 'daily_rollup', 'daily_sketches',
+            'daily_breakdowns', 'order_facts' and 'breakdown_facts'.
+        order_hashes (pandas.DataFrame): Order hashes to persist.
+        source_keys (dict): Keys returned by get_source_keys().
+        source_digests (dict): Digests returned by get_source_digests().
+        row_counts (dict): Number of rows of each of ORDER_TABLES.
+    """
+    os.makedirs(os.path.dirname(paths['state']) or '.', exist_ok=True)
+    frames = dict(aggregates, order_hashes=order_hashes)
+    for name, frame in frames.items():
+        frame.reset_index(drop=True).to_feather(paths[name] + '.tmp')
+        os.replace(paths[name] + '.tmp', paths[name])
+    
+    state = {
+        'source_keys': source_keys,
+        'source_digests': source_digests,
+        'row_counts': row_counts,
+        'layout': INGEST_LAYOUT,
+        'high_water_mark': str(order_hashes['order_purchase_timestamp'].max())
+    }
+    with open(paths['state'] + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(paths['state'] + '.tmp', paths['state'])
+
+def load_ingest_state(paths):
+    """
+    Load the state file written by the last run.
+    
+    Args:
+        paths (dict): Paths returned by get_ingest_paths().
+    
+    Returns:
+        dict or None: Source keys and digests, row counts, layout and high-water mark,
+            or None if nothing was ingested yet.
+    """
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    with open(paths['state'], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_daily_sketches(rollup_dir):
+    """
+    Read the daily sketches persisted by the last run of update_daily_rollup().
+    
+    Args:
+        rollup_dir (str): Directory holding the persisted aggregates.
+    
+    Returns:
+        pandas.DataFrame: Sketches as returned by sketches.build_daily_sketches().
+    """
+    return pd.read_feather(get_ingest_paths(rollup_dir)['daily_sketches'])
+
+def load_daily_breakdowns(rollup_dir):
+    """
+    Read the daily breakdowns persisted by the last run of update_daily_rollup().
+    
+    Args:
+        rollup_dir (str): Directory holding the persisted aggregates.
+    
+    Returns:
+        pandas.DataFrame: Breakdowns as returned by breakdowns.build_daily_breakdowns().
+    """
+    return pd.read_feather(get_ingest_paths(rollup_dir)['daily_breakdowns'])
+
+def build_aggregates(tables):
+    """
+    Build every persisted aggregate and the facts they are patched from.
+    
+    Args:
+        tables (dict): Tables in INGEST_SOURCE_TABLES, as loaded by load_table().
+    
+    Returns:
+        dict: Frames keyed like the aggregates argument of save_ingest_state().
+    """
+    order_facts = build_order_facts(
+        tables['orders'],
+        tables['ordered_items'],
+        tables['products'],
+        tables['product_category'],
+        tables['order_reviews']
+    )
+    breakdown_facts = build_breakdown_facts(
+        build_breakdown_lines(tables['orders'], tables['ordered_items'], tables['customers']),
+        ['purchase_date']
+    )
+    return {
+        'daily_rollup': aggregate_order_facts(order_facts),
+        'daily_sketches': build_daily_sketches(order_facts),
+        'daily_breakdowns': build_daily_breakdowns(breakdown_facts),
+        'order_facts': order_facts,
+        'breakdown_facts': breakdown_facts
+    }
+
+def update_daily_rollup(file_paths, rollup_dir, verbose=True):
+    """
+    Bring the persisted daily rollup up to date with the source tables.
+    
+    - Nothing changed: the rollup is read back as-is.
+    - Only orders, order items or reviews changed: orders placed after the
+      high-water mark, or whose hash differs from the last run, are re-derived.
+      Their old facts are subtracted from the rollup and their new facts added,
+      which also picks up late reviews and delivery dates on historic orders.
+      Only the changed tables are hashed again, and of a file that only had
+      rows appended, only those rows are parsed and hashed.
+    - Products or category translations changed, the layout of the aggregates
+      changed or no state exists yet: everything is rebuilt from scratch.
+    
+    The daily sketches (see sketches.build_daily_sketches()) and daily
+    breakdowns (see breakdowns.build_daily_breakdowns()) are kept up to date
+    the same way, alongside the rollup. A change to the customers table
+    rebuilds everything, like a change to products.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        rollup_dir (str): Directory holding the persisted aggregates.
+        verbose (bool): Whether to print a summary of the work done (default: True).
+    
+    Returns:
+        pandas.DataFrame: Up-to-date daily rollup, as returned by rollups.build_daily_rollup().
+    """
+    paths = get_ingest_paths(rollup_dir)
+    source_keys = get_source_keys(file_paths)
+    state = load_ingest_state(paths)
+    
+    if state is not None and state['source_keys'] == source_keys and state.get('layout') == INGEST_LAYOUT:
+        if verbose:
+            print("Daily rollup is up to date")
+        return pd.read_feather(paths['daily_rollup'])
+    
+    tables = {table_name: load_table(file_paths[table_name], table_name) for table_name in INGEST_SOURCE_TABLES}
+    row_counts = {table_name: len(tables[table_name]) for table_name in ORDER_TABLES}
+    
+    full_rebuild = state is None or state.get('layout') != INGEST_LAYOUT or any(
+        state['source_keys'].get(table_name) != source_keys[table_name]
+        for table_name in INGEST_SOURCE_TABLES if table_name not in ORDER_TABLES
+    )
+    
+    if full_rebuild:
+        if verbose:
+            print("Building daily rollup from source tables...")
+        aggregates = build_aggregates(tables)
+        order_hashes = hash_orders(tables['orders'], tables['ordered_items'], tables['order_reviews'])
+        save_ingest_state(paths, aggregates, order_hashes, source_keys, get_source_digests(source_keys), row_counts)
+        return aggregates['daily_rollup']
+    
+    # Hash again only what changed: the appended rows of a file that grew, or the whole table
+    appended_rows = {}
+    for table_name in ORDER_TABLES:
+        if state['source_keys'].get(table_name) == source_keys[table_name]:
+            continue
+        offset = get_appended_offset(
+            source_keys[table_name],
+            state['source_keys'].get(table_name),
+            state.get('source_digests', {}).get(table_name)
+        )
+        appended_rows[table_name] = state['row_counts'][table_name] if offset is not None else None
+    
+    stored_order_hashes = pd.read_feather(paths['order_hashes'])
+    order_hashes = update_order_hashes(stored_order_hashes, tables, appended_rows)
+    changes = find_changed_orders(order_hashes, stored_order_hashes, pd.Timestamp(state['high_water_mark']))
+    affected_orders = np.concatenate([changes['new'], changes['changed'], changes['removed']])
+    
+    # Re-derive facts for the affected orders only
+    affected_tables = {
+        table_name: tables[table_name][tables[table_name]['order_id'].isin(affected_orders)]
+        for table_name in ORDER_TABLES
+    }
+    affected_tables.update({
+        table_name: tables[table_name]
+        for table_name in INGEST_SOURCE_TABLES if table_name not in ORDER_TABLES
+    })
+    new = build_aggregates(affected_tables)
+    new_facts = new['order_facts']
+    
+    order_facts = pd.read_feather(paths['order_facts'])
+    is_affected = order_facts['order_id'].isin(affected_orders)
+    old_facts = order_facts[is_affected]
+    
+    # Patch the rollup: subtract the old contribution, add the new one
+    old_contribution = aggregate_order_facts(old_facts)
+    old_contribution[ROLLUP_MEASURES] = -old_contribution[ROLLUP_MEASURES]
+    daily_rollup = aggregate_order_facts(pd.concat([
+        pd.read_feather(paths['daily_rollup']),
+        old_contribution,
+        new['daily_rollup']
+    ], ignore_index=True))
+    daily_rollup = daily_rollup[daily_rollup['items'] > 0].reset_index(drop=True)
+    
+    # Patch the sketches the same way; bucket counts add and subtract like measures
+    old_sketches = build_daily_sketches(old_facts)
+    old_sketches['count'] = -old_sketches['count']
+    daily_sketches = aggregate_daily_sketches(pd.concat([
+        pd.read_feather(paths['daily_sketches']),
+        old_sketches,
+        new['daily_sketches']
+    ], ignore_index=True))
+    
+    # Patch the breakdowns with their own facts
+    breakdown_facts = pd.read_feather(paths['breakdown_facts'])
+    is_affected_breakdown = breakdown_facts['order_id'].isin(affected_orders)
+    old_breakdowns = aggregate_breakdown_facts(breakdown_facts[is_affected_breakdown], ['purchase_date'])
+    old_breakdowns[BREAKDOWN_MEASURES] = -old_breakdowns[BREAKDOWN_MEASURES]
+    daily_breakdowns = build_daily_breakdowns(pd.concat([
+        pd.read_feather(paths['daily_breakdowns']),
+        old_breakdowns,
+        new['daily_breakdowns']
+    ], ignore_index=True))
+    
+    aggregates = {
+        'daily_rollup': daily_rollup,
+        'daily_sketches': daily_sketches,
+        'daily_breakdowns': daily_breakdowns,
+        'order_facts': pd.concat([order_facts[~is_affected], new_facts], ignore_index=True),
+        'breakdown_facts': pd.concat([breakdown_facts[~is_affected_breakdown], new['breakdown_facts']], ignore_index=True)
+    }
+    save_ingest_state(paths, aggregates, order_hashes, source_keys, get_source_digests(source_keys, state), row_counts)
+    
+    if verbose:
+        print(f"Ingested {len(changes['new'])} new, {len(changes['changed'])} changed "
+              f"and {len(changes['removed'])} removed orders")
+    return daily_rollup
+
+if __name__ == "__main__":
+    rollup_dir = sys.argv[1] if len(sys.argv) > 1 else 'data/rollups'
+    start_time = time.perf_counter()
+    update_daily_rollup(load_files_paths(), rollup_dir)
+    print(f"Ingestion finished in {time.perf_counter() - start_time:.2f}s")
@@ -0,0 +1,504 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, asdict
+
+from metrics import (
+    calculate_percent_changes,
+    calculate_rating_difference,
+    get_top_category_frame
+)
+from sketches import SKETCH_QUANTILES, get_sketch_quantiles
+
+@dataclass(frozen=True)
+class Measure:
+    """
+    An additive quantity aggregated from one of the period-tagged frames.
+    
+    Attributes:
+        source (str): Frame the measure is aggregated from: 'revenue' (order lines),
+                      'operations' (reviewed order lines), 'orders' (the order fact table)
+                      or 'customers' (cohorts.get_period_customers())
+        column (str): Column aggregated
+        aggregation (str): 'sum', 'count' (non-null values) or 'size' (rows)
+    """
+    source: str
+    column: str
+    aggregation: str
+
+# Measures metrics are built from. The names match rollups.ROLLUP_MEASURES,
+# so rollup totals can be evaluated without any further aggregation. Customer
+# measures are distinct counts, so every engine takes them from the customer index.
+MEASURES = {
+    'revenue': Measure('revenue', 'price', 'sum'),
+    'items': Measure('revenue', 'price', 'size'),
+    'orders': Measure('orders', 'order_id', 'size'),
+    'delivery_days_sum': Measure('operations', 'delivery_days', 'sum'),
+    'delivery_days_count': Measure('operations', 'delivery_days', 'count'),
+    'review_score_sum': Measure('operations', 'review_score', 'sum'),
+    'review_score_count': Measure('operations', 'review_score', 'count'),
+    'on_time_deliveries': Measure('operations', 'delivered_on_time', 'sum'),
+    'on_time_count': Measure('operations', 'delivered_on_time', 'count'),
+    'customers': Measure('customers', 'customer', 'size'),
+    'returning_customers': Measure('customers', 'is_returning', 'sum')
+}
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """
+    A KPI declared as a ratio of measures, with its comparison and display rules.
+    
+    Attributes:
+        name (str): Key of the metric in the results
+        numerator (str): Measure summed into the metric
+        denominator (str, optional): Measure the numerator is divided by; None for plain totals
+        comparison (str): 'percent' for percent change, 'difference' for absolute difference
+        difference_scale (float): Display units per metric unit of a 'difference' comparison,
+                                  e.g. 100 to compare rates in percentage points
+        inverse_trend (bool): Whether a decrease is an improvement (e.g. delivery time)
+        value_format (str): Format string for the current value
+        is_count (bool): Whether values are whole counts
+    """
+    name: str
+    numerator: str
+    denominator: str = None
+    comparison: str = 'percent'
+    difference_scale: float = 1
+    inverse_trend: bool = False
+    value_format: str = '{:,.2f}'
+    is_count: bool = False
+
+@dataclass(slots=True)
+class MetricResult:
+    """
+    A metric evaluated for two periods.
+    
+    Attributes:
+        name (str): Metric name
+        current (float): Value for the reported period
+        previous (float): Value for the period it is compared against
+        change (float): Absolute percent change, or absolute difference in display units
+                        (e.g. percentage points), rounded to 1 decimal place
+        sign (str): '+', '-', or '' (empty for no change)
+        trend (str): 'positive', 'negative', or 'neutral'
+        formatted (str): Current value formatted for display
+    """
+    name: str
+    current: float
+    previous: float
+    change: float
+    sign: str
+    trend: str
+    formatted: str
+
+@dataclass(slots=True)
+class TopCategoriesResult:
+    """
+    Top product categories of the reported period, compared against the previous one.
+    
+    Attributes:
+        categories (tuple): Category names, best first
+        sales (tuple): Sales of each category in the reported period
+        daily_order_rates (tuple): Average daily order lines of each category (rounded up)
+        previous_sales (tuple): Sales of each category in the previous period
+        percent_changes (tuple): Absolute percent change of each category's sales
+        signs (tuple): '+', '-', or '' for each category
+        trends (tuple): 'positive', 'negative', or 'neutral' for each category
+    """
+    categories: tuple
+    sales: tuple
+    daily_order_rates: tuple
+    previous_sales: tuple
+    percent_changes: tuple
+    signs: tuple
+    trends: tuple
+
+@dataclass(slots=True)
+class DistributionResult:
+    """
+    Quantiles of a per-order value over the reported period, answered from a sketch.
+    
+    Attributes:
+        name (str): Sketched measure, e.g. 'delivery_time_days'
+        count (int): Number of orders in the sketch
+        p50 (float): Median
+        p90 (float): 90th percentile
+        p99 (float): 99th percentile
+    """
+    name: str
+    count: int
+    p50: float
+    p90: float
+    p99: float
+
+@dataclass(slots=True)
+class BreakdownResult:
+    """
+    Top members of a breakdown dimension (e.g. sellers) in the reported period, compared against the previous one.
+    
+    Attributes:
+        dimension (str): Dimension name, e.g. 'seller' or 'customer_state'
+        members (tuple): Member keys, best first
+        labels (tuple): Display label of each member
+        revenue (tuple): Revenue of each member in the reported period
+        previous_revenue (tuple): Revenue of each member in the previous period
+        percent_changes (tuple): Absolute percent change of each member's revenue
+        signs (tuple): '+', '-', or '' for each member
+        trends (tuple): 'positive', 'negative', or 'neutral' for each member
+        orders (tuple): Distinct orders of each member in the reported period
+        previous_orders (tuple): Distinct orders of each member in the previous period
+        delivery_days (tuple): Average delivery days of each member's delivered orders (None without deliveries)
+    """
+    dimension: str
+    members: tuple
+    labels: tuple
+    revenue: tuple
+    previous_revenue: tuple
+    percent_changes: tuple
+    signs: tuple
+    trends: tuple
+    orders: tuple
+    previous_orders: tuple
+    delivery_days: tuple
+
+@dataclass(slots=True)
+class AlertsResult:
+    """
+    Days of the reported period on which a category deviated from its own history.
+    
+    Attributes:
+        threshold (float): Absolute z-score at or above which days were flagged
+        dates (tuple): Day of each alert, as 'YYYY-MM-DD'
+        categories (tuple): Category of each alert ('All categories' for a day's total)
+        measures (tuple): 'revenue', 'orders' or 'rating' for each alert
+        values (tuple): Value on the day
+        expected (tuple): Usual value, from the days before it
+        z_scores (tuple): Deviation from the usual value, in standard deviations
+        trends (tuple): 'positive' (above usual) or 'negative' (below usual) for each alert
+    """
+    threshold: float
+    dates: tuple
+    categories: tuple
+    measures: tuple
+    values: tuple
+    expected: tuple
+    z_scores: tuple
+    trends: tuple
+
+@dataclass(slots=True)
+class CohortResult:
+    """
+    Weekly retention of the most recent customer cohorts, as known at the end of the reported period.
+    
+    Attributes:
+        cohorts (tuple): Monday of each cohort's first-order week, as 'YYYY-MM-DD', oldest first
+        sizes (tuple): Customers whose first order fell in each cohort's week
+        weeks (tuple): Weeks since the first order the retention is given for (1, 2, ...)
+        retention (tuple): Per cohort, the share of its customers ordering in each of those weeks;
+                           None for weeks not over by the end of the reported period
+    """
+    cohorts: tuple
+    sizes: tuple
+    weeks: tuple
+    retention: tuple
+
+METRIC_REGISTRY = {}
+
+def register_metric(definition):
+    """
+    Add a metric to the registry, replacing any metric of the same name.
+    
+    Args:
+        definition (MetricDefinition): Metric to register
+    
+    Returns:
+        MetricDefinition: The registered definition
+    """
+    for measure in (definition.numerator, definition.denominator):
+        if measure is not None and measure not in MEASURES:
+            raise ValueError(f"Unknown measure '{measure}' in metric '{definition.name}'")
+    
+    METRIC_REGISTRY[definition.name] = definition
+    return definition
+
+register_metric(MetricDefinition('revenue', 'revenue', value_format='${:,.2f}'))
+register_metric(MetricDefinition('orders', 'orders', value_format='{:d}', is_count=True))
+register_metric(MetricDefinition('aov', 'revenue', 'orders', value_format='${:,.2f}'))
+register_metric(MetricDefinition('delivery', 'delivery_days_sum', 'delivery_days_count', inverse_trend=True, value_format='{:.1f} days'))
+register_metric(MetricDefinition('satisfaction', 'review_score_sum', 'review_score_count', comparison='difference', value_format='{:.1f}/5.0'))
+register_metric(MetricDefinition('on_time_rate', 'on_time_deliveries', 'on_time_count', comparison='difference', difference_scale=100, value_format='{:.1%}'))
+register_metric(MetricDefinition('repeat_rate', 'returning_customers', 'customers', comparison='difference', difference_scale=100, value_format='{:.1%}'))
+
+def get_required_measures(metric_names=None):
+    """
+    List the measures needed to evaluate a set of registered metrics.
+    
+    Args:
+        metric_names (list, optional): Registered metric names (default: all)
+    
+    Returns:
+        list: Measure names, each listed once, in MEASURES order
+    """
+    metric_names = METRIC_REGISTRY if metric_names is None else metric_names
+    required = {
+        measure
+        for name in metric_names
+        for measure in (METRIC_REGISTRY[name].numerator, METRIC_REGISTRY[name].denominator)
+        if measure is not None
+    }
+    return [measure for measure in MEASURES if measure in required]
+
+def calculate_period_measures(period_frames, measure_names):
+    """
+    Aggregate measures per period, with a single groupby per source frame.
+    
+    Args:
+        period_frames (dict): Period-tagged frames keyed by Measure.source, e.g.
+                              {'revenue': period_revenue_data, 'operations': period_operational_insights_data,
+                               'orders': period_order_fact_table}
+        measure_names (list): Measures to aggregate, see get_required_measures()
+    
+    Returns:
+        DataFrame: One row per period, one column per measure
+    """
+    period_measures = []
+    for source, frame in period_frames.items():
+        measures = {name: MEASURES[name] for name in measure_names if MEASURES[name].source == source}
+        if not measures:
+            continue
+        
+        period_measures.append(frame.groupby('period', observed=False).agg(**{
+            name: (measure.column, measure.aggregation) for name, measure in measures.items()
+        }))
+    
+    return pd.concat(period_measures, axis=1)
+
+def evaluate_metrics(period_measures, current_period, previous_period, metric_names=None):
+    """
+    Evaluate registered metrics for two periods from aggregated measures.
+    
+    Args:
+        period_measures (DataFrame): Measures indexed by period, as returned by
+                                     calculate_period_measures() or summed rollup totals
+        current_period (str): Label of the period being reported
+        previous_period (str): Label of the period it is compared against
+        metric_names (list, optional): Registered metric names (default: all)
+    
+    Returns:
+        dict: MetricResult keyed by metric name
+    """
+    metric_names = list(METRIC_REGISTRY) if metric_names is None else metric_names
+    
+    definitions = [METRIC_REGISTRY[name] for name in metric_names]
+    
+    values = {}
+    for definition in definitions:
+        metric_values = period_measures[definition.numerator]
+        if definition.denominator is not None:
+            denominator = period_measures[definition.denominator]
+            metric_values = metric_values / denominator.where(denominator > 0)
+        
+        current = metric_values.at[current_period]
+        previous = metric_values.at[previous_period]
+        if definition.is_count:
+            # Averaged baselines can be fractional counts
+            current, previous = int(round(current)), int(round(previous))
+        values[definition.name] = (current, previous)
+    
+    # Percent changes of every metric in one vectorized call
+    percent_changes, signs, trends = calculate_percent_changes(
+        [values[definition.name][0] for definition in definitions],
+        [values[definition.name][1] for definition in definitions],
+        inverse_trend=[definition.inverse_trend for definition in definitions]
+    )
+    
+    results = {}
+    for i, definition in enumerate(definitions):
+        current, previous = values[definition.name]
+        if definition.comparison == 'difference':
+            change, sign, trend = calculate_rating_difference(
+                current * definition.difference_scale, previous * definition.difference_scale
+            )
+        else:
+            change, sign, trend = percent_changes[i].item(), signs[i].item(), trends[i].item()
+        
+        results[definition.name] = MetricResult(
+            definition.name, current, previous, change, sign, trend, definition.value_format.format(current)
+        )
+    
+    return results
+
+def evaluate_top_categories(period_category_sales, current_period, previous_period, max_categories=3, window_days=7):
+    """
+    Rank the top categories of one period and compare them against another period.
+    
+    Args:
+        period_category_sales (DataFrame): Sales returned by metrics.get_period_category_sales()
+                                           or metrics.get_rollup_category_sales()
+        current_period (str): Label of the period being reported
+        previous_period (str): Label of the period it is compared against
+        max_categories (int, optional): Maximum number of top categories to return;
+                                        None returns every category (default: 3)
+        window_days (int, optional): Length of the current period in days, for daily order rates (default: 7)
+    
+    Returns:
+        TopCategoriesResult: Ranked categories with their comparison
+    """
+    top_category_frame = get_top_category_frame(
+        period_category_sales[('sales', current_period)],
+        period_category_sales[('orders', current_period)],
+        period_category_sales[('sales', previous_period)],
+        max_categories,
+        window_days
+    )
+    
+    return TopCategoriesResult(
+        tuple(top_category_frame.index),
+        tuple(top_category_frame['sales'].tolist()),
+        tuple(top_category_frame['daily_order_rate'].tolist()),
+        tuple(top_category_frame['last_week_sales'].tolist()),
+        tuple(top_category_frame['percent_change'].tolist()),
+        tuple(top_category_frame['sign'].tolist()),
+        tuple(top_category_frame['trend'].tolist())
+    )
+
+def evaluate_breakdowns(period_breakdowns, current_period, previous_period, max_members=5, member_labels=None):
+    """
+    Rank the top members of every breakdown dimension by revenue and compare them against another period.
+    
+    Members are picked with metrics.get_top_category_frame(), so the top sellers
+    are found without sorting every seller.
+    
+    Args:
+        period_breakdowns (DataFrame): Breakdowns returned by breakdowns.get_period_breakdowns()
+                                       or breakdowns.get_rollup_period_breakdowns()
+        current_period (str): Label of the period being reported
+        previous_period (str): Label of the period it is compared against
+        max_members (int, optional): Maximum number of members per dimension (default: 5)
+        member_labels (dict, optional): Series of display labels indexed by member, per dimension;
+                                        members without a label are shown as-is
+    
+    Returns:
+        dict: BreakdownResult keyed '<dimension>_breakdown'
+    """
+    member_labels = member_labels or {}
+    
+    results = {}
+    for dimension in period_breakdowns.index.unique(level='dimension'):
+        members = period_breakdowns.xs(dimension, level='dimension')
+        top_member_frame = get_top_category_frame(
+            members[('revenue', current_period)],
+            members[('orders', current_period)],
+            members[('revenue', previous_period)],
+            max_members
+        )
+        top_members = members.loc[top_member_frame.index]
+        
+        delivery_days_count = top_members[('delivery_days_count', current_period)]
+        delivery_days = top_members[('delivery_days_sum', current_period)] / delivery_days_count.where(delivery_days_count > 0)
+        
+        labels = member_labels.get(dimension, {})
+        
+        results[f'{dimension}_breakdown'] = BreakdownResult(
+            dimension,
+            tuple(top_member_frame.index),
+            tuple(labels.get(member, member) for member in top_member_frame.index),
+            tuple(top_member_frame['sales'].tolist()),
+            tuple(top_member_frame['last_week_sales'].tolist()),
+            tuple(top_member_frame['percent_change'].tolist()),
+            tuple(top_member_frame['sign'].tolist()),
+            tuple(top_member_frame['trend'].tolist()),
+            tuple(top_members[('orders', current_period)].tolist()),
+            tuple(top_members[('orders', previous_period)].tolist()),
+            tuple(None if pd.isna(days) else days for days in delivery_days.tolist())
+        )
+    
+    return results
+
+def evaluate_distributions(sketches):
+    """
+    Estimate the reported quantiles of every sketched measure.
+    
+    Args:
+        sketches (dict): Sketch per measure, as returned by sketches.get_window_sketches()
+                         or sketches.build_order_sketches()
+    
+    Returns:
+        dict: DistributionResult keyed '<measure>_distribution'
+    """
+    return {
+        f'{measure}_distribution': DistributionResult(measure, int(sketch.sum()), *get_sketch_quantiles(sketch, SKETCH_QUANTILES))
+        for measure, sketch in sketches.items()
+    }
+
+def evaluate_alerts(alerts, threshold, max_alerts=10):
+    """
+    Keep the largest deviations returned by anomalies.detect_anomalies().
+    
+    Args:
+        alerts (DataFrame): Flagged days returned by anomalies.detect_anomalies()
+        threshold (float): Threshold the days were flagged with
+        max_alerts (int, optional): Maximum number of alerts to return (default: 10)
+    
+    Returns:
+        AlertsResult: Flagged days, largest deviation first
+    """
+    alerts = alerts.head(max_alerts)
+    z_scores = alerts['z_score'].round(1)
+    
+    return AlertsResult(
+        threshold,
+        tuple(alerts['date'].dt.strftime('%Y-%m-%d')),
+        tuple(alerts['category']),
+        tuple(alerts['measure']),
+        tuple(alerts['value'].tolist()),
+        tuple(alerts['expected'].tolist()),
+        tuple(z_scores.tolist()),
+        tuple(np.where(z_scores > 0, 'positive', 'negative').tolist())
+    )
+
+def evaluate_cohorts(cohort_matrix, end_date, max_cohorts=6, max_weeks=4):
+    """
+    Read the retention of the most recent complete cohorts off the cohort matrix.
+    
+    Only weeks over by end_date are shown, so orders placed after the reported
+    period never show up in its report.
+    
+    Args:
+        cohort_matrix (DataFrame): Matrix returned by cohorts.build_cohort_matrix()
+        end_date (str): Last day of the reported period
+        max_cohorts (int, optional): Number of cohorts to show (default: 6)
+        max_weeks (int, optional): Number of weeks after the first order to show (default: 4)
+    
+    Returns:
+        CohortResult: Retention of the most recent cohorts
+    """
+    period_end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    
+    # Cohorts whose first week is over, and how many of their weeks are over
+    cohorts = cohort_matrix[(period_end - cohort_matrix.index).days // 7 >= 1].tail(max_cohorts)
+    complete_weeks = (period_end - cohorts.index).days // 7
+    weeks = range(1, max_weeks + 1)
+    counts = cohorts.reindex(columns=range(max_weeks + 1), fill_value=0).to_numpy()
+    
+    return CohortResult(
+        tuple(cohorts.index.strftime('%Y-%m-%d')),
+        tuple(int(size) for size in counts[:, 0]),
+        tuple(weeks),
+        tuple(
+            tuple(float(row[week] / row[0]) if week < cohort_weeks and row[0] > 0 else None for week in weeks)
+            for row, cohort_weeks in zip(counts, complete_weeks)
+        )
+    )
+
+def metric_results_to_dict(results):
+    """
+    Convert evaluated metrics into plain dicts, e.g. for JSON output.
+    
+    Args:
+        results (dict): MetricResult, TopCategoriesResult, DistributionResult, BreakdownResult,
+                        AlertsResult and CohortResult values keyed by name
+    
+    Returns:
+        dict: One dict of named fields per metric
+    """
+    return {name: asdict(result) for name, result in results.items()}
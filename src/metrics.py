@@ -1,5 +1,63 @@
 import pandas as pd
-import math
+import numpy as np
+
+def round_like_builtin(values, decimals=1):
+    """
+    Round an array exactly as the built-in round() rounds each value.
+    
+    np.round() scales values by 10**decimals before rounding, which can push a value
+    lying just off a tie (e.g. 0.35, stored as 0.34999...) onto it, and loses precision
+    on huge values. The few values that close to a tie, or that large, are rounded
+    one by one instead.
+    
+    Args:
+        values (numpy.ndarray): Float values
+        decimals (int, optional): Number of decimal places (default: 1)
+    
+    Returns:
+        numpy.ndarray: Rounded values
+    """
+    with np.errstate(over='ignore', invalid='ignore'):
+        rounded = np.round(values, decimals)
+        scaled = values * 10 ** decimals
+        # Past 2**52 the scaled value has no fractional bits left for np.round() to work with
+        unsafe = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6) | (np.abs(scaled) >= 2 ** 52)
+    if unsafe.any():
+        rounded[unsafe] = [round(value, decimals) for value in values[unsafe].tolist()]
+    return rounded
+
+def calculate_percent_changes(current, previous, inverse_trend=False):
+    """
+    Calculate percentage changes and determine trends for whole arrays of values at once.
+    
+    A previous value of 0 counts as no change (0%, neutral).
+    
+    Args:
+        current (array-like): Current period values
+        previous (array-like): Previous period values, same shape
+        inverse_trend (bool or array-like): If True, a negative change is considered positive
+                                            (e.g., for delivery times); may be given per value
+    
+    Returns:
+        tuple: (percent_changes, signs, trends) arrays
+            - percent_changes: Absolute percentage changes (rounded to 1 decimal place)
+            - signs: '+', '-', or '' (empty for no change)
+            - trends: 'positive', 'negative', or 'neutral'
+    """
+    current = np.asarray(current, dtype='float64')
+    previous = np.asarray(previous, dtype='float64')
+    
+    has_baseline = previous != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_changes = np.where(has_baseline, ((current - previous) / previous) * 100, 0.0)
+    
+    # An improvement is a rise, or a fall for inverse trends; NaN changes are neither
+    is_change = percent_changes != 0
+    is_improvement = np.where(inverse_trend, percent_changes < 0, percent_changes > 0)
+    
+    signs = np.where(is_change, np.where(is_improvement, '+', '-'), '')
+    trends = np.where(is_change, np.where(is_improvement, 'positive', 'negative'), 'neutral')
+    return round_like_builtin(np.abs(percent_changes), 1), signs, trends
 
 def calculate_percent_change(current, previous, inverse_trend=False):
     """
@@ -11,26 +69,14 @@ def calculate_percent_change(current, previous, inverse_trend=False):
         inverse_trend: If True, a negative change is considered positive (e.g., for delivery times)
     
     Returns:
-        tuple: (percent_change, sign, trend)
+        tuple: (percent_change, sign, trend), as calculate_percent_changes() gives for one value
+            (an int 0 change when previous is 0)
     """
-    if previous != 0:
-        percent_change = ((current - previous) / previous) * 100
-        if percent_change == 0:
-            sign = ''
-            trend = 'neutral'
-        else:
-            if inverse_trend:
-                sign = '+' if percent_change < 0 else '-'
-                trend = 'positive' if percent_change < 0 else 'negative'
-            else:
-                sign = '+' if percent_change > 0 else '-'
-                trend = 'positive' if percent_change > 0 else 'negative'
-    else:
-        percent_change = 0
-        sign = ''
-        trend = 'neutral'
+    if previous == 0:
+        return 0, '', 'neutral'
     
-    return round(abs(percent_change), 1), sign, trend
+    percent_changes, signs, trends = calculate_percent_changes([current], [previous], inverse_trend)
+    return percent_changes[0].item(), signs[0].item(), trends[0].item()
 
 def calculate_total_revenue(this_week_revenue_data, last_week_revenue_data):
     """
@@ -59,9 +105,11 @@ def calculate_number_of_orders(this_week_revenue_data, last_week_revenue_data):
     """
     Calculate order count metrics comparing current week to previous week.
     
+    Orders are counted once however many item lines they have.
+    
     Args:
-        this_week_revenue_data (DataFrame): Current week's revenue data
-        last_week_revenue_data (DataFrame): Previous week's revenue data
+        this_week_revenue_data (DataFrame): Current week's revenue data with 'order_id' column
+        last_week_revenue_data (DataFrame): Previous week's revenue data with 'order_id' column
     
     Returns:
         tuple: (this_week_number_of_order, last_week_number_of_order, percent_change, sign, trend)
@@ -71,8 +119,8 @@ def calculate_number_of_orders(this_week_revenue_data, last_week_revenue_data):
             - sign: '+', '-', or '' (empty for no change)
             - trend: 'positive', 'negative', or 'neutral'
     """
-    this_week_number_of_order = len(this_week_revenue_data)
-    last_week_number_of_order = len(last_week_revenue_data)
+    this_week_number_of_order = this_week_revenue_data['order_id'].nunique()
+    last_week_number_of_order = last_week_revenue_data['order_id'].nunique()
     
     percent_change, sign, trend = calculate_percent_change(this_week_number_of_order, last_week_number_of_order)
     
@@ -82,9 +130,11 @@ def calculate_average_order_value(this_week_revenue_data, last_week_revenue_data
     """
     Calculate average order value metrics comparing current week to previous week.
     
+    The average is taken over orders, i.e. total item value divided by distinct orders.
+    
     Args:
-        this_week_revenue_data (DataFrame): Current week's revenue data with 'price' column
-        last_week_revenue_data (DataFrame): Previous week's revenue data with 'price' column
+        this_week_revenue_data (DataFrame): Current week's revenue data with 'order_id' and 'price' columns
+        last_week_revenue_data (DataFrame): Previous week's revenue data with 'order_id' and 'price' columns
     
     Returns:
         tuple: (this_week_average_order_value, last_week_average_order_value, percent_change, sign, trend)
@@ -94,14 +144,83 @@ def calculate_average_order_value(this_week_revenue_data, last_week_revenue_data
             - sign: '+', '-', or '' (empty for no change)
             - trend: 'positive', 'negative', or 'neutral'
     """
-    this_week_average_order_value = this_week_revenue_data['price'].mean()
-    last_week_average_order_value = last_week_revenue_data['price'].mean()
+    this_week_average_order_value = this_week_revenue_data['price'].sum() / this_week_revenue_data['order_id'].nunique()
+    last_week_average_order_value = last_week_revenue_data['price'].sum() / last_week_revenue_data['order_id'].nunique()
     
     percent_change, sign, trend = calculate_percent_change(this_week_average_order_value, last_week_average_order_value)
     
     return this_week_average_order_value, last_week_average_order_value, percent_change, sign, trend
 
-def get_top_category_metrics(this_week_products_data, last_week_products_data, max_categories=3):
+def get_top_category_frame(current_sales, current_orders, previous_sales, max_categories=3, window_days=7):
+    """
+    Rank categories by sales and compare them against the previous period, as arrays.
+    
+    Top categories are picked with np.argpartition, so the cost stays linear in the
+    number of categories whatever max_categories is. Ties are broken like
+    Series.nlargest(): the category listed first wins.
+    
+    Args:
+        current_sales (Series): Sales per category in the current period
+        current_orders (Series): Order lines per category in the current period, same index
+        previous_sales (Series): Sales per category in the previous period, same index
+        max_categories (int, optional): Maximum number of top categories to return;
+                                        None ranks every category (default: 3)
+        window_days (int, optional): Length of the current period in days (default: 7)
+    
+    Returns:
+        DataFrame: One row per top category, best first, with columns 'sales',
+            'daily_order_rate', 'last_week_sales', 'percent_change', 'sign' and 'trend'
+    """
+    has_orders = current_orders.to_numpy() > 0
+    categories = current_sales.index[has_orders]
+    sales = current_sales.to_numpy(dtype='float64')[has_orders]
+    
+    k = len(sales) if max_categories is None else min(max_categories, len(sales))
+    if k < len(sales):
+        # The k-th largest value; every category reaching it is a candidate
+        kth_largest = sales[np.argpartition(-sales, k - 1)[:k]].min()
+        candidates = np.flatnonzero(sales >= kth_largest)
+    else:
+        candidates = np.arange(len(sales))
+    top = candidates[np.argsort(-sales[candidates], kind='stable')][:k]
+    
+    top_sales = sales[top]
+    orders = current_orders.to_numpy()[has_orders][top]
+    last_week_sales = previous_sales.to_numpy(dtype='float64')[has_orders][top]
+    
+    percent_changes, signs, trends = calculate_percent_changes(top_sales, last_week_sales)
+    
+    return pd.DataFrame({
+        'sales': top_sales,
+        # Calculate daily average over the period's days, rounding up
+        'daily_order_rate': -(-orders // window_days),
+        'last_week_sales': last_week_sales,
+        'percent_change': percent_changes,
+        'sign': signs,
+        'trend': trends
+    }, index=categories[top])
+
+def top_category_frame_to_tuple(top_category_frame):
+    """
+    Convert the result of get_top_category_frame() into the tuple layout of get_top_category_metrics().
+    
+    Args:
+        top_category_frame (DataFrame): Result of get_top_category_frame()
+    
+    Returns:
+        tuple: Same layout as get_top_category_metrics()
+    """
+    return (
+        tuple(top_category_frame.index),
+        tuple(top_category_frame['sales'].tolist()),
+        tuple(top_category_frame['daily_order_rate'].tolist()),
+        tuple(top_category_frame['last_week_sales'].tolist()),
+        tuple(top_category_frame['percent_change'].tolist()),
+        tuple(top_category_frame['sign'].tolist()),
+        tuple(top_category_frame['trend'].tolist())
+    )
+
+def get_top_category_metrics(this_week_products_data, last_week_products_data, max_categories=3, window_days=7):
     """
     Identify top product categories by sales and calculate related metrics.
     
@@ -109,7 +228,9 @@ def get_top_category_metrics(this_week_products_data, last_week_products_data, m
         this_week_products_data (DataFrame): Current week's product data with columns:
                                            'product_category_name_english' and 'price'
         last_week_products_data (DataFrame): Previous week's product data with same columns
-        max_categories (int, optional): Maximum number of top categories to return (default: 3)
+        max_categories (int, optional): Maximum number of top categories to return;
+                                        None returns every category (default: 3)
+        window_days (int, optional): Length of the current period in days (default: 7)
     
     Returns:
         tuple: Multiple tuples containing:
@@ -121,52 +242,19 @@ def get_top_category_metrics(this_week_products_data, last_week_products_data, m
             - signs: '+', '-', or '' for each category
             - trends: 'positive', 'negative', or 'neutral' for each category
     """
-    # Get this week's top categories and their sales
-    this_week_data = this_week_products_data.groupby('product_category_name_english')['price'].sum().nlargest(max_categories)
-    this_week_top_categories = tuple(this_week_data.index)
-    this_week_top_products_sales = tuple(this_week_data.values)
-    
-    # Count orders for each of the top categories and calculate daily average
-    daily_order_rates = []
-    for category in this_week_top_categories:
-        # Count occurrences of this category in the dataset
-        count = (this_week_products_data['product_category_name_english'] == category).sum()
-        
-        # Calculate daily average by dividing by 7 and rounding up
-        daily_rate = math.ceil(count / 7)  # Use ceil to round up
-        daily_order_rates.append(daily_rate)
-
-    # Convert to tuples
-    daily_order_rates = tuple(daily_order_rates)
-    
-    # Calculate sales for these same categories in the last week
-    last_week_sales = []
-    percent_changes = []
-    signs = []
-    trends = []
-    
-    for category in this_week_top_categories:
-        # Get last week's sales for this category
-        last_week_category_sales = last_week_products_data[
-            last_week_products_data['product_category_name_english'] == category
-        ]['price'].sum()
-        
-        last_week_sales.append(last_week_category_sales)
-        
-        # Calculate percentage change
-        percent_change, sign, trend = calculate_percent_change(this_week_data[category], last_week_category_sales)
-        
-        percent_changes.append(percent_change)
-        signs.append(sign)
-        trends.append(trend)
-    
-    # Convert lists to tuples
-    last_week_sales = tuple(last_week_sales)
-    percent_changes = tuple(percent_changes)
-    signs = tuple(signs)
-    trends = tuple(trends)
-    
-    return this_week_top_categories, this_week_top_products_sales, daily_order_rates, last_week_sales, percent_changes, signs, trends
+    # One groupby per week, aligned on this week's categories
+    this_week_data = this_week_products_data.groupby('product_category_name_english')['price'].agg(['sum', 'size'])
+    last_week_data = last_week_products_data.groupby('product_category_name_english')['price'].sum()
+    
+    top_category_frame = get_top_category_frame(
+        this_week_data['sum'],
+        this_week_data['size'],
+        last_week_data.reindex(this_week_data.index, fill_value=0),
+        max_categories,
+        window_days
+    )
+    
+    return top_category_frame_to_tuple(top_category_frame)
 
 def get_mean_delivery_time(operational_insights_data):
     """
@@ -175,31 +263,14 @@ def get_mean_delivery_time(operational_insights_data):
     Filters out outliers by excluding delivery times over 50 days.
     
     Args:
-        operational_insights_data (DataFrame): Operations data with columns:
-                                             'order_status', 'order_delivered_customer_date',
-                                             and 'order_purchase_timestamp'
+        operational_insights_data (DataFrame): Operations data with the 'delivery_days' column
+                                             data_processor.add_derived_columns() gives orders
     
     Returns:
         float: Mean delivery time in days for delivered orders
     """
-    # Make sure the timestamp columns are datetime type
-    operational_insights_data['order_delivered_customer_date'] = pd.to_datetime(operational_insights_data['order_delivered_customer_date'])
-    operational_insights_data['order_purchase_timestamp'] = pd.to_datetime(operational_insights_data['order_purchase_timestamp'])
-
-    # Filter for delivered orders
-    delivered_orders = operational_insights_data[operational_insights_data['order_status'] == 'delivered']
-
-    # Calculate delivery times
-    delivery_times = delivered_orders['order_delivered_customer_date'] - delivered_orders['order_purchase_timestamp']
-
-    # Convert to days
-    delivery_days = delivery_times.dt.total_seconds() / (86400)  # 86400 seconds in a day
-
-    # Filter for delivery times less than 50 days
-    filtered_delivery_days = delivery_days[delivery_days < 50]
-
-    # Calculate the mean
-    return filtered_delivery_days.mean()
+    # Calculate the mean over delivered orders, ignoring the NaN-masked rows
+    return operational_insights_data['delivery_days'].mean()
 
 def calculate_average_delivery_time(this_week_operational_insights_data, last_week_operational_insights_data):
     """
@@ -211,7 +282,7 @@ def calculate_average_delivery_time(this_week_operational_insights_data, last_we
     Args:
         this_week_operational_insights_data (DataFrame): Current week's operational data
         last_week_operational_insights_data (DataFrame): Previous week's operational data
-        
+    
     Returns:
         tuple: (this_week_mean_delivery_time, last_week_mean_delivery_time, percent_change, sign, trend)
             - this_week_mean_delivery_time: Average delivery time for current week (in days)
@@ -240,7 +311,7 @@ def calculate_average_order_rating(this_week_operational_insights_data, last_wee
     Args:
         this_week_operational_insights_data (DataFrame): Current week's operational data with 'review_score' column
         last_week_operational_insights_data (DataFrame): Previous week's operational data with 'review_score' column
-        
+    
     Returns:
         tuple: (this_week_average_order_rating, difference, sign, trend)
             - this_week_average_order_rating: Average review score for current week
@@ -251,6 +322,21 @@ def calculate_average_order_rating(this_week_operational_insights_data, last_wee
     this_week_average_order_rating = this_week_operational_insights_data['review_score'].mean()
     last_week_average_order_rating = last_week_operational_insights_data['review_score'].mean()
     
+    difference, sign, trend = calculate_rating_difference(this_week_average_order_rating, last_week_average_order_rating)
+    
+    return this_week_average_order_rating, difference, sign, trend
+
+def calculate_rating_difference(this_week_average_order_rating, last_week_average_order_rating):
+    """
+    Compare two average ratings by absolute difference rather than percentage.
+    
+    Args:
+        this_week_average_order_rating: Current period average review score
+        last_week_average_order_rating: Previous period average review score
+    
+    Returns:
+        tuple: (difference, sign, trend), with differences under 0.05 treated as no change
+    """
     # Calculate the difference (not percentage)
     raw_difference = this_week_average_order_rating - last_week_average_order_rating
     
@@ -264,4 +350,39 @@ def calculate_average_order_rating(this_week_operational_insights_data, last_wee
         sign = '+' if raw_difference > 0 else '-'
         trend = 'positive' if raw_difference > 0 else 'negative'
     
-    return this_week_average_order_rating, difference, sign, trend
\ No newline at end of file
+    return difference, sign, trend
+
+def get_period_category_sales(period_products_data):
+    """
+    Aggregate sales and order lines per category and period in one groupby.
+    
+    Args:
+        period_products_data (DataFrame): Product data with 'period',
+                                        'product_category_name_english' and 'price' columns
+    
+    Returns:
+        DataFrame: One row per category with ('sales', period) and ('orders', period) columns
+    """
+    category_sales = period_products_data.groupby(
+        ['product_category_name_english', 'period'], observed=False
+    )['price'].agg(sales='sum', orders='size')
+    
+    return category_sales.unstack('period', fill_value=0)
+
+def get_rollup_category_sales(period_totals):
+    """
+    Reshape rollup totals into per-category sales and order lines for every period.
+    
+    Args:
+        period_totals (DataFrame): Totals returned by rollups.get_rollup_period_totals()
+    
+    Returns:
+        DataFrame: Same layout as get_period_category_sales()
+    """
+    category_totals = period_totals[period_totals.index.get_level_values('product_category_name_english').notna()]
+    category_sales = pd.DataFrame({
+        'sales': category_totals['revenue'],
+        'orders': category_totals['items'].astype('int64')
+    })
+    
+    return category_sales.unstack('period', fill_value=0)
@@ -1,4 +1,11 @@
 import os
+import io
+import re
+import time
+import sqlite3
+import argparse
+import contextlib
+import multiprocessing
 import pandas as pd
 from datetime import datetime, timedelta
 import shutil
@@ -8,43 +15,544 @@ from jinja2 import Environment, FileSystemLoader
 from data_processor import (
     load_files_paths,
     load_table,
-    load_orders_data,
-    load_revenue_data,
-    load_products_data,
-    load_operational_insights_data,
+    sort_orders_by_purchase_time,
+    load_period_orders_data,
+    load_period_revenue_data,
+    load_period_products_data,
+    load_period_operational_insights_data,
+    build_order_fact_table,
     prepare_sales_trend_data
 )
 
+from ingest import INGEST_SOURCE_TABLES, update_daily_rollup, load_daily_sketches, load_daily_breakdowns
+
+from sketches import get_window_sketches, build_order_sketches
+
+from cohorts import COHORT_SOURCE_TABLES, update_cohorts, get_period_customers
+
+from anomalies import ALERT_DAILY_MEASURES, ALERT_HISTORY_DAYS, ALERT_Z_THRESHOLD, build_daily_grids, detect_anomalies
+
+from breakdowns import (
+    add_customer_states,
+    get_period_breakdowns,
+    get_rollup_period_breakdowns,
+    get_seller_labels
+)
+
+import sqlite_store
+
+import arrow_engine
+
+from rollups import (
+    build_rollup_prefix_sums,
+    get_rollup_period_totals,
+    get_rollup_daily_grids,
+    prepare_rollup_sales_trend_data
+)
+
 from metrics import (
-    calculate_total_revenue,
-    calculate_number_of_orders,
-    calculate_average_order_value,
-    get_top_category_metrics,
-    calculate_average_delivery_time,
-    calculate_average_order_rating
+    get_period_category_sales,
+    get_rollup_category_sales
 )
 
-from visualizations import (
-    setup_visualization_style,
-    create_sales_trend_chart,
-    create_top_categories_chart
+from metric_registry import (
+    get_required_measures,
+    calculate_period_measures,
+    evaluate_metrics,
+    evaluate_top_categories,
+    evaluate_distributions,
+    evaluate_breakdowns,
+    evaluate_alerts,
+    evaluate_cohorts
 )
 
+from chart_data import IMAGE_FORMATS, CHART_FORMATS, get_chart_data
+
 from text_generator import (
     create_executive_summary,
     generate_sales_insights,
     generate_product_insights,
-    generate_operational_insights
+    generate_operational_insights,
+    generate_alert_insights,
+    generate_customer_insights
 )
 
-def generate_ecommerce_report(this_week_start=None, this_week_end=None):
+# Source tables a report reads, whatever the engine
+REPORT_TABLES = ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews', 'order_payment', 'customers', 'sellers']
+
+# Source tables each engine reads, on top of the cohort and sellers tables every report reads
+ENGINE_TABLES = {
+    'rollup': INGEST_SOURCE_TABLES,
+    'sqlite': ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews', 'order_payment', 'customers'],
+    'arrow': arrow_engine.ARROW_TABLES,
+    'pandas': ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews', 'order_payment', 'customers']
+}
+
+def get_report_tables(engine='rollup'):
+    """
+    List the source tables a report built with the given engine reads.
+    
+    Args:
+        engine (str): Data engine, as for load_report_data().
+    
+    Returns:
+        list: Table names, in REPORT_TABLES order.
+    """
+    if engine not in ENGINE_TABLES:
+        raise ValueError(f"Unknown engine: {engine}")
+    
+    engine_tables = set(ENGINE_TABLES[engine]) | set(COHORT_SOURCE_TABLES) | {'sellers'}
+    return [table_name for table_name in REPORT_TABLES if table_name in engine_tables]
+
+def load_report_data(engine='rollup', data_dir='data'):
+    """
+    Load everything report generation needs from the data source, once.
+    
+    The result can be passed to generate_ecommerce_report() for any number of
+    report periods, so a batch of reports shares a single data load.
+    
+    Args:
+        engine (str): Where the numbers come from:
+            - 'rollup': prefix sums over the incrementally ingested daily rollup (default)
+            - 'sqlite': indexed window queries against a local SQLite copy of the tables
+            - 'arrow': multithreaded Arrow query plans over the Feather copies of the tables
+            - 'pandas': period-tagged joins over the full CSV tables
+        data_dir (str): Directory holding the rollup and SQLite files.
+    
+    Returns:
+        dict: Loaded data, with the engine name under 'engine'
+    """
+    file_paths = load_files_paths()
+    report_tables = get_report_tables(engine)
+    
+    # Verify the files this engine reads exist
+    missing_files = [f for f in report_tables if not file_paths.get(f) or not os.path.exists(file_paths[f])]
+    
+    if missing_files:
+        raise FileNotFoundError(f"Missing required files: {', '.join(missing_files)}")
+    
+    # Sellers are only needed for display labels, whatever the engine
+    member_labels = {'seller': get_seller_labels(load_table(file_paths['sellers'], 'sellers'))}
+    
+    # Customer cohorts are cached next to the other aggregates, whatever the engine
+    cohorts = update_cohorts(file_paths, os.path.join(data_dir, 'cohorts'))
+    
+    if engine == 'rollup':
+        rollup_dir = os.path.join(data_dir, 'rollups')
+        daily_rollup = update_daily_rollup(file_paths, rollup_dir)
+        return {
+            'engine': engine,
+            'rollup_prefix_sums': build_rollup_prefix_sums(daily_rollup),
+            'daily_sketches': load_daily_sketches(rollup_dir),
+            'daily_breakdowns': load_daily_breakdowns(rollup_dir),
+            'member_labels': member_labels,
+            'cohorts': cohorts
+        }
+    
+    if engine == 'sqlite':
+        database_path = os.path.join(data_dir, 'ecommerce.sqlite')
+        sqlite_store.open_sqlite_store(file_paths, database_path).close()
+        return {'engine': engine, 'database_path': database_path, 'member_labels': member_labels, 'cohorts': cohorts}
+    
+    if engine == 'arrow':
+        datasets = arrow_engine.open_arrow_datasets(file_paths)
+        return {'engine': engine, 'datasets': datasets, 'member_labels': member_labels, 'cohorts': cohorts}
+    
+    if engine == 'pandas':
+        tables = {table_name: load_table(file_paths[table_name], table_name) for table_name in report_tables if table_name != 'sellers'}
+        # Join customer states once, so every period of every report already carries them
+        tables['orders'] = sort_orders_by_purchase_time(add_customer_states(tables['orders'], tables['customers']))
+        tables['order_fact_table'] = sort_orders_by_purchase_time(build_order_fact_table(
+            tables['orders'],
+            tables['ordered_items'],
+            tables['order_payment'],
+            tables['order_reviews']
+        ))
+        return {'engine': engine, 'tables': tables, 'member_labels': member_labels, 'cohorts': cohorts}
+    
+    raise ValueError(f"Unknown engine: {engine}")
+
+def load_period_metrics(report_data, periods):
+    """
+    Load per-period measures, category sales and breakdowns, and the first period's sales trend and sketches.
+    
+    Args:
+        report_data (dict): Data returned by load_report_data().
+        periods (list): (label, start_date, end_date) tuples; the first one is the reported period.
+    
+    Returns:
+        tuple: (period_measures, category_sales, breakdowns, sales_trend, sketches) where period_measures
+            is laid out like metric_registry.calculate_period_measures(), category_sales like
+            metrics.get_period_category_sales(), breakdowns like breakdowns.get_period_breakdowns(),
+            sales_trend like data_processor.prepare_sales_trend_data() and sketches like
+            sketches.get_window_sketches()
+    """
+    _, start_date, end_date = periods[0]
+    
+    if report_data['engine'] == 'rollup':
+        rollup_prefix_sums = report_data['rollup_prefix_sums']
+        period_totals = get_rollup_period_totals(rollup_prefix_sums, periods)
+        period_measures = period_totals.groupby(level='period', observed=False).sum()
+        # Rollup orders are counted once per category they touch; across
+        # categories each order is attributed to exactly one
+        period_measures['orders'] = period_measures['attributed_orders']
+        return (
+            period_measures,
+            get_rollup_category_sales(period_totals),
+            get_rollup_period_breakdowns(report_data['daily_breakdowns'], periods),
+            prepare_rollup_sales_trend_data(rollup_prefix_sums, start_date, end_date),
+            get_window_sketches(report_data['daily_sketches'], start_date, end_date)
+        )
+    
+    if report_data['engine'] == 'sqlite':
+        connection = sqlite3.connect(report_data['database_path'])
+        try:
+            period_revenue = sqlite_store.load_period_data(connection, ['ordered_items', 'customers'], periods)
+            period_products = sqlite_store.load_period_data(connection, ['ordered_items', 'products'], periods)
+            period_ops = sqlite_store.load_period_data(connection, ['ordered_items', 'order_reviews'], periods)
+            period_order_facts = sqlite_store.load_period_order_facts(connection, periods)
+        finally:
+            connection.close()
+    elif report_data['engine'] == 'arrow':
+        datasets = report_data['datasets']
+        period_revenue = arrow_engine.load_period_data(datasets, ['ordered_items', 'customers'], periods)
+        period_products = arrow_engine.load_period_data(datasets, ['ordered_items', 'products'], periods)
+        period_ops = arrow_engine.load_period_data(datasets, ['ordered_items', 'order_reviews'], periods)
+        period_order_facts = arrow_engine.load_period_order_facts(datasets, periods)
+    else:
+        tables = report_data['tables']
+        period_orders = load_period_orders_data(tables['orders'], periods)
+        period_revenue = load_period_revenue_data(period_orders, tables['ordered_items'])
+        period_products = load_period_products_data(period_revenue, tables['products'], tables['product_category'])
+        period_ops = load_period_operational_insights_data(period_revenue, tables['order_reviews'])
+        period_order_facts = load_period_orders_data(tables['order_fact_table'], periods)
+    
+    first_period_revenue = period_revenue[period_revenue['period'] == periods[0][0]]
+    return (
+        calculate_period_measures(
+            {'revenue': period_revenue, 'operations': period_ops, 'orders': period_order_facts},
+            get_required_measures()
+        ),
+        get_period_category_sales(period_products),
+        get_period_breakdowns(period_revenue),
+        prepare_sales_trend_data(first_period_revenue),
+        build_order_sketches(first_period_revenue)
+    )
+
+def load_alert_grids(report_data, start_date, end_date, history_days=ALERT_HISTORY_DAYS):
+    """
+    Load daily per-category totals of the reported period and the history it is scored against.
+    
+    Args:
+        report_data (dict): Data returned by load_report_data().
+        start_date (str): First day of the reported period.
+        end_date (str): Last day of the reported period (whole day included).
+        history_days (int): Days of history before the reported period.
+    
+    Returns:
+        dict: Daily grids laid out like anomalies.build_daily_grids()
+    """
+    history_start = (pd.Timestamp(start_date) - pd.Timedelta(days=history_days)).strftime('%Y-%m-%d')
+    
+    if report_data['engine'] == 'rollup':
+        return get_rollup_daily_grids(report_data['rollup_prefix_sums'], history_start, end_date, ALERT_DAILY_MEASURES)
+    
+    periods = [('history', history_start, end_date)]
+    if report_data['engine'] == 'sqlite':
+        connection = sqlite3.connect(report_data['database_path'])
+        try:
+            product_lines = sqlite_store.load_period_data(connection, ['ordered_items', 'products'], periods)
+            review_lines = sqlite_store.load_period_data(connection, ['ordered_items', 'products', 'order_reviews'], periods)
+        finally:
+            connection.close()
+    elif report_data['engine'] == 'arrow':
+        product_lines = arrow_engine.load_period_data(report_data['datasets'], ['ordered_items', 'products'], periods)
+        review_lines = arrow_engine.load_period_data(report_data['datasets'], ['ordered_items', 'products', 'order_reviews'], periods)
+    else:
+        tables = report_data['tables']
+        period_revenue = load_period_revenue_data(load_period_orders_data(tables['orders'], periods), tables['ordered_items'])
+        product_lines = load_period_products_data(period_revenue, tables['products'], tables['product_category'])
+        review_lines = load_period_operational_insights_data(product_lines, tables['order_reviews'])
+    
+    return build_daily_grids(product_lines, review_lines, history_start, end_date)
+
+# Baselines a report period can be compared against
+COMPARISON_BASELINES = ['previous', 'last_year', 'trailing_4_weeks']
+
+def get_report_dates(this_week_start=None, this_week_end=None, window_days=7, comparison='previous'):
+    """
+    Resolve the reported period and the baseline period it is compared against.
+    
+    Args:
+        this_week_start: Start date of the reported period (YYYY-MM-DD); defaults to window_days - 1 days before the end
+        this_week_end: End date of the reported period (YYYY-MM-DD); defaults to today
+        window_days: Length of the reported period in days when no start date is given (default: 7)
+        comparison: Baseline the period is compared against, one of COMPARISON_BASELINES:
+            - 'previous': the same number of days right before the period (default)
+            - 'last_year': the same dates one year earlier
+            - 'trailing_4_weeks': the 28 days before the period, averaged down to the period's length
+    
+    Returns:
+        dict: 'this_week_start' and 'this_week_end' of the reported period, 'last_week_start' and
+            'last_week_end' of the baseline window, 'window_days', 'comparison', 'comparison_scale'
+            (factor turning baseline window totals into a comparable total), 'comparison_label'
+            (e.g. 'last week') and 'comparison_header' (e.g. 'Last Week')
+    """
+    if comparison not in COMPARISON_BASELINES:
+        raise ValueError(f"Unknown comparison: {comparison}")
+    
+    # Set default date range if not provided
+    if not this_week_end:
+        today = datetime.now()
+        this_week_end = today.strftime('%Y-%m-%d')
+    
+    if not this_week_start:
+        end_date = datetime.strptime(this_week_end, '%Y-%m-%d')
+        start_date = end_date - timedelta(days=window_days - 1)
+        this_week_start = start_date.strftime('%Y-%m-%d')
+    
+    this_week_start_dt = datetime.strptime(this_week_start, '%Y-%m-%d')
+    this_week_end_dt = datetime.strptime(this_week_end, '%Y-%m-%d')
+    window_days = (this_week_end_dt - this_week_start_dt).days + 1
+    if window_days < 1:
+        raise ValueError(f"End date {this_week_end} is before start date {this_week_start}")
+    
+    # Calculate the baseline window for comparison
+    comparison_scale = 1.0
+    if comparison == 'last_year':
+        last_week_start_dt = this_week_start_dt - pd.DateOffset(years=1)
+        last_week_end_dt = this_week_end_dt - pd.DateOffset(years=1)
+        comparison_label, comparison_header = 'the same period last year', 'Last Year'
+    elif comparison == 'trailing_4_weeks':
+        last_week_end_dt = this_week_start_dt - timedelta(days=1)
+        last_week_start_dt = last_week_end_dt - timedelta(days=27)
+        comparison_scale = window_days / 28
+        comparison_label, comparison_header = 'the trailing 4-week average', '4-Week Avg.'
+    else:
+        last_week_end_dt = this_week_start_dt - timedelta(days=1)
+        last_week_start_dt = last_week_end_dt - timedelta(days=window_days - 1)
+        if window_days == 7:
+            comparison_label, comparison_header = 'last week', 'Last Week'
+        else:
+            comparison_label, comparison_header = f'the previous {window_days} days', f'Previous {window_days} Days'
+    
+    return {
+        'this_week_start': this_week_start,
+        'this_week_end': this_week_end,
+        'last_week_start': last_week_start_dt.strftime('%Y-%m-%d'),
+        'last_week_end': last_week_end_dt.strftime('%Y-%m-%d'),
+        'window_days': window_days,
+        'comparison': comparison,
+        'comparison_scale': comparison_scale,
+        'comparison_label': comparison_label,
+        'comparison_header': comparison_header
+    }
+
+def scale_baseline(period_measures, period_frames, previous_period, scale):
+    """
+    Turn the totals of a longer baseline window into totals for a window of the reported length.
+    
+    Ratio metrics are unaffected; totals such as revenue and order counts become averages.
+    
+    Args:
+        period_measures (DataFrame): Measures indexed by period, see load_period_metrics().
+        period_frames (list): Frames with (measure, period) columns, such as category sales and breakdowns.
+        previous_period (str): Label of the baseline period.
+        scale (float): Factor applied to the baseline totals.
+    
+    Returns:
+        tuple: (period_measures, period_frames) with the baseline period scaled
+    """
+    period_measures = period_measures.astype('float64')
+    period_measures.loc[previous_period] *= scale
+    
+    scaled_frames = []
+    for period_frame in period_frames:
+        baseline_columns = [column for column in period_frame.columns if column[1] == previous_period]
+        period_frame = period_frame.astype({column: 'float64' for column in baseline_columns})
+        period_frame[baseline_columns] *= scale
+        scaled_frames.append(period_frame)
+    return period_measures, scaled_frames
+
+def calculate_report_metrics(report_data, dates, alert_threshold=ALERT_Z_THRESHOLD):
+    """
+    Calculate every metric shown in the report.
+    
+    Args:
+        report_data (dict): Data returned by load_report_data().
+        dates (dict): Report dates returned by get_report_dates().
+        alert_threshold (float): Absolute z-score at which a category's day is flagged as an alert.
+    
+    Returns:
+        dict: metric_registry.MetricResult for every registered metric ('revenue', 'orders',
+            'aov', 'delivery', 'satisfaction', 'on_time_rate', 'repeat_rate'), a TopCategoriesResult under 'categories',
+            a BreakdownResult under 'seller_breakdown' and 'customer_state_breakdown',
+            a DistributionResult under 'order_value_distribution' and 'delivery_time_days_distribution',
+            an AlertsResult under 'alerts', a CohortResult under 'cohorts' and the sales trend
+            tuple under 'sales_trend'
+    """
+    # Load the reported period's and the baseline's numbers in one pass
+    periods = [
+        ('this_week', dates['this_week_start'], dates['this_week_end']),
+        ('last_week', dates['last_week_start'], dates['last_week_end'])
+    ]
+    period_measures, category_sales, breakdowns, sales_trend, sketches = load_period_metrics(report_data, periods)
+    
+    # Distinct and returning customers, from the customer index whatever the engine
+    period_customers = get_period_customers(report_data['cohorts']['customer_index'], periods)
+    period_measures = period_measures.join(
+        calculate_period_measures({'customers': period_customers}, ['customers', 'returning_customers'])
+    )
+    if dates['comparison_scale'] != 1:
+        period_measures, (category_sales, breakdowns) = scale_baseline(
+            period_measures, [category_sales, breakdowns], 'last_week', dates['comparison_scale']
+        )
+    
+    # Evaluate every registered KPI against the baseline
+    metrics = evaluate_metrics(period_measures, 'this_week', 'last_week')
+    metrics['categories'] = evaluate_top_categories(
+        category_sales,
+        'this_week',
+        'last_week',
+        max_categories=5,
+        window_days=dates['window_days']
+    )
+    
+    # Top sellers and customer states, compared against the baseline
+    metrics.update(evaluate_breakdowns(
+        breakdowns,
+        'this_week',
+        'last_week',
+        max_members=5,
+        member_labels=report_data['member_labels']
+    ))
+    
+    # Delivery time and order value quantiles of the reported period
+    metrics.update(evaluate_distributions(sketches))
+    
+    # Weekly retention of the latest customer cohorts known at the end of the period
+    metrics['cohorts'] = evaluate_cohorts(report_data['cohorts']['cohort_matrix'], dates['this_week_end'])
+    
+    # Categories and days that deviated from their own recent history
+    alert_grids = load_alert_grids(report_data, dates['this_week_start'], dates['this_week_end'])
+    metrics['alerts'] = evaluate_alerts(detect_anomalies(alert_grids, alert_threshold), alert_threshold)
+    
+    # Prepare data for sales trend visualization
+    metrics['sales_trend'] = sales_trend
+    
+    return metrics
+
+def get_chart_jobs(metrics, sales_trend_path, categories_path):
+    """
+    Build the chart jobs of one report from its metrics.
+    
+    Args:
+        metrics (dict): Metrics returned by calculate_report_metrics().
+        sales_trend_path (str): Output path of the sales trend chart.
+        categories_path (str): Output path of the top categories chart.
+    
+    Returns:
+        list: (chart_type, chart_args) tuples for chart_renderer.render_chart().
+    """
+    day_names, daily_sales, daily_orders = metrics['sales_trend']
+    top_categories = metrics['categories']
+    return [
+        ('sales_trend', {
+            'day_names': day_names,
+            'daily_revenue': daily_sales,
+            'order_counts': daily_orders,
+            'output_path': sales_trend_path
+        }),
+        ('top_categories', {
+            'categories': top_categories.categories,
+            'sales': top_categories.sales,
+            'daily_rates': top_categories.daily_order_rates,
+            'prev_week_sales': top_categories.previous_sales,
+            'percent_changes': top_categories.percent_changes,
+            'signs': top_categories.signs,
+            'trends': top_categories.trends,
+            'max_categories': 5,
+            'output_path': categories_path
+        })
+    ]
+
+def open_chart_renderer(chart_format, processes=None, use_templates=False):
+    """
+    Start the chart workers a chart format needs.
+    
+    Only image charts need matplotlib, so chart_renderer is imported here rather
+    than with this module, and 'json' reports never load it.
+    
+    Args:
+        chart_format (str): One of CHART_FORMATS.
+        processes (int, optional): Number of chart worker processes, see ChartRenderer.
+        use_templates (bool): Whether workers draw on reusable figure templates.
+    
+    Returns:
+        ChartRenderer, or a context manager giving None when the browser draws the charts.
+    """
+    if chart_format not in IMAGE_FORMATS:
+        return contextlib.nullcontext()
+    from chart_renderer import ChartRenderer
+    return ChartRenderer(processes, use_templates=use_templates)
+
+def read_inline_svg(svg_path):
+    """
+    Read an SVG chart as markup that can be placed straight into the report's HTML.
+    
+    The XML declaration, doctype and metadata block matplotlib writes are dropped,
+    as HTML has no use for them.
+    
+    Args:
+        svg_path (str): Path of the SVG file.
+    
+    Returns:
+        str: The <svg> element, or None if the chart is missing.
+    """
+    try:
+        with open(svg_path, 'r', encoding='utf-8') as f:
+            svg = f.read()
+    except FileNotFoundError:
+        return None
+    svg = svg[svg.find('<svg'):]
+    return re.sub(r'\s*<metadata>.*?</metadata>', '', svg, count=1, flags=re.DOTALL)
+
+def create_template_environment(template_dir='templates'):
+    """
+    Set up the Jinja2 environment the report template is rendered with.
+    
+    Args:
+        template_dir (str): Directory holding the report template.
+    
+    Returns:
+        jinja2.Environment: Environment with the report's filters registered
+    """
+    env = Environment(loader=FileSystemLoader(template_dir))
+    env.filters['format_currency'] = lambda value: f"{float(value):,.2f}"
+    env.filters['round'] = lambda value, precision: round(float(value), precision)
+    return env
+
+def generate_ecommerce_report(this_week_start=None, this_week_end=None, engine='rollup', report_data=None, template_env=None,
+                              window_days=7, comparison='previous', alert_threshold=ALERT_Z_THRESHOLD, chart_renderer=None,
+                              chart_format='png'):
     """
     Process e-commerce data and generate an HTML report with metrics, visualizations and insights.
     
     Args:
         this_week_start: Start date for current week (YYYY-MM-DD)
         this_week_end: End date for current week (YYYY-MM-DD)
-        
+        engine: Data engine passed to load_report_data() ('rollup', 'sqlite', 'arrow' or 'pandas')
+        report_data: Data already returned by load_report_data(); loaded with engine if None
+        template_env: Environment from create_template_environment(); created if None
+        window_days: Length of the reported period when no start date is given (default: 7)
+        comparison: Baseline passed to get_report_dates() ('previous', 'last_year' or 'trailing_4_weeks')
+        alert_threshold: Absolute z-score at which a category's day is flagged as an alert
+        chart_renderer: ChartRenderer the charts are queued on; rendered in this process if None.
+            Queued charts may still be rendering when this returns, see ChartRenderer.wait()
+        chart_format: One of CHART_FORMATS. 'svg' charts are inlined into the HTML instead of
+            linked, so they are drawn in this process before the report is written. 'json'
+            embeds the charts' data, which the browser draws with report_charts.js
+    
     Returns:
         str: Path to the generated HTML report
     """
@@ -57,102 +565,31 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
             'visualization_paths': {}  # Paths to generated charts
         }
         
-        # Set default date range if not provided
-        if not this_week_end:
-            today = datetime.now()
-            this_week_end = today.strftime('%Y-%m-%d')
-            
-        if not this_week_start:
-            end_date = datetime.strptime(this_week_end, '%Y-%m-%d')
-            start_date = end_date - timedelta(days=6)  # 7 day period
-            this_week_start = start_date.strftime('%Y-%m-%d')
-            
-        # Calculate last week's date range for comparison
-        this_week_start_dt = datetime.strptime(this_week_start, '%Y-%m-%d')
-        last_week_end_dt = this_week_start_dt - timedelta(days=1)
-        last_week_start_dt = last_week_end_dt - timedelta(days=6)  # 7 day period
-        
-        results['dates'] = {
-            'this_week_start': this_week_start,
-            'this_week_end': this_week_end,
-            'last_week_start': last_week_start_dt.strftime('%Y-%m-%d'),
-            'last_week_end': last_week_end_dt.strftime('%Y-%m-%d')
-        }
+        results['dates'] = get_report_dates(this_week_start, this_week_end, window_days, comparison)
+        this_week_start = results['dates']['this_week_start']
+        this_week_end = results['dates']['this_week_end']
         
         print(f"Generating report for period: {this_week_start} to {this_week_end}")
         print(f"Comparison period: {results['dates']['last_week_start']} to {results['dates']['last_week_end']}\n")
         
         # Create directories for outputs
         visualization_dir = 'data/assets/plots'
+        chart_cache_dir = os.path.join(visualization_dir, 'cache')
         reports_dir = 'data/reports'
         os.makedirs(visualization_dir, exist_ok=True)
         os.makedirs(reports_dir, exist_ok=True)
         
         # STEP 1: LOAD DATA
         print("Loading data tables...")
-        file_paths = load_files_paths()
-        
-        # Verify required files exist
-        required_files = ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews']
-        missing_files = [f for f in required_files if not file_paths.get(f) or not os.path.exists(file_paths[f])]
-        
-        if missing_files:
-            raise FileNotFoundError(f"Missing required files: {', '.join(missing_files)}")
-        
-        # Load tables and prepare data
-        orders_table = load_table(file_paths['orders'])
-        order_items_table = load_table(file_paths['ordered_items'])
-        products_table = load_table(file_paths['products'])
-        product_category_table = load_table(file_paths['product_category'])
-        order_reviews_table = load_table(file_paths['order_reviews'])
-        
-        this_week_orders, last_week_orders = load_orders_data(
-            orders_table, 
-            this_week_start, 
-            this_week_end, 
-            results['dates']['last_week_start'], 
-            results['dates']['last_week_end']
-        )
-        
-        this_week_revenue, last_week_revenue = load_revenue_data(
-            this_week_orders,
-            last_week_orders,
-            order_items_table
-        )
-        
-        this_week_products, last_week_products = load_products_data(
-            this_week_revenue,
-            last_week_revenue,
-            products_table,
-            product_category_table
-        )
-        
-        this_week_ops, last_week_ops = load_operational_insights_data(
-            this_week_revenue,
-            last_week_revenue,
-            order_reviews_table
-        )
+        if report_data is None:
+            report_data = load_report_data(engine)
         
         print("✓ Data loaded successfully\n")
         
         # STEP 2: CALCULATE METRICS
         print("Calculating metrics...")
         
-        # Calculate KPIs with week-over-week comparison
-        results['metrics']['revenue'] = calculate_total_revenue(this_week_revenue, last_week_revenue)
-        results['metrics']['orders'] = calculate_number_of_orders(this_week_revenue, last_week_revenue)
-        results['metrics']['aov'] = calculate_average_order_value(this_week_revenue, last_week_revenue)
-        results['metrics']['categories'] = get_top_category_metrics(
-            this_week_products,
-            last_week_products,
-            max_categories=5
-        )
-        results['metrics']['delivery'] = calculate_average_delivery_time(this_week_ops, last_week_ops)
-        results['metrics']['satisfaction'] = calculate_average_order_rating(this_week_ops, last_week_ops)
-        
-        # Prepare data for sales trend visualization
-        day_names, revenue_values, order_counts = prepare_sales_trend_data(this_week_revenue)
-        results['metrics']['sales_trend'] = (day_names, revenue_values, order_counts)
+        results['metrics'] = calculate_report_metrics(report_data, results['dates'], alert_threshold)
         
         print("✓ Metrics calculated successfully\n")
         
@@ -164,13 +601,16 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
             results['metrics']['revenue'],
             results['metrics']['orders'],
             results['metrics']['aov'],
-            results['metrics']['categories']
+            results['metrics']['categories'],
+            results['dates']['comparison_label']
         )
         
         results['insights']['sales'] = generate_sales_insights(
             results['metrics']['revenue'],
             results['metrics']['orders'],
-            results['metrics']['sales_trend']
+            results['metrics']['sales_trend'],
+            comparison_label=results['dates']['comparison_label'],
+            order_value_distribution_data=results['metrics']['order_value_distribution']
         )
         
         results['insights']['products'] = generate_product_insights(
@@ -179,7 +619,19 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
         
         results['insights']['operations'] = generate_operational_insights(
             results['metrics']['delivery'],
-            results['metrics']['satisfaction']
+            results['metrics']['satisfaction'],
+            results['metrics']['delivery_time_days_distribution'],
+            results['metrics']['on_time_rate']
+        )
+        
+        results['insights']['customers'] = generate_customer_insights(
+            results['metrics']['repeat_rate'],
+            results['metrics']['cohorts'],
+            results['dates']['comparison_label']
+        )
+        
+        results['insights']['alerts'] = generate_alert_insights(
+            results['metrics']['alerts']
         )
         
         print("✓ Text insights generated successfully\n")
@@ -187,111 +639,69 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
         # STEP 4: CREATE AND SAVE VISUALIZATIONS
         print("Creating visualizations...")
         
-        setup_visualization_style()
-        
         # Create date-based filenames for consistent naming
         start_date_tag = results['dates']['this_week_start'].replace('-', '')
         end_date_tag = results['dates']['this_week_end'].replace('-', '')
         period_tag = f"{start_date_tag}_{end_date_tag}"
+        if results['dates']['comparison'] != 'previous':
+            period_tag += f"_{results['dates']['comparison']}"
         
-        # Generate sales trend chart
-        sales_trend_filename = f"sales_trend_{period_tag}.png"
+        # Sales trend chart
+        sales_trend_filename = f"sales_trend_{period_tag}.{chart_format}"
         sales_trend_path = os.path.join(visualization_dir, sales_trend_filename)
         
-        create_sales_trend_chart(
-            results['metrics']['sales_trend'][0],
-            results['metrics']['sales_trend'][1],
-            results['metrics']['sales_trend'][2],
-            output_path=sales_trend_path
-        )
-        
         results['visualization_paths']['sales_trend'] = sales_trend_path
         
-        # Generate top categories chart
-        categories_filename = f"top_categories_{period_tag}.png"
+        # Top categories chart
+        categories_filename = f"top_categories_{period_tag}.{chart_format}"
         categories_path = os.path.join(visualization_dir, categories_filename)
         
-        create_top_categories_chart(
-            results['metrics']['categories'][0],
-            results['metrics']['categories'][1],
-            results['metrics']['categories'][2],
-            results['metrics']['categories'][3],
-            results['metrics']['categories'][4],
-            results['metrics']['categories'][5],
-            results['metrics']['categories'][6],
-            max_categories=5,
-            output_path=categories_path
-        )
-        
         results['visualization_paths']['top_categories'] = categories_path
         
-        print(f"✓ Visualizations saved to: {visualization_dir}\n")
+        chart_jobs = get_chart_jobs(results['metrics'], sales_trend_path, categories_path)
+        chart_data = None
+        if chart_format == 'json':
+            # The browser draws the charts, so no image is made and matplotlib is never imported
+            chart_data = get_chart_data(chart_jobs)
+            results['visualization_paths'] = {}
+            print("✓ Visualization data embedded in the report\n")
+        else:
+            # Inlined charts must be finished before the report is written, so they are not queued
+            queue_charts = chart_renderer is not None and chart_format != 'svg'
+            for chart_type, chart_args in chart_jobs:
+                if chart_renderer is None:
+                    from chart_renderer import render_chart
+                    render_chart(chart_type, chart_args, chart_cache_dir)
+                elif queue_charts:
+                    chart_renderer.submit(chart_type, chart_args, chart_cache_dir)
+                else:
+                    chart_renderer.render(chart_type, chart_args, chart_cache_dir)
+            
+            print(f"✓ Visualizations {'queued for' if queue_charts else 'saved to'}: {visualization_dir}\n")
         
         # STEP 5: GENERATE HTML REPORT
         print("Generating HTML report...")
         
         # Setup Jinja2 template engine
         template_dir = 'templates'
-        env = Environment(loader=FileSystemLoader(template_dir))
-        env.filters['format_currency'] = lambda value: f"{float(value):,.2f}"
-        env.filters['round'] = lambda value, precision: round(float(value), precision)
+        if template_env is None:
+            template_env = create_template_environment(template_dir)
         
-        template = env.get_template('report_template.html')
+        template = template_env.get_template('report_template.html')
         
         # Copy CSS file for report styling
         css_source = os.path.join(template_dir, 'report_template.css')
         css_dest = os.path.join(reports_dir, 'report_template.css')
         shutil.copyfile(css_source, css_dest)
         
-        # Structure metrics for easier template access
-        metrics = {
-            'revenue': {
-                'this_week': results['metrics']['revenue'][0],
-                'last_week': results['metrics']['revenue'][1],
-                'percent_change': results['metrics']['revenue'][2],
-                'sign': results['metrics']['revenue'][3],
-                'trend': results['metrics']['revenue'][4]
-            },
-            'orders': {
-                'this_week': results['metrics']['orders'][0],
-                'last_week': results['metrics']['orders'][1],
-                'percent_change': results['metrics']['orders'][2],
-                'sign': results['metrics']['orders'][3],
-                'trend': results['metrics']['orders'][4]
-            },
-            'aov': {
-                'this_week': results['metrics']['aov'][0],
-                'last_week': results['metrics']['aov'][1],
-                'percent_change': results['metrics']['aov'][2],
-                'sign': results['metrics']['aov'][3],
-                'trend': results['metrics']['aov'][4]
-            },
-            'categories': {
-                'top_categories': results['metrics']['categories'][0],
-                'top_sales': results['metrics']['categories'][1],
-                'daily_rates': results['metrics']['categories'][2],
-                'last_week_sales': results['metrics']['categories'][3],
-                'percent_changes': results['metrics']['categories'][4],
-                'signs': results['metrics']['categories'][5],
-                'trends': results['metrics']['categories'][6]
-            },
-            'delivery': {
-                'this_week': results['metrics']['delivery'][0],
-                'last_week': results['metrics']['delivery'][1],
-                'percent_change': results['metrics']['delivery'][2],
-                'sign': results['metrics']['delivery'][3],
-                'trend': results['metrics']['delivery'][4]
-            },
-            'satisfaction': {
-                'this_week': results['metrics']['satisfaction'][0],
-                'difference': results['metrics']['satisfaction'][1],
-                'sign': results['metrics']['satisfaction'][2],
-                'trend': results['metrics']['satisfaction'][3]
-            }
-        }
+        # Copy the chart script for reports whose charts the browser draws
+        if chart_data is not None:
+            shutil.copyfile(os.path.join(template_dir, 'report_charts.js'), os.path.join(reports_dir, 'report_charts.js'))
+        
+        metrics = results['metrics']
         
         # Pre-calculate values needed for the template
-        delivery_time_diff = abs(metrics['delivery']['this_week'] - metrics['delivery']['last_week'])
+        delivery_time_diff = abs(metrics['delivery'].current - metrics['delivery'].previous)
         
         # Prepare template context
         context = {
@@ -302,8 +712,13 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
             'sales_insights': results['insights']['sales'],
             'product_insights': results['insights']['products'],
             'operational_insights': results['insights']['operations'],
+            'customer_insights': results['insights']['customers'],
+            'alert_insights': results['insights']['alerts'],
             'sales_trend_path': '../assets/plots/' + os.path.basename(sales_trend_path),
             'top_categories_path': '../assets/plots/' + os.path.basename(categories_path),
+            'sales_trend_svg': read_inline_svg(sales_trend_path) if chart_format == 'svg' else None,
+            'top_categories_svg': read_inline_svg(categories_path) if chart_format == 'svg' else None,
+            'chart_data': chart_data,
             'generation_date': datetime.now().strftime('%Y-%m-%d at %H:%M:%S'),
             'range': range,
             'len': len
@@ -323,13 +738,155 @@ def generate_ecommerce_report(this_week_start=None, this_week_end=None):
         
         results['report_path'] = html_path
         return html_path
-        
+    
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
         import traceback
         traceback.print_exc()
         return None
 
+# Data and chart renderer shared with batch worker processes. Set before the
+# pool forks, so workers inherit them instead of receiving a pickled copy with every task.
+_batch_report_data = None
+_batch_chart_renderer = None
+
+def _init_batch_worker(report_data=None, chart_renderer=None):
+    """
+    Initialise a batch worker process.
+    
+    Args:
+        report_data (dict, optional): Data for start methods that cannot fork;
+            with fork the worker already inherited _batch_report_data.
+        chart_renderer (ChartRenderer, optional): Renderer for start methods that cannot fork.
+    """
+    global _batch_report_data, _batch_chart_renderer
+    if report_data is not None:
+        _batch_report_data = report_data
+    if chart_renderer is not None:
+        _batch_chart_renderer = chart_renderer
+
+def _generate_batch_report(period):
+    """
+    Generate one report of a batch inside a worker process, quietly.
+    
+    Args:
+        period (tuple): (start_date, end_date, comparison, alert_threshold, chart_format) of the report.
+    
+    Returns:
+        str: Path to the generated HTML report, or None on failure
+    """
+    start_date, end_date, comparison, alert_threshold, chart_format = period
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_ecommerce_report(start_date, end_date, report_data=_batch_report_data, comparison=comparison,
+                                         alert_threshold=alert_threshold, chart_renderer=_batch_chart_renderer,
+                                         chart_format=chart_format)
+
+def get_batch_periods(start_date, end_date, cadence_days=7):
+    """
+    Split a date range into consecutive report periods.
+    
+    Args:
+        start_date (str): First day of the first period (YYYY-MM-DD).
+        end_date (str): Last day to cover (YYYY-MM-DD); a trailing partial period is skipped.
+        cadence_days (int): Length of each period in days (default: 7).
+    
+    Returns:
+        list: (start_date, end_date) string tuples
+    """
+    period_starts = pd.date_range(start_date, end_date, freq=f'{cadence_days}D')
+    period_ends = period_starts + pd.Timedelta(days=cadence_days - 1)
+    return [
+        (period_start.strftime('%Y-%m-%d'), period_end.strftime('%Y-%m-%d'))
+        for period_start, period_end in zip(period_starts, period_ends)
+        if period_end <= pd.Timestamp(end_date)
+    ]
+
+def generate_ecommerce_reports(start_date, end_date, cadence_days=7, engine='rollup', processes=None, comparison='previous',
+                               chart_format='png', alert_threshold=ALERT_Z_THRESHOLD):
+    """
+    Generate a report for every period in a date range from a single data load.
+    
+    The data is loaded once in the parent process and shared with a pool of
+    worker processes through fork, so each task only carries its two dates.
+    Workers queue their charts on a shared ChartRenderer, so rendering runs
+    on its own processes alongside the metrics of the next reports.
+    
+    Args:
+        start_date (str): First day of the first period (YYYY-MM-DD).
+        end_date (str): Last day to cover (YYYY-MM-DD).
+        cadence_days (int): Length of each period in days (default: 7).
+        engine (str): Data engine passed to load_report_data().
+        processes (int, optional): Number of report and of chart worker processes (default: CPU count).
+        comparison (str): Baseline every report is compared against, see get_report_dates().
+        chart_format (str): One of CHART_FORMATS, see generate_ecommerce_report().
+        alert_threshold (float): Absolute z-score at which a category's day is flagged as an alert.
+    
+    Returns:
+        list: Paths to the generated HTML reports (None for failed periods)
+    """
+    global _batch_report_data, _batch_chart_renderer
+    
+    periods = get_batch_periods(start_date, end_date, cadence_days)
+    print(f"Generating {len(periods)} reports from {start_date} to {end_date} every {cadence_days} days")
+    
+    start_time = time.perf_counter()
+    _batch_report_data = load_report_data(engine)
+    load_time = time.perf_counter() - start_time
+    
+    chart_counts = None
+    # Workers render many charts each, so they keep their figures between charts
+    with open_chart_renderer(chart_format, processes, use_templates=True) as chart_renderer:
+        _batch_chart_renderer = chart_renderer
+        if 'fork' in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context('fork').Pool(processes, initializer=_init_batch_worker)
+        else:
+            pool = multiprocessing.Pool(processes, initializer=_init_batch_worker, initargs=(_batch_report_data, chart_renderer))
+        
+        with pool:
+            report_paths = pool.map(_generate_batch_report, [period + (comparison, alert_threshold, chart_format) for period in periods], chunksize=1)
+        if chart_renderer is not None:
+            chart_renderer.wait()
+            chart_counts = chart_renderer.get_counts()
+    _batch_chart_renderer = None
+    
+    elapsed = time.perf_counter() - start_time
+    generated = sum(report_path is not None for report_path in report_paths)
+    print(f"✓ Generated {generated}/{len(periods)} reports in {elapsed:.1f}s "
+          f"(data load {load_time:.1f}s, {generated / elapsed:.2f} reports/sec)")
+    if chart_counts is not None:
+        print(f"✓ Charts: {chart_counts['hit']} reused from cache, {chart_counts['miss']} rendered, {chart_counts['failed']} failed")
+    
+    return report_paths
+
 if __name__ == "__main__":
-    report_path = generate_ecommerce_report('2017-05-01', '2017-05-07')
-    print(f"Report saved to: {report_path}")
+    parser = argparse.ArgumentParser(description="Generate e-commerce HTML reports.")
+    parser.add_argument('start_date', nargs='?', help="Start date (YYYY-MM-DD); defaults to --days before the end date")
+    parser.add_argument('end_date', nargs='?', help="End date (YYYY-MM-DD); defaults to today")
+    parser.add_argument('--days', type=int, default=7, help="Days in the reported period when no start date is given")
+    parser.add_argument('--compare', default='previous', choices=COMPARISON_BASELINES, help="Baseline the period is compared against")
+    parser.add_argument('--alert-threshold', type=float, default=ALERT_Z_THRESHOLD, help="Absolute z-score at which a category's day is flagged as an alert")
+    parser.add_argument('--engine', default='rollup', choices=['rollup', 'sqlite', 'arrow', 'pandas'], help="Data engine")
+    parser.add_argument('--batch', action='store_true', help="Generate one report per period between the two dates")
+    parser.add_argument('--cadence', type=int, default=7, help="Days per report period in batch mode")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes in batch mode")
+    parser.add_argument('--chart-format', default='png', choices=CHART_FORMATS,
+                        help="Chart format; SVG charts are inlined into the report, JSON charts are drawn by the browser")
+    args = parser.parse_args()
+    
+    if args.batch:
+        if not args.start_date or not args.end_date:
+            parser.error("--batch needs a start date and an end date")
+        generate_ecommerce_reports(args.start_date, args.end_date, args.cadence, args.engine, args.processes, args.compare,
+                                   args.chart_format, args.alert_threshold)
+    else:
+        # Both charts render on their own processes while the report is written
+        with open_chart_renderer(args.chart_format, 2) as chart_renderer:
+            report_path = generate_ecommerce_report(args.start_date, args.end_date, engine=args.engine,
+                                                    window_days=args.days, comparison=args.compare,
+                                                    alert_threshold=args.alert_threshold, chart_renderer=chart_renderer,
+                                                    chart_format=args.chart_format)
+            if chart_renderer is not None:
+                chart_renderer.wait()
+                chart_counts = chart_renderer.get_counts()
+                print(f"Charts: {chart_counts['hit']} reused from cache, {chart_counts['miss']} rendered")
+        print(f"Report saved to: {report_path}")
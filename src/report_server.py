@@ -0,0 +1,306 @@
+import os
+import io
+import json
+import hashlib
+import argparse
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from data_processor import load_files_paths
+from ingest import get_source_keys
+
+from metric_registry import metric_results_to_dict
+
+from chart_data import CHART_FORMATS
+
+from report_maker import (
+    get_report_tables,
+    load_report_data,
+    get_report_dates,
+    calculate_report_metrics,
+    create_template_environment,
+    generate_ecommerce_report,
+    open_chart_renderer
+)
+
+# Files served next to the reports, keyed by URL prefix
+STATIC_DIRS = {
+    '/assets/plots/': 'data/assets/plots',
+    '/': 'data/reports'
+}
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.png': 'image/png',
+    '.svg': 'image/svg+xml',
+    '.js': 'text/javascript; charset=utf-8'
+}
+
+def get_data_fingerprint(file_paths, engine='rollup'):
+    """
+    Fingerprint the current state of the source tables an engine reads.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        engine (str): Data engine passed to load_report_data().
+    
+    Returns:
+        str: Hash of the size, modification time and read options of every source table.
+    """
+    source_keys = json.dumps(get_source_keys(file_paths, get_report_tables(engine)), sort_keys=True)
+    return hashlib.sha256(source_keys.encode('utf-8')).hexdigest()[:16]
+
+def json_default(value):
+    """
+    Convert the numpy scalars found in metrics for json.dumps().
+    
+    Args:
+        value: Object json.dumps() cannot serialise by itself.
+    
+    Returns:
+        Plain Python equivalent of value.
+    """
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class ReportService:
+    """
+    Keeps the report data and template environment loaded between requests.
+    
+    Results are kept in an LRU cache keyed by kind, date range and data
+    fingerprint, so they go stale by themselves when a source table changes.
+    Concurrent requests for the same key wait for the one computation already
+    running instead of starting their own.
+    """
+    
+    def __init__(self, engine='rollup', cache_size=64, chart_renderer=None, chart_format='png'):
+        """
+        Args:
+            engine (str): Data engine passed to load_report_data().
+            cache_size (int): Number of results kept in the cache.
+            chart_renderer (ChartRenderer, optional): Renders report charts in parallel;
+                they are rendered in the serving thread if None.
+            chart_format (str): One of CHART_FORMATS; 'svg' charts are inlined into the reports
+                and 'json' charts are drawn by the browser.
+        """
+        self.engine = engine
+        self.cache_size = cache_size
+        self.chart_renderer = chart_renderer
+        self.chart_format = chart_format
+        self.template_env = create_template_environment()
+        self.report_data = None
+        self.fingerprint = None
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        # Report generation drives matplotlib's global state and writes to fixed
+        # output paths, so only one computation runs at a time
+        self.compute_lock = threading.Lock()
+    
+    def refresh_data(self):
+        """
+        Reload the report data if a source table changed since it was loaded.
+        
+        Returns:
+            dict: Report data matching the current source tables.
+        """
+        fingerprint = get_data_fingerprint(load_files_paths(), self.engine)
+        if fingerprint != self.fingerprint:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.report_data = load_report_data(self.engine)
+            self.fingerprint = fingerprint
+        return self.report_data
+    
+    def get(self, kind, start_date, end_date, window_days=7, comparison='previous'):
+        """
+        Return a cached result, computing it if needed.
+        
+        Args:
+            kind (str): 'report' for the HTML report, 'metrics' for the metrics dict.
+            start_date (str): Start date of the reported period, or None for the default.
+            end_date (str): End date of the reported period, or None for today.
+            window_days (int): Length of the period when no start date is given.
+            comparison (str): Baseline passed to get_report_dates().
+        
+        Returns:
+            str or dict: Rendered HTML report or structured metrics.
+        """
+        dates = get_report_dates(start_date, end_date, window_days, comparison)
+        fingerprint = get_data_fingerprint(load_files_paths(), self.engine)
+        key = (kind, dates['this_week_start'], dates['this_week_end'], comparison, fingerprint)
+        
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            future = self.pending.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self.pending[key] = Future()
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = self.compute(kind, dates)
+        except Exception as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        
+        with self.lock:
+            self.cache[key] = result
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            del self.pending[key]
+        future.set_result(result)
+        return result
+    
+    def compute(self, kind, dates):
+        """
+        Compute one result without the cache.
+        
+        Args:
+            kind (str): 'report' or 'metrics', see get().
+            dates (dict): Report dates returned by get_report_dates().
+        
+        Returns:
+            str or dict: Rendered HTML report or structured metrics.
+        """
+        with self.compute_lock:
+            report_data = self.refresh_data()
+            if kind == 'metrics':
+                report_metrics = calculate_report_metrics(report_data, dates)
+                day_names, daily_sales, daily_orders = report_metrics.pop('sales_trend')
+                metrics = metric_results_to_dict(report_metrics)
+                metrics['sales_trend'] = {'days': day_names, 'sales': daily_sales, 'orders': daily_orders}
+                metrics['dates'] = dates
+                return metrics
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                report_path = generate_ecommerce_report(
+                    dates['this_week_start'],
+                    dates['this_week_end'],
+                    report_data=report_data,
+                    template_env=self.template_env,
+                    comparison=dates['comparison'],
+                    chart_renderer=self.chart_renderer,
+                    chart_format=self.chart_format
+                )
+            if self.chart_renderer is not None:
+                # Charts must exist before the report linking them is served
+                self.chart_renderer.wait()
+            if report_path is None:
+                raise RuntimeError(f"Report generation failed for {dates['this_week_start']} to {dates['this_week_end']}")
+            with open(report_path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /report and /metrics, plus the chart images and CSS reports link to.
+    """
+    
+    service = None
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        start_date = query.get('start', [None])[0]
+        end_date = query.get('end', [None])[0]
+        comparison = query.get('compare', ['previous'])[0]
+        
+        try:
+            window_days = int(query.get('days', [7])[0])
+            if url.path == '/report':
+                html = self.service.get('report', start_date, end_date, window_days, comparison)
+                self.send_body(200, CONTENT_TYPES['.html'], html.encode('utf-8'))
+            elif url.path == '/metrics':
+                metrics = self.service.get('metrics', start_date, end_date, window_days, comparison)
+                body = json.dumps(metrics, default=json_default, indent=2)
+                self.send_body(200, 'application/json', body.encode('utf-8'))
+            else:
+                self.send_static_file(url.path)
+        except ValueError as e:
+            self.send_body(400, 'text/plain; charset=utf-8', f"Bad request: {e}".encode('utf-8'))
+        except Exception as e:
+            self.send_body(500, 'text/plain; charset=utf-8', f"Error: {e}".encode('utf-8'))
+    
+    def send_static_file(self, path):
+        """
+        Serve a generated chart or stylesheet referenced by a report.
+        
+        Args:
+            path (str): URL path of the request.
+        """
+        for prefix, directory in STATIC_DIRS.items():
+            if not path.startswith(prefix):
+                continue
+            file_path = os.path.join(directory, os.path.basename(path))
+            content_type = CONTENT_TYPES.get(os.path.splitext(file_path)[1])
+            if content_type and os.path.isfile(file_path):
+                with open(file_path, 'rb') as f:
+                    self.send_body(200, content_type, f.read())
+                return
+        self.send_body(404, 'text/plain; charset=utf-8', b"Not found")
+    
+    def send_body(self, status, content_type, body):
+        """
+        Send a complete response.
+        
+        Args:
+            status (int): HTTP status code.
+            content_type (str): Value of the Content-Type header.
+            body (bytes): Response body.
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def run_report_server(host='127.0.0.1', port=8000, engine='rollup', cache_size=64, chart_format='png'):
+    """
+    Load the report data once and serve reports over HTTP until interrupted.
+    
+    Args:
+        host (str): Address to listen on (default: localhost only).
+        port (int): Port to listen on.
+        engine (str): Data engine passed to load_report_data().
+        cache_size (int): Number of results kept in the cache.
+        chart_format (str): One of CHART_FORMATS, see ReportService.
+    """
+    # Chart workers start before the data loads, so they do not inherit it
+    with open_chart_renderer(chart_format, 2, use_templates=True) as chart_renderer:
+        service = ReportService(engine, cache_size, chart_renderer, chart_format)
+        print("Loading data tables...")
+        service.refresh_data()
+        print("✓ Data loaded successfully")
+        
+        ReportRequestHandler.service = service
+        server = ThreadingHTTPServer((host, port), ReportRequestHandler)
+        print(f"Serving reports on http://{host}:{port}/report?start=YYYY-MM-DD&end=YYYY-MM-DD")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve e-commerce reports over a local HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8000, help="Port to listen on")
+    parser.add_argument('--engine', default='rollup', choices=['rollup', 'sqlite', 'arrow', 'pandas'], help="Data engine")
+    parser.add_argument('--cache-size', type=int, default=64, help="Number of results kept in the cache")
+    parser.add_argument('--chart-format', default='png', choices=CHART_FORMATS,
+                        help="Chart format; SVG charts are inlined into the reports, JSON charts are drawn by the browser")
+    args = parser.parse_args()
+    
+    run_report_server(args.host, args.port, args.engine, args.cache_size, args.chart_format)
@@ -0,0 +1,321 @@
+import numpy as np
+import pandas as pd
+
+from data_processor import clean_product_categories, get_delivery_days, get_delivery_time_days, get_on_time_deliveries
+from sketches import SKETCH_MEASURES
+
+# Tables the daily rollup is built from, in the order they are joined
+ROLLUP_SOURCE_TABLES = ['orders', 'ordered_items', 'products', 'product_category', 'order_reviews']
+
+# Additive measures stored per (purchase_date, category)
+ROLLUP_MEASURES = [
+    'revenue',
+    'items',
+    'orders',
+    'attributed_orders',
+    'delivery_days_sum',
+    'delivery_days_count',
+    'review_score_sum',
+    'review_score_count',
+    'on_time_deliveries',
+    'on_time_count'
+]
+
+# Units per measure unit in the prefix sums, which are kept as integers so that window
+# totals are exact: revenue in cents, delivery time in seconds, everything else counted
+ROLLUP_MEASURE_SCALES = {
+    'revenue': 100,
+    'delivery_days_sum': 86400
+}
+
+def build_order_facts(orders_table, order_items_table, products_table, products_names_tabel, order_reviews_table):
+    """
+    Aggregate order lines into one fact row per order and product category.
+    
+    Every rollup measure is a plain sum over these facts, so the daily rollup
+    can be rebuilt or patched from them without touching raw order lines.
+    Item lines whose product has no translated category are kept under a NaN
+    category, so revenue and item totals match the un-categorised revenue data.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps.
+        order_items_table (pandas.DataFrame): Items ordered with prices.
+        products_table (pandas.DataFrame): Product information.
+        products_names_tabel (pandas.DataFrame): Product category name translations.
+        order_reviews_table (pandas.DataFrame): Customer reviews of orders.
+    
+    Returns:
+        pandas.DataFrame: Columns 'order_id', 'purchase_date', 'product_category_name_english'
+            and ROLLUP_MEASURES:
+            - revenue, items: Sum of item prices and number of item lines
+            - orders: Always 1, so summed facts count distinct orders
+            - attributed_orders: 1 for the category of the order's first item, else 0,
+              so they add up across categories to distinct orders
+            - delivery_days_sum, delivery_days_count: Delivery days of delivered
+              order lines (as used by metrics.get_mean_delivery_time)
+            - review_score_sum, review_score_count: Review scores of reviewed order lines
+            - on_time_deliveries, on_time_count: On-time flags of delivered order lines
+              (see data_processor.get_on_time_deliveries)
+            followed by SKETCH_MEASURES, set on the attributed row of each order only
+            and NaN elsewhere:
+            - order_value: Sum of the order's item prices
+            - delivery_time_days: Delivery days of the order, long deliveries included
+    """
+    products_names_tabel = clean_product_categories(products_names_tabel.copy())
+    product_categories = products_table.merge(products_names_tabel, on='product_category_name', how='left')
+    
+    item_lines = orders_table.merge(order_items_table, on='order_id').merge(
+        product_categories[['product_id', 'product_category_name_english']],
+        on='product_id',
+        how='left'
+    )
+    item_lines['purchase_date'] = item_lines['order_purchase_timestamp'].dt.normalize()
+    keys = ['order_id', 'purchase_date', 'product_category_name_english']
+    
+    sales = item_lines.groupby(keys, dropna=False).agg(
+        revenue=('price', 'sum'),
+        items=('price', 'size')
+    )
+    sales['orders'] = 1
+    first_lines = item_lines.drop_duplicates('order_id')
+    sales['attributed_orders'] = first_lines.groupby(keys, dropna=False).size()
+    
+    # Per-order values for the distribution sketches
+    order_values = pd.DataFrame({
+        'order_value': item_lines.groupby('order_id')['price'].sum(),
+        'delivery_time_days': get_delivery_time_days(first_lines).set_axis(first_lines['order_id'])
+    })
+    
+    review_lines = item_lines.merge(order_reviews_table, on='order_id')
+    review_lines['delivery_days'] = get_delivery_days(review_lines)
+    review_lines['delivered_on_time'] = get_on_time_deliveries(review_lines)
+    operations = review_lines.groupby(keys, dropna=False).agg(
+        delivery_days_sum=('delivery_days', 'sum'),
+        delivery_days_count=('delivery_days', 'count'),
+        review_score_sum=('review_score', 'sum'),
+        review_score_count=('review_score', 'count'),
+        on_time_deliveries=('delivered_on_time', 'sum'),
+        on_time_count=('delivered_on_time', 'count')
+    )
+    
+    order_facts = sales.join(operations, how='outer')
+    order_facts[ROLLUP_MEASURES] = order_facts[ROLLUP_MEASURES].fillna(0)
+    count_columns = [measure for measure in ROLLUP_MEASURES if measure not in ('revenue', 'delivery_days_sum')]
+    order_facts[count_columns] = order_facts[count_columns].astype('int64')
+    order_facts = order_facts.reset_index()
+    
+    # Keep them on the attributed row only, so each order is sketched once
+    is_attributed = order_facts['attributed_orders'] == 1
+    for measure in SKETCH_MEASURES:
+        order_facts[measure] = order_facts['order_id'].map(order_values[measure]).where(is_attributed)
+    
+    return order_facts[keys + ROLLUP_MEASURES + SKETCH_MEASURES]
+
+def aggregate_order_facts(order_facts):
+    """
+    Sum order facts into one row per purchase date and product category.
+    
+    Args:
+        order_facts (pandas.DataFrame): Facts returned by build_order_facts(), or any
+            frame with the same date, category and measure columns (e.g. a rollup).
+    
+    Returns:
+        pandas.DataFrame: Columns 'purchase_date', 'product_category_name_english' and ROLLUP_MEASURES.
+    """
+    keys = ['purchase_date', 'product_category_name_english']
+    daily_rollup = order_facts.groupby(keys, dropna=False)[ROLLUP_MEASURES].sum()
+    return daily_rollup.reset_index()
+
+def build_daily_rollup(orders_table, order_items_table, products_table, products_names_tabel, order_reviews_table):
+    """
+    Aggregate order lines into one row per purchase date and product category.
+    
+    Args:
+        orders_table (pandas.DataFrame): Orders with parsed timestamps.
+        order_items_table (pandas.DataFrame): Items ordered with prices.
+        products_table (pandas.DataFrame): Product information.
+        products_names_tabel (pandas.DataFrame): Product category name translations.
+        order_reviews_table (pandas.DataFrame): Customer reviews of orders.
+    
+    Returns:
+        pandas.DataFrame: Columns 'purchase_date', 'product_category_name_english' and
+            ROLLUP_MEASURES, summed over build_order_facts(). 'orders' counts distinct
+            orders with an item in the category that day.
+    """
+    return aggregate_order_facts(build_order_facts(
+        orders_table,
+        order_items_table,
+        products_table,
+        products_names_tabel,
+        order_reviews_table
+    ))
+
+def build_rollup_prefix_sums(daily_rollup):
+    """
+    Lay the rollup out as dense (days x categories) arrays of cumulative sums.
+    
+    Row i of each array holds the totals of every day before day i, so the
+    totals of any window of days are one subtraction per category.
+    
+    Args:
+        daily_rollup (pandas.DataFrame): Rollup returned by build_daily_rollup().
+    
+    Returns:
+        dict: Prefix sums with keys:
+            - first_date: Timestamp of day 0
+            - categories: Index of category names; the extra last column of each
+              array holds lines without a category (NaN)
+            - cumulative: {measure: int64 array of shape (days + 1, categories + 1)},
+              in the units of ROLLUP_MEASURE_SCALES
+    """
+    first_date = daily_rollup['purchase_date'].min()
+    if pd.isna(first_date):
+        first_date = pd.Timestamp(0)
+    day_index = (daily_rollup['purchase_date'] - first_date).dt.days.to_numpy()
+    n_days = int(day_index.max()) + 1 if len(day_index) else 0
+    
+    categories = pd.Index(sorted(daily_rollup['product_category_name_english'].dropna().unique()))
+    category_codes = categories.get_indexer(daily_rollup['product_category_name_english'])
+    category_codes[category_codes < 0] = len(categories)
+    
+    cumulative = {}
+    for measure in ROLLUP_MEASURES:
+        # Running float totals would leak rounding noise into every window difference
+        grid = np.zeros((n_days + 1, len(categories) + 1), dtype='int64')
+        grid[day_index + 1, category_codes] = np.rint(daily_rollup[measure].to_numpy() * ROLLUP_MEASURE_SCALES.get(measure, 1))
+        cumulative[measure] = grid.cumsum(axis=0)
+    
+    return {
+        'first_date': first_date,
+        'categories': categories,
+        'cumulative': cumulative
+    }
+
+def unscale_measure(measure, values):
+    """
+    Convert integer prefix-sum units of a measure back to its own unit.
+    
+    Args:
+        measure (str): One of ROLLUP_MEASURES.
+        values (numpy.ndarray): Values in the units of ROLLUP_MEASURE_SCALES.
+    
+    Returns:
+        numpy.ndarray: Float values, e.g. revenue in currency units.
+    """
+    return values / ROLLUP_MEASURE_SCALES.get(measure, 1)
+
+def get_rollup_day_positions(rollup_prefix_sums, start_date, end_date):
+    """
+    Convert an inclusive date window into row positions of the prefix-sum arrays.
+    
+    Args:
+        rollup_prefix_sums (dict): Prefix sums returned by build_rollup_prefix_sums().
+        start_date (str): First day of the window.
+        end_date (str): Last day of the window (whole day included).
+    
+    Returns:
+        tuple: (start_position, end_position), clipped to the days the rollup covers.
+    """
+    n_rows = len(rollup_prefix_sums['cumulative']['revenue'])
+    first_date = rollup_prefix_sums['first_date']
+    start_position = (pd.Timestamp(start_date).normalize() - first_date).days
+    end_position = (pd.Timestamp(end_date).normalize() - first_date).days + 1
+    return min(max(start_position, 0), n_rows - 1), min(max(end_position, 0), n_rows - 1)
+
+def get_rollup_window_totals(rollup_prefix_sums, start_date, end_date):
+    """
+    Total every measure per category over a window of whole days.
+    
+    Args:
+        rollup_prefix_sums (dict): Prefix sums returned by build_rollup_prefix_sums().
+        start_date (str): First day of the window.
+        end_date (str): Last day of the window (whole day included).
+    
+    Returns:
+        pandas.DataFrame: One row per category (NaN for uncategorised lines), one column per measure.
+    """
+    start_position, end_position = get_rollup_day_positions(rollup_prefix_sums, start_date, end_date)
+    totals = {
+        measure: unscale_measure(measure, cumulative[end_position] - cumulative[start_position])
+        for measure, cumulative in rollup_prefix_sums['cumulative'].items()
+    }
+    
+    index = rollup_prefix_sums['categories'].append(pd.Index([np.nan]))
+    index.name = 'product_category_name_english'
+    return pd.DataFrame(totals, index=index)
+
+def get_rollup_period_totals(rollup_prefix_sums, periods):
+    """
+    Total every measure per period and category for several windows.
+    
+    Args:
+        rollup_prefix_sums (dict): Prefix sums returned by build_rollup_prefix_sums().
+        periods (list): (label, start_date, end_date) tuples, as for load_period_orders_data().
+    
+    Returns:
+        pandas.DataFrame: Measures indexed by ('period', 'product_category_name_english'),
+            with 'period' categorical in the order of periods.
+    """
+    period_totals = pd.concat(
+        {label: get_rollup_window_totals(rollup_prefix_sums, start_date, end_date) for label, start_date, end_date in periods},
+        names=['period']
+    ).reset_index()
+    period_totals['period'] = pd.Categorical(period_totals['period'], categories=[label for label, _, _ in periods])
+    return period_totals.set_index(['period', 'product_category_name_english'])
+
+def prepare_rollup_sales_trend_data(rollup_prefix_sums, start_date, end_date):
+    """
+    Prepare daily sales and order data for trend visualization from the rollup,
+    grouped by day of week.
+    
+    Args:
+        rollup_prefix_sums (dict): Prefix sums returned by build_rollup_prefix_sums().
+        start_date (str): First day of the window.
+        end_date (str): Last day of the window (whole day included).
+    
+    Returns:
+        tuple: Same layout as data_processor.prepare_sales_trend_data()
+    """
+    start_position, end_position = get_rollup_day_positions(rollup_prefix_sums, start_date, end_date)
+    
+    # Per-day totals are the steps between consecutive prefix-sum rows, kept in
+    # integer units until the days are grouped
+    cumulative = rollup_prefix_sums['cumulative']
+    daily_data = pd.DataFrame({
+        'revenue': np.diff(cumulative['revenue'][start_position:end_position + 1].sum(axis=1)),
+        'items': np.diff(cumulative['items'][start_position:end_position + 1].sum(axis=1)),
+        'orders': np.diff(cumulative['attributed_orders'][start_position:end_position + 1].sum(axis=1))
+    }, index=pd.date_range(rollup_prefix_sums['first_date'] + pd.Timedelta(days=start_position), periods=end_position - start_position))
+    daily_data = daily_data[daily_data['items'] > 0]
+    
+    # Group by day of week (Monday first) to get daily totals
+    grouped = daily_data.groupby(daily_data.index.dayofweek).agg({'revenue': 'sum', 'orders': 'sum'}).sort_index()
+    day_names = [pd.Timestamp(2024, 1, 1 + day_of_week).strftime('%a') for day_of_week in grouped.index]
+    
+    return day_names, unscale_measure('revenue', grouped['revenue'].to_numpy()).tolist(), [int(count) for count in grouped['orders']]
+
+def get_rollup_daily_grids(rollup_prefix_sums, start_date, end_date, measures):
+    """
+    Lay the daily totals of a window out as dense (days x categories) arrays.
+    
+    Days outside the rollup are all zeros, so the grid always has one row per day of the window.
+    
+    Args:
+        rollup_prefix_sums (dict): Prefix sums returned by build_rollup_prefix_sums().
+        start_date (str): First day of the window.
+        end_date (str): Last day of the window (whole day included).
+        measures (list): Measures to lay out, out of ROLLUP_MEASURES.
+    
+    Returns:
+        dict: Same layout as anomalies.build_daily_grids(), without the uncategorised column
+    """
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+    cumulative = rollup_prefix_sums['cumulative']
+    n_rows = len(cumulative['revenue'])
+    
+    # Per-day totals are the steps between consecutive prefix-sum rows
+    offsets = (dates[0] - rollup_prefix_sums['first_date']).days + np.arange(len(dates) + 1)
+    positions = np.clip(offsets, 0, n_rows - 1)
+    grids = {measure: unscale_measure(measure, np.diff(cumulative[measure][positions, :-1], axis=0)) for measure in measures}
+    
+    return {'dates': dates, 'categories': rollup_prefix_sums['categories'], 'grids': grids}
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+# Quantiles answered from a sketch are within 1% of the true value at that rank
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+
+# Values at or below this (including zero) share the lowest bucket
+SKETCH_MIN_VALUE = 1e-3
+
+# Per-order values sketched per purchase date and category
+SKETCH_MEASURES = ['order_value', 'delivery_time_days']
+
+# Quantiles reported for every sketched measure
+SKETCH_QUANTILES = [0.5, 0.9, 0.99]
+
+def get_sketch_buckets(values):
+    """
+    Map values to logarithmic sketch buckets.
+    
+    Bucket i covers (gamma^(i-1), gamma^i], so any value in it is within
+    SKETCH_RELATIVE_ACCURACY of the bucket's representative value.
+    
+    Args:
+        values (array-like): Non-negative values; NaN values are dropped.
+    
+    Returns:
+        numpy.ndarray: Bucket index of every non-NaN value.
+    """
+    values = np.asarray(values, dtype='float64')
+    values = values[~np.isnan(values)]
+    return np.ceil(np.log(np.maximum(values, SKETCH_MIN_VALUE)) / np.log(SKETCH_GAMMA)).astype('int64')
+
+def build_sketch(values):
+    """
+    Sketch the distribution of a set of values.
+    
+    A sketch is a Series of counts indexed by bucket. Sketches of any two sets
+    of values add up to the sketch of their union, so they can be built per
+    day and category and summed over any window afterwards.
+    
+    Args:
+        values (array-like): Non-negative values; NaN values are dropped.
+    
+    Returns:
+        pandas.Series: Counts indexed by 'bucket', sorted by bucket.
+    """
+    buckets, counts = np.unique(get_sketch_buckets(values), return_counts=True)
+    return pd.Series(counts, index=pd.Index(buckets, name='bucket'), name='count')
+
+def get_sketch_quantiles(sketch, quantiles=SKETCH_QUANTILES):
+    """
+    Estimate quantiles from a sketch.
+    
+    Args:
+        sketch (pandas.Series): Sketch returned by build_sketch() or get_window_sketches().
+        quantiles (list): Quantiles to estimate, between 0 and 1.
+    
+    Returns:
+        list: Estimated value of each quantile (NaN for an empty sketch).
+    """
+    counts = sketch.to_numpy()
+    total = counts.sum()
+    if total <= 0:
+        return [np.nan] * len(quantiles)
+    
+    # Bucket holding the value of each rank, as in a sorted list of the values
+    ranks = np.asarray(quantiles, dtype='float64') * (total - 1)
+    positions = np.searchsorted(counts.cumsum(), ranks, side='right')
+    buckets = sketch.index.to_numpy()[positions]
+    
+    values = 2 * SKETCH_GAMMA ** buckets.astype('float64') / (SKETCH_GAMMA + 1)
+    return values.tolist()
+
+def build_daily_sketches(order_facts):
+    """
+    Sketch the per-order values of order facts per purchase date and category.
+    
+    Each order is counted once, under the category its first item is
+    attributed to, so category sketches add up to the sketch of all orders.
+    
+    Args:
+        order_facts (pandas.DataFrame): Facts returned by rollups.build_order_facts(),
+            with SKETCH_MEASURES set on each order's attributed row.
+    
+    Returns:
+        pandas.DataFrame: Columns 'purchase_date', 'product_category_name_english',
+            'measure', 'bucket' and 'count', one row per non-empty bucket.
+    """
+    keys = ['purchase_date', 'product_category_name_english']
+    bucket_rows = []
+    for measure in SKETCH_MEASURES:
+        has_value = order_facts[measure].notna()
+        rows = order_facts.loc[has_value, keys].copy()
+        rows['measure'] = measure
+        rows['bucket'] = get_sketch_buckets(order_facts.loc[has_value, measure])
+        rows['count'] = 1
+        bucket_rows.append(rows)
+    
+    return aggregate_daily_sketches(pd.concat(bucket_rows, ignore_index=True))
+
+def aggregate_daily_sketches(daily_sketches):
+    """
+    Add up bucket counts per purchase date, category, measure and bucket.
+    
+    Args:
+        daily_sketches (pandas.DataFrame): Frame with the columns returned by
+            build_daily_sketches(), e.g. several daily sketches concatenated.
+    
+    Returns:
+        pandas.DataFrame: Same columns, one row per non-empty bucket, sorted by purchase date.
+    """
+    keys = ['purchase_date', 'product_category_name_english', 'measure', 'bucket']
+    daily_sketches = daily_sketches.groupby(keys, dropna=False)['count'].sum().reset_index()
+    return daily_sketches[daily_sketches['count'] != 0].reset_index(drop=True)
+
+def get_window_sketches(daily_sketches, start_date, end_date):
+    """
+    Merge the daily sketches of a window of whole days.
+    
+    Args:
+        daily_sketches (pandas.DataFrame): Sketches returned by build_daily_sketches().
+        start_date (str): First day of the window.
+        end_date (str): Last day of the window (whole day included).
+    
+    Returns:
+        dict: Sketch per measure.
+    """
+    purchase_dates = daily_sketches['purchase_date'].to_numpy()
+    start_position = np.searchsorted(purchase_dates, np.datetime64(pd.Timestamp(start_date).normalize()), side='left')
+    end_position = np.searchsorted(purchase_dates, np.datetime64(pd.Timestamp(end_date).normalize()), side='right')
+    window = daily_sketches.iloc[start_position:end_position]
+    
+    return {
+        measure: window[window['measure'] == measure].groupby('bucket')['count'].sum()
+        for measure in SKETCH_MEASURES
+    }
+
+def build_order_sketches(revenue_data):
+    """
+    Sketch the per-order values of a frame of order lines.
+    
+    Args:
+        revenue_data (pandas.DataFrame): Order lines with 'order_id', 'price' and 'delivery_time_days'.
+    
+    Returns:
+        dict: Sketch per measure in SKETCH_MEASURES.
+    """
+    orders = revenue_data.groupby('order_id').agg(
+        order_value=('price', 'sum'),
+        delivery_time_days=('delivery_time_days', 'first')
+    )
+    return {measure: build_sketch(orders[measure]) for measure in SKETCH_MEASURES}
@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from data_processor import (
+    TABLE_SCHEMAS,
+    load_files_paths,
+    load_table,
+    get_read_options,
+    build_table_cache_key,
+    get_window_bounds,
+    clean_product_categories,
+    build_order_fact_table
+)
+
+# Columns that get an index in every table that has them
+INDEXED_COLUMNS = ['order_id', 'product_id', 'customer_id', 'order_purchase_timestamp']
+
+# Datetimes are stored as ISO text, which sorts chronologically so range
+# conditions on order_purchase_timestamp can use its index
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Source tables of the materialised order fact table, in build_order_fact_table() argument order
+ORDER_FACT_SOURCE_TABLES = ['orders', 'ordered_items', 'order_payment', 'order_reviews']
+
+def import_table(connection, table_name, file_path):
+    """
+    Import one CSV table into SQLite and index its key columns.
+    
+    Args:
+        connection (sqlite3.Connection): Open database connection.
+        table_name (str): Table key from load_files_paths(), used as the SQL table name.
+        file_path (str): Path to the CSV file.
+    """
+    write_table(connection, table_name, load_table(file_path, table_name))
+
+def write_table(connection, table_name, table):
+    """
+    Write a loaded table into SQLite, replacing any previous copy, and index its key columns.
+    
+    Args:
+        connection (sqlite3.Connection): Open database connection.
+        table_name (str): SQL table name.
+        table (pandas.DataFrame): Table with the dtypes load_table() gives it.
+    """
+    for column in table.columns:
+        if pd.api.types.is_datetime64_any_dtype(table[column]):
+            table[column] = table[column].dt.strftime(TIMESTAMP_FORMAT)
+        elif isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].astype(object)
+    
+    table.to_sql(table_name, connection, if_exists='replace', index=False)
+    for column in INDEXED_COLUMNS:
+        if column in table.columns:
+            connection.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{column}" ON "{table_name}" ("{column}")')
+
+def get_source_key(file_path, table_name):
+    """
+    Build the key of a CSV file as imported into the store.
+    
+    Derived columns are stored along with the parsed ones, so a change to
+    either set re-imports the table.
+    
+    Args:
+        file_path (str): Path to the CSV file.
+        table_name (str): Table key in TABLE_SCHEMAS.
+    
+    Returns:
+        dict: data_processor.build_table_cache_key() with the table's derived columns.
+    """
+    source_key = build_table_cache_key(file_path, get_read_options(table_name))
+    source_key['derived'] = TABLE_SCHEMAS.get(table_name, {}).get('derived', [])
+    return source_key
+
+def open_sqlite_store(file_paths, database_path):
+    """
+    Open the SQLite store, re-importing any table whose CSV changed since the last import.
+    
+    The order fact table (see data_processor.build_order_fact_table()) is
+    materialised in the store too, and rebuilt when one of its sources changes.
+    
+    Args:
+        file_paths (dict): Table paths returned by load_files_paths().
+        database_path (str): Path of the SQLite database file.
+    
+    Returns:
+        sqlite3.Connection: Connection to an up-to-date database.
+    """
+    os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+    connection = sqlite3.connect(database_path)
+    connection.execute('CREATE TABLE IF NOT EXISTS source_keys (table_name TEXT PRIMARY KEY, source_key TEXT)')
+    stored_keys = dict(connection.execute('SELECT table_name, source_key FROM source_keys').fetchall())
+    
+    for table_name, file_path in file_paths.items():
+        if not file_path or not os.path.exists(file_path):
+            continue
+        
+        source_key = json.dumps(get_source_key(file_path, table_name))
+        if stored_keys.get(table_name) == source_key:
+            continue
+        
+        print(f"Importing {table_name} into {database_path}...")
+        with connection:
+            import_table(connection, table_name, file_path)
+            connection.execute('INSERT OR REPLACE INTO source_keys VALUES (?, ?)', (table_name, source_key))
+    
+    # The order fact table is rebuilt when any of its source tables changes
+    if not all(file_paths.get(table_name) and os.path.exists(file_paths[table_name]) for table_name in ORDER_FACT_SOURCE_TABLES):
+        return connection
+    source_key = json.dumps([
+        get_source_key(file_paths[table_name], table_name)
+        for table_name in ORDER_FACT_SOURCE_TABLES
+    ])
+    if stored_keys.get('order_fact_table') != source_key:
+        print(f"Building order_fact_table in {database_path}...")
+        with connection:
+            order_fact_table = build_order_fact_table(*[
+                load_table(file_paths[table_name], table_name) for table_name in ORDER_FACT_SOURCE_TABLES
+            ])
+            write_table(connection, 'order_fact_table', order_fact_table)
+            connection.execute('INSERT OR REPLACE INTO source_keys VALUES (?, ?)', ('order_fact_table', source_key))
+    
+    return connection
+
+def get_select_columns(alias, table_name, exclude=()):
+    """
+    List a table's schema and derived columns for a SELECT clause.
+    
+    Args:
+        alias (str): Alias of the table in the query.
+        table_name (str): Table key in TABLE_SCHEMAS.
+        exclude (tuple): Columns to leave out, e.g. join keys already selected.
+    
+    Returns:
+        list: Qualified column names.
+    """
+    schema = TABLE_SCHEMAS[table_name]
+    return [f'{alias}.{column}' for column in schema['columns'] + schema['derived'] if column not in exclude]
+
+def build_window_query(joined_tables):
+    """
+    Build the query returning the order lines of one date window.
+    
+    Args:
+        joined_tables (list): Tables to join onto the orders, out of
+            'ordered_items', 'products' (with category translations), 'order_reviews'
+            and 'customers' (left join, so orders without a customer row are kept).
+    
+    Returns:
+        str: SQL with a start-bound and end-bound placeholder and an {end_operator} field.
+    """
+    columns = get_select_columns('o', 'orders')
+    joins = []
+    
+    if 'ordered_items' in joined_tables:
+        columns += get_select_columns('i', 'ordered_items', exclude=('order_id',))
+        joins.append('JOIN ordered_items i ON i.order_id = o.order_id')
+    if 'products' in joined_tables:
+        columns += get_select_columns('p', 'products', exclude=('product_id',))
+        columns += get_select_columns('c', 'product_category', exclude=('product_category_name',))
+        joins.append('JOIN products p ON p.product_id = i.product_id')
+        joins.append('JOIN product_category c ON c.product_category_name = p.product_category_name')
+    if 'order_reviews' in joined_tables:
+        columns += get_select_columns('r', 'order_reviews', exclude=('order_id',))
+        joins.append('JOIN order_reviews r ON r.order_id = o.order_id')
+    if 'customers' in joined_tables:
+        columns += get_select_columns('cu', 'customers', exclude=('customer_id',))
+        joins.append('LEFT JOIN customers cu ON cu.customer_id = o.customer_id')
+    
+    return (
+        f"SELECT {', '.join(columns)} FROM orders o {' '.join(joins)} "
+        "WHERE o.order_purchase_timestamp >= ? AND o.order_purchase_timestamp {end_operator} ?"
+    )
+
+def restore_column_types(frame, numeric=True):
+    """
+    Give columns read back from SQLite the dtypes load_table() would give them.
+    
+    Args:
+        frame (pandas.DataFrame): Query result.
+        numeric (bool): Whether to apply the numeric dtypes of TABLE_SCHEMAS. Derived tables
+            such as the order fact table only share column names with the source tables
+            (review_score there is a mean, NaN for orders without reviews), so they keep
+            the float columns SQLite returns.
+    
+    Returns:
+        pandas.DataFrame: The same frame with datetime, categorical and numeric dtypes applied.
+    """
+    for schema in TABLE_SCHEMAS.values():
+        for column in schema['datetimes']:
+            if column in frame.columns:
+                frame[column] = pd.to_datetime(frame[column], format=TIMESTAMP_FORMAT)
+        for column in schema['categoricals']:
+            if column in frame.columns:
+                frame[column] = frame[column].astype('category')
+        for column, dtype in schema['dtypes'].items():
+            if numeric and column in frame.columns:
+                frame[column] = frame[column].astype(dtype)
+    return frame
+
+def query_window(connection, joined_tables, start_date, end_date):
+    """
+    Fetch the order lines of one date window through the timestamp index.
+    
+    Args:
+        connection (sqlite3.Connection): Connection returned by open_sqlite_store().
+        joined_tables (list): Tables to join onto the orders, see build_window_query().
+        start_date (str): First date of the window (inclusive).
+        end_date (str): Last date of the window (inclusive, whole day for a date-only bound).
+    
+    Returns:
+        pandas.DataFrame: Rows of the window with the same columns and dtypes as the pandas pipeline.
+    """
+    start, end, end_is_exclusive = get_window_bounds(start_date, end_date)
+    query = build_window_query(joined_tables).format(end_operator='<' if end_is_exclusive else '<=')
+    
+    frame = pd.read_sql_query(query, connection, params=(start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)))
+    frame = restore_column_types(frame)
+    if 'product_category_name_english' in frame.columns:
+        frame = clean_product_categories(frame)
+    return frame
+
+def load_period_data(connection, joined_tables, periods):
+    """
+    Fetch several date windows into one period-tagged frame.
+    
+    Args:
+        connection (sqlite3.Connection): Connection returned by open_sqlite_store().
+        joined_tables (list): Tables to join onto the orders, see build_window_query().
+        periods (list): (label, start_date, end_date) tuples, as for
+            data_processor.load_period_orders_data().
+    
+    Returns:
+        pandas.DataFrame: Same layout as the matching data_processor.load_period_*_data() result.
+    """
+    windows = [query_window(connection, joined_tables, start_date, end_date) for _, start_date, end_date in periods]
+    return tag_period_windows(windows, periods)
+
+def load_period_order_facts(connection, periods):
+    """
+    Fetch several date windows of the materialised order fact table into one period-tagged frame.
+    
+    Args:
+        connection (sqlite3.Connection): Connection returned by open_sqlite_store().
+        periods (list): (label, start_date, end_date) tuples, as for load_period_data().
+    
+    Returns:
+        pandas.DataFrame: Rows of data_processor.build_order_fact_table() for every window,
+            with a categorical 'period' column.
+    """
+    windows = []
+    for _, start_date, end_date in periods:
+        start, end, end_is_exclusive = get_window_bounds(start_date, end_date)
+        query = (
+            "SELECT * FROM order_fact_table WHERE order_purchase_timestamp >= ? "
+            f"AND order_purchase_timestamp {'<' if end_is_exclusive else '<='} ?"
+        )
+        windows.append(pd.read_sql_query(query, connection, params=(start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT))))
+    return tag_period_windows(windows, periods, numeric=False)
+
+def tag_period_windows(windows, periods, numeric=True):
+    """
+    Concatenate query results of several windows, tagged with their period.
+    
+    Args:
+        windows (list): One query result per period.
+        periods (list): (label, start_date, end_date) tuples, in the order of windows.
+        numeric (bool): Passed on to restore_column_types().
+    
+    Returns:
+        pandas.DataFrame: Rows of every window with load_table() dtypes and a categorical
+            'period' column whose categories follow the order of periods.
+    """
+    # Empty windows add no rows, and pandas warns about their all-NA columns in concat()
+    period_data = restore_column_types(pd.concat([window for window in windows if len(window)] or windows[:1], ignore_index=True), numeric)
+    period_data['period'] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(windows)), [len(window) for window in windows]),
+        categories=[label for label, _, _ in periods]
+    )
+    return period_data
+
+if __name__ == "__main__":
+    database_path = sys.argv[1] if len(sys.argv) > 1 else 'data/ecommerce.sqlite'
+    open_sqlite_store(load_files_paths(), database_path).close()
+    print(f"SQLite store is up to date: {database_path}")
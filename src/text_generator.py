@@ -1,22 +1,35 @@
+import math
+from datetime import datetime
+
+from anomalies import TOTAL_CATEGORY_LABEL
+
 def create_executive_summary(
     total_revenue_data,
     order_count_data,
     avg_order_value_data,
-    top_category_data):
+    top_category_data,
+    comparison_label='last week'):
     """
     Generate a comprehensive executive summary with key insights.
     
+    Args:
+        total_revenue_data (MetricResult): Revenue comparison
+        order_count_data (MetricResult): Order count comparison
+        avg_order_value_data (MetricResult): Average order value comparison
+        top_category_data (TopCategoriesResult): Top categories comparison
+        comparison_label (str, optional): Baseline the period is compared against, e.g. 'last week'
+    
     Returns:
         str: A formatted executive summary in paragraphs
     """
-    this_week_revenue, last_week_revenue, revenue_change, revenue_sign, revenue_trend = total_revenue_data
-    this_week_orders, last_week_orders, order_change, order_sign, order_trend = order_count_data
-    this_week_aov, last_week_aov, aov_change, aov_sign, aov_trend = avg_order_value_data
+    revenue_change, revenue_sign, revenue_trend = total_revenue_data.change, total_revenue_data.sign, total_revenue_data.trend
+    order_change, order_sign, order_trend = order_count_data.change, order_count_data.sign, order_count_data.trend
+    this_week_aov, aov_change, aov_trend = avg_order_value_data.current, avg_order_value_data.change, avg_order_value_data.trend
     
-    categories, sales, daily_rates, prev_sales, percent_changes, signs, trends = top_category_data
-    top_category = categories[0]
-    top_category_change = percent_changes[0]
-    top_category_sign = signs[0]
+    top_category = top_category_data.categories[0]
+    top_category_change = top_category_data.percent_changes[0]
+    top_category_sign = top_category_data.signs[0]
+    daily_rates = top_category_data.daily_order_rates
     
     executive_summary = f"This week's e-commerce performance "
     
@@ -39,11 +52,11 @@ def create_executive_summary(
     
     executive_summary += f"Our top-performing product category was {top_category}, "
     if top_category_sign == '+':
-        executive_summary += f"which saw a {top_category_change}% increase in sales compared to last week "
+        executive_summary += f"which saw a {top_category_change}% increase in sales compared to {comparison_label} "
     elif top_category_sign == '-':
-        executive_summary += f"which experienced a {top_category_change}% decrease in sales compared to last week "
+        executive_summary += f"which experienced a {top_category_change}% decrease in sales compared to {comparison_label} "
     else:
-        executive_summary += f"which maintained stable sales compared to last week "
+        executive_summary += f"which maintained stable sales compared to {comparison_label} "
     
     executive_summary += f"with an average of {daily_rates[0]} daily orders. "
     
@@ -53,15 +66,26 @@ def generate_sales_insights(
     total_revenue_data, 
     order_count_data, 
     daily_sales_data, 
-    peak_day_index=None):
+    peak_day_index=None,
+    comparison_label='last week',
+    order_value_distribution_data=None):
     """
     Generate sales performance insights as individual bullet points.
     
+    Args:
+        total_revenue_data (MetricResult): Revenue comparison
+        order_count_data (MetricResult): Order count comparison
+        daily_sales_data (tuple): (day_names, daily_revenue, daily_orders) sales trend
+        peak_day_index (int, optional): Index of the peak day; the highest revenue day if None
+        comparison_label (str, optional): Baseline the period is compared against, e.g. 'last week'
+        order_value_distribution_data (DistributionResult, optional): Order value quantiles
+    
     Returns:
-        tuple: (weekly_comparison, peak_day_insight, day_distribution)
+        tuple: (weekly_comparison, peak_day_insight, day_distribution), followed by an
+            order value spread insight when order value quantiles are given
     """
-    _, _, revenue_change, revenue_sign, revenue_trend = total_revenue_data
-    this_week_orders, last_week_orders, order_change, order_sign, order_trend = order_count_data
+    revenue_change, revenue_sign = total_revenue_data.change, total_revenue_data.sign
+    order_change, order_sign, order_trend = order_count_data.change, order_count_data.sign, order_count_data.trend
     day_names, daily_revenue, daily_orders = daily_sales_data
     
     if peak_day_index is None:
@@ -70,7 +94,7 @@ def generate_sales_insights(
     peak_day = day_names[peak_day_index]
     
     weekly_comparison = f"This week's sales were {revenue_sign}{revenue_change}% "
-    weekly_comparison += "higher than last week's." if revenue_sign == '+' else "lower than last week's."
+    weekly_comparison += f"higher than {comparison_label}." if revenue_sign == '+' else f"lower than {comparison_label}."
     
     peak_day_insight = f"Peak sales day was {peak_day}, with "
     peak_day_insight += f"revenue of ${daily_revenue[peak_day_index]:,.2f} and {daily_orders[peak_day_index]} orders."
@@ -92,16 +116,29 @@ def generate_sales_insights(
                           "suggesting a need to evaluate customer acquisition channels." if order_trend == 'negative' else \
                           "maintaining consistent customer activity."
     
+    # Create order value spread insight
+    if order_value_distribution_data is not None and order_value_distribution_data.count > 0:
+        order_value_spread = (
+            f"Half of this week's orders were worth up to ${order_value_distribution_data.p50:,.2f}, "
+            f"90% up to ${order_value_distribution_data.p90:,.2f} and 99% up to ${order_value_distribution_data.p99:,.2f}."
+        )
+        return weekly_comparison, peak_day_insight, day_distribution, order_value_spread
+    
     return weekly_comparison, peak_day_insight, day_distribution
 
 def generate_product_insights(top_category_data):
     """
     Generate product performance insights for top 3 categories.
     
+    Args:
+        top_category_data (TopCategoriesResult): Top categories comparison
+    
     Returns:
         tuple: (top_category_insight, second_category_insight, third_category_insight)
     """
-    categories, sales, daily_rates, prev_sales, percent_changes, signs, trends = top_category_data
+    categories = top_category_data.categories
+    percent_changes = top_category_data.percent_changes
+    trends = top_category_data.trends
     
     category_insights = []
     
@@ -125,18 +162,21 @@ def generate_product_insights(top_category_data):
     
     return category_insights[0], category_insights[1], category_insights[2]
 
-def generate_operational_insights(delivery_time_data, satisfaction_data):
+def generate_operational_insights(delivery_time_data, satisfaction_data, delivery_distribution_data=None, on_time_data=None):
     """
     Generate insights about operational metrics like delivery time and customer satisfaction.
     
     Args:
-        delivery_time_data (tuple): Current and previous delivery time metrics
-        satisfaction_data (tuple): Current and previous satisfaction metrics
-        
+        delivery_time_data (MetricResult): Delivery time comparison
+        satisfaction_data (MetricResult): Satisfaction comparison (absolute difference)
+        delivery_distribution_data (DistributionResult, optional): Delivery time quantiles
+        on_time_data (MetricResult, optional): On-time delivery rate comparison
+    
     Returns:
         list: List of insight statements about operational metrics
     """
-    this_week_delivery_time, last_week_delivery_time, percent_change, sign, trend = delivery_time_data
+    this_week_delivery_time, last_week_delivery_time = delivery_time_data.current, delivery_time_data.previous
+    percent_change, sign, trend = delivery_time_data.change, delivery_time_data.sign, delivery_time_data.trend
     
     # Create delivery time insight
     if trend == 'positive':
@@ -146,7 +186,8 @@ def generate_operational_insights(delivery_time_data, satisfaction_data):
     else:
         delivery_message = f"Average delivery time remained stable at {this_week_delivery_time:.1f} days."
     
-    this_week_rating, difference, sign, trend = satisfaction_data
+    this_week_rating, difference = satisfaction_data.current, satisfaction_data.change
+    sign, trend = satisfaction_data.sign, satisfaction_data.trend
     
     # Create satisfaction insight
     if trend == 'positive':
@@ -164,4 +205,89 @@ def generate_operational_insights(delivery_time_data, satisfaction_data):
     else:
         satisfaction_message = f"Customer satisfaction remained steady at {this_week_rating:.1f}/5.0, maintaining consistent service standards."
     
-    return [delivery_message, satisfaction_message]
+    insights = [delivery_message, satisfaction_message]
+    
+    # Create delivery spread insight
+    if delivery_distribution_data is not None and delivery_distribution_data.count > 0:
+        insights.append(
+            f"Half of this week's delivered orders arrived within {delivery_distribution_data.p50:.1f} days, "
+            f"90% within {delivery_distribution_data.p90:.1f} days and 99% within {delivery_distribution_data.p99:.1f} days."
+        )
+    
+    # Create on-time delivery insight
+    if on_time_data is not None and not math.isnan(on_time_data.current):
+        insights.append(f"{on_time_data.formatted} of this week's deliveries arrived by their estimated delivery date.")
+    
+    return insights
+
+def generate_customer_insights(repeat_rate_data, cohort_data, comparison_label='last week'):
+    """
+    Generate insights about returning customers and cohort retention.
+    
+    Args:
+        repeat_rate_data (MetricResult): Share of the period's customers who had ordered before
+        cohort_data (CohortResult): Weekly retention of the latest cohorts
+        comparison_label (str, optional): Baseline the period is compared against, e.g. 'last week'
+    
+    Returns:
+        list: List of insight statements about customers
+    """
+    this_week_rate, last_week_rate = repeat_rate_data.current, repeat_rate_data.previous
+    
+    # Create repeat purchase insight
+    if repeat_rate_data.trend == 'positive':
+        repeat_message = f"{this_week_rate:.1%} of this week's customers had ordered before, up from {last_week_rate:.1%} {comparison_label}."
+    elif repeat_rate_data.trend == 'negative':
+        repeat_message = f"{this_week_rate:.1%} of this week's customers had ordered before, down from {last_week_rate:.1%} {comparison_label}."
+    else:
+        repeat_message = f"Returning customers made up a steady {this_week_rate:.1%} of this week's customers."
+    
+    insights = [repeat_message]
+    
+    # Create retention insight from the latest cohort with a complete following week
+    for i in reversed(range(len(cohort_data.cohorts))):
+        if cohort_data.retention[i] and cohort_data.retention[i][0] is not None:
+            insights.append(
+                f"Of the {cohort_data.sizes[i]:,} customers who first ordered in the week of {cohort_data.cohorts[i]}, "
+                f"{cohort_data.retention[i][0]:.1%} ordered again the following week."
+            )
+            break
+    
+    return insights
+
+def generate_alert_insights(alerts_data):
+    """
+    Generate insights about days on which a category deviated from its own history.
+    
+    Args:
+        alerts_data (AlertsResult): Flagged days, largest deviation first
+    
+    Returns:
+        list: List of insight statements, one per alert
+    """
+    if not alerts_data.dates:
+        return ["No category's revenue, orders or rating moved outside its usual range this period."]
+    
+    measure_names = {'revenue': 'revenue', 'orders': 'orders', 'rating': 'average rating'}
+    value_formats = {'revenue': '${:,.2f}', 'orders': '{:,.0f}', 'rating': '{:.1f}/5.0'}
+    
+    insights = []
+    for i in range(len(alerts_data.dates)):
+        measure = alerts_data.measures[i]
+        day = datetime.strptime(alerts_data.dates[i], '%Y-%m-%d').strftime('%a %d %b')
+        
+        if alerts_data.categories[i] == TOTAL_CATEGORY_LABEL:
+            subject = f"Total {measure_names[measure]}"
+        else:
+            subject = f"{alerts_data.categories[i]} {measure_names[measure]}"
+        
+        value = value_formats[measure].format(alerts_data.values[i])
+        expected = value_formats[measure].format(alerts_data.expected[i])
+        direction = 'above' if alerts_data.trends[i] == 'positive' else 'below'
+        
+        insights.append(
+            f"{subject} on {day} was {value}, well {direction} its usual {expected} "
+            f"({abs(alerts_data.z_scores[i])} standard deviations)."
+        )
+    
+    return insights
@@ -3,8 +3,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
 from matplotlib.ticker import FuncFormatter
 
+from chart_data import CHART_COLORS
+
 def setup_colors():
     """
     Set up color palette for visualizations to match report CSS variables.
@@ -12,15 +15,7 @@ def setup_colors():
     Returns:
         dict: Dictionary of color codes for various elements
     """
-    colors = {
-        'primary': '#263A47',
-        'secondary': '#445B6A',
-        'accent': '#728495',
-        'background': '#98A9BE',
-        'highlight': '#84C5DB',
-        'positive': '#27ae60',
-        'negative': '#e74c3c'
-    }
+    colors = dict(CHART_COLORS)
     return colors
 
 def setup_visualization_style(colors=None):
@@ -61,6 +56,12 @@ def setup_visualization_style(colors=None):
     plt.rcParams['figure.figsize'] = (10, 6)  # Standard 16:9 aspect ratio
     plt.rcParams['figure.dpi'] = 150
     
+    # SVG charts keep their text as text, rendered with the report page's fonts,
+    # instead of one outline per glyph; ids are seeded so the same chart gives the same file
+    plt.rcParams['svg.fonttype'] = 'none'
+    plt.rcParams['svg.hashsalt'] = 'ecommerce-report'
+    plt.rcParams['path.simplify'] = True
+    
     return colors
 
 def create_sales_trend_chart(day_names, 
@@ -75,7 +76,7 @@ def create_sales_trend_chart(day_names,
     if not day_names or not daily_revenue or not order_counts or len(day_names) != len(daily_revenue) or len(day_names) != len(order_counts):
         print("Error: Invalid input data for sales trend chart")
         return False
-        
+    
     colors = setup_colors()
     
     sales_data = pd.DataFrame({
@@ -178,7 +179,7 @@ def create_top_categories_chart(categories,
     if not categories or not sales or len(categories) != len(sales):
         print("Error: Invalid input data for top categories chart")
         return False
-        
+    
     colors = setup_colors()
     
     if max_categories < len(categories):
@@ -202,10 +203,10 @@ def create_top_categories_chart(categories,
     
     if daily_rates:
         category_data['Daily Orders'] = list(daily_rates)
-        
+    
     if prev_week_sales:
         category_data['Prev Sales'] = list(prev_week_sales)
-        
+    
     if percent_changes:
         category_data['Change %'] = list(percent_changes)
     
@@ -258,4 +259,181 @@ def create_top_categories_chart(categories,
         plt.close()
         return False
 
+class SalesTrendTemplate:
+    """
+    Sales trend chart built once and updated in place for each report.
+    
+    Draws the same chart as create_sales_trend_chart(), but the figure, axes,
+    legend and formatters are created and laid out only once per number of
+    days; each render only changes the data, tick labels and limits.
+    """
+    
+    def __init__(self, day_count):
+        """
+        Args:
+            day_count (int): Number of days (bars) the chart shows.
+        """
+        colors = setup_colors()
+        positions = np.arange(day_count)
+        
+        def currency_formatter(x, pos):
+            return f'${x:,.0f}'
+        
+        self.day_count = day_count
+        # Not registered with pyplot, so plt.close() calls elsewhere leave it alone
+        self.fig = Figure(figsize=(10, 6))
+        self.ax1 = self.fig.subplots()
+        self.ax2 = self.ax1.twinx()
+        self.ax2.set_zorder(1)
+        self.ax1.set_zorder(2)
+        self.ax1.patch.set_visible(False)
+        
+        self.bars = self.ax2.bar(positions, np.zeros(day_count), color=colors['highlight'], alpha=0.6, width=0.6, zorder=1)
+        self.line, = self.ax1.plot(positions, np.zeros(day_count),
+                                   marker='o', linestyle='-', linewidth=2.5,
+                                   color=colors['primary'], markerfacecolor='white',
+                                   markeredgecolor=colors['primary'], markersize=8,
+                                   zorder=5)
+        
+        self.ax1.set_ylabel('Daily Revenue ($)', color=colors['primary'], fontweight='bold')
+        self.ax1.tick_params(axis='y', colors=colors['primary'])
+        self.ax1.yaxis.set_major_formatter(FuncFormatter(currency_formatter))
+        
+        self.ax2.set_ylabel('Number of Orders', color=colors['highlight'], fontweight='bold')
+        self.ax2.tick_params(axis='y', colors=colors['highlight'])
+        
+        self.ax1.set_xticks(positions)
+        self.ax1.set_title('Daily Sales Performance', fontweight='bold', pad=15)
+        self.ax1.grid(True, axis='y', alpha=0.2, linestyle='--', zorder=0)
+        self.ax2.grid(False)
+        
+        custom_lines = [
+            plt.Line2D([0], [0], color=colors['primary'], lw=2.5, marker='o', markerfacecolor='white'),
+            plt.Rectangle((0, 0), 1, 1, color=colors['highlight'], alpha=0.6)
+        ]
+        legend = self.ax1.legend(custom_lines, ['Revenue', 'Number of Orders'],
+                                 loc='upper center', bbox_to_anchor=(0.5, -0.12),
+                                 frameon=True, framealpha=0.9, ncol=2)
+        legend.get_frame().set_facecolor('white')
+        legend.get_frame().set_edgecolor('none')
+        
+        # Laid out on the first render, once tick labels hold real values
+        self.is_laid_out = False
+    
+    def render(self, day_names, daily_revenue, order_counts, output_path='sales_trend_chart.png'):
+        """
+        Draw one report's sales trend and save it.
+        
+        Args:
+            day_names (list): Day labels, day_count of them.
+            daily_revenue (list): Revenue per day.
+            order_counts (list): Orders per day.
+            output_path (str): Path to save the image to.
+        
+        Returns:
+            bool: True if the chart was saved.
+        """
+        if not day_names or not daily_revenue or not order_counts or not len(day_names) == len(daily_revenue) == len(order_counts) == self.day_count:
+            print("Error: Invalid input data for sales trend chart")
+            return False
+        
+        for bar, order_count in zip(self.bars, order_counts):
+            bar.set_height(order_count)
+        self.line.set_ydata(daily_revenue)
+        self.ax1.set_xticklabels(day_names)
+        self.ax1.set_ylim(0, max(daily_revenue) * 1.1)
+        self.ax2.set_ylim(0, max(order_counts) * 1.1)
+        
+        if not self.is_laid_out:
+            self.fig.tight_layout(rect=[0.02, 0.05, 0.98, 0.95])
+            self.is_laid_out = True
+        
+        try:
+            self.fig.savefig(output_path, dpi=150, bbox_inches='tight')
+            return True
+        except Exception as e:
+            print(f"Error saving sales trend chart: {e}")
+            return False
 
+class TopCategoriesTemplate:
+    """
+    Top categories chart built once and updated in place for each report.
+    
+    Draws the same chart as create_top_categories_chart(), with the figure,
+    bars and value labels created and laid out only once per number of categories.
+    """
+    
+    def __init__(self, category_count):
+        """
+        Args:
+            category_count (int): Number of categories (bars) the chart shows.
+        """
+        colors = setup_colors()
+        
+        def currency_formatter(x, pos):
+            return f'${x:,.0f}'
+        
+        self.category_count = category_count
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = sns.barplot(
+            x='Category',
+            y='Sales',
+            data=pd.DataFrame({'Category': [str(i) for i in range(category_count)], 'Sales': np.ones(category_count)}),
+            color=colors['primary'],
+            width=0.5 if category_count <= 3 else 0.65,
+            ax=self.fig.add_subplot()
+        )
+        self.bars = list(self.ax.patches)
+        self.ax.yaxis.set_major_formatter(FuncFormatter(currency_formatter))
+        self.ax.set_title('Top Product Categories by Revenue', fontweight='bold', pad=20)
+        self.ax.set_ylabel('Revenue ($)', fontweight='bold')
+        self.ax.set_xlabel('')
+        self.ax.grid(axis='y', alpha=0.2, linestyle='--')
+        self.value_labels = [
+            self.ax.text(i, 0, '', color='black', ha='center', fontweight='bold', fontsize=9)
+            for i in range(category_count)
+        ]
+        
+        # Laid out on the first render, once labels hold real values
+        self.is_laid_out = False
+    
+    def render(self, categories, sales, max_categories=5, output_path='top_categories_chart.png', **unused):
+        """
+        Draw one report's top categories and save them.
+        
+        Args:
+            categories (list): Category names, ranked.
+            sales (list): Revenue per category.
+            max_categories (int): Most categories to show; category_count must match what is shown.
+            output_path (str): Path to save the image to.
+            **unused: Other create_top_categories_chart() arguments, which do not change the image.
+        
+        Returns:
+            bool: True if the chart was saved.
+        """
+        if not categories or not sales or len(categories) != len(sales) or min(len(categories), max_categories) != self.category_count:
+            print("Error: Invalid input data for top categories chart")
+            return False
+        
+        # Same ordering as create_top_categories_chart(): the first max_categories, by sales
+        shown = sorted(zip(categories[:max_categories], sales[:max_categories]), key=lambda item: item[1], reverse=True)
+        top_sales = max(sales[:max_categories])
+        
+        for i, (bar, label, (category, value)) in enumerate(zip(self.bars, self.value_labels, shown)):
+            bar.set_height(value)
+            label.set_position((i, value + top_sales * 0.02))
+            label.set_text(f"${value:,.0f}")
+        self.ax.set_xticks(range(self.category_count))
+        self.ax.set_xticklabels([category for category, _ in shown], rotation=25, ha='right')
+        self.ax.set_ylim(0, top_sales * 1.1)
+        
+        if not self.is_laid_out:
+            self.fig.tight_layout()
+            self.is_laid_out = True
+        
+        try:
+            self.fig.savefig(output_path, dpi=150, bbox_inches='tight')
+            return True
+        except Exception as e:
+            print(f"Error saving top categories chart: {e}")
+            return False
@@ -0,0 +1,210 @@
+/*
+ * Draws the report charts in the browser from the data embedded in the report.
+ *
+ * Self-contained and offline: reads the JSON in <script id="chart-data"> and
+ * fills every <svg class="client-chart" data-chart="..."> with the matching chart,
+ * laid out like the matplotlib charts of visualizations.py.
+ */
+(function () {
+    'use strict';
+
+    var SVG_NS = 'http://www.w3.org/2000/svg';
+    var WIDTH = 1000;
+
+    function element(parent, name, attributes, text) {
+        var node = document.createElementNS(SVG_NS, name);
+        Object.keys(attributes || {}).forEach(function (key) {
+            node.setAttribute(key, attributes[key]);
+        });
+        if (text !== undefined) {
+            node.textContent = text;
+        }
+        parent.appendChild(node);
+        return node;
+    }
+
+    function formatCurrency(value) {
+        return '$' + Math.round(value).toLocaleString('en-US');
+    }
+
+    function formatNumber(value) {
+        return Math.round(value).toLocaleString('en-US');
+    }
+
+    // Round tick steps (1, 2, 2.5, 5 times a power of ten) covering 0..top in at most 8 ticks
+    function getTicks(top) {
+        if (!(top > 0)) {
+            return [0];
+        }
+        var magnitude = Math.pow(10, Math.floor(Math.log10(top / 8)));
+        var steps = [1, 2, 2.5, 5, 10];
+        var step = magnitude * 10;
+        for (var i = 0; i < steps.length; i++) {
+            if (top / (steps[i] * magnitude) <= 8) {
+                step = steps[i] * magnitude;
+                break;
+            }
+        }
+        var ticks = [];
+        for (var tick = 0; tick <= top + step * 1e-9; tick += step) {
+            ticks.push(tick);
+        }
+        return ticks;
+    }
+
+    function drawTitle(svg, title) {
+        element(svg, 'text', {
+            x: WIDTH / 2, y: 32, 'text-anchor': 'middle', 'font-size': 22, 'font-weight': 'bold', fill: '#262626'
+        }, title);
+    }
+
+    function drawFrame(svg, plot) {
+        element(svg, 'rect', {
+            x: plot.left, y: plot.top, width: plot.right - plot.left, height: plot.bottom - plot.top,
+            fill: 'none', stroke: '#cccccc', 'stroke-width': 1.25
+        });
+    }
+
+    // Horizontal grid, tick labels and axis label of one y axis, on the left or right of the plot
+    function drawYAxis(svg, plot, top, side, color, label, format, grid) {
+        var ticks = getTicks(top);
+        var x = side === 'left' ? plot.left - 10 : plot.right + 10;
+        ticks.forEach(function (tick) {
+            var y = plot.bottom - (tick / top) * (plot.bottom - plot.top);
+            if (grid && tick > 0) {
+                element(svg, 'line', {
+                    x1: plot.left, x2: plot.right, y1: y, y2: y,
+                    stroke: '#b0b0b0', 'stroke-opacity': 0.4, 'stroke-dasharray': '6 4'
+                });
+            }
+            element(svg, 'text', {
+                x: x, y: y + 5, 'text-anchor': side === 'left' ? 'end' : 'start', 'font-size': 14, fill: color
+            }, format(tick));
+        });
+        var labelX = side === 'left' ? 22 : WIDTH - 22;
+        var labelY = (plot.top + plot.bottom) / 2;
+        element(svg, 'text', {
+            x: labelX, y: labelY, transform: 'rotate(' + (side === 'left' ? -90 : 90) + ' ' + labelX + ' ' + labelY + ')',
+            'text-anchor': 'middle', 'font-size': 16, 'font-weight': 'bold', fill: color
+        }, label);
+    }
+
+    function drawEmpty(svg, height) {
+        element(svg, 'text', {
+            x: WIDTH / 2, y: height / 2, 'text-anchor': 'middle', 'font-size': 16, fill: '#666666'
+        }, 'No data for this period');
+    }
+
+    function drawSalesTrend(svg, data, colors) {
+        var height = 560;
+        var plot = {left: 110, right: 890, top: 60, bottom: 460};
+        svg.setAttribute('viewBox', '0 0 ' + WIDTH + ' ' + height);
+        drawTitle(svg, 'Daily Sales Performance');
+        if (!data || !data.days.length) {
+            drawEmpty(svg, height);
+            return;
+        }
+
+        var revenueTop = Math.max.apply(null, data.revenue) * 1.1 || 1;
+        var ordersTop = Math.max.apply(null, data.orders) * 1.1 || 1;
+        var slot = (plot.right - plot.left) / data.days.length;
+        var centre = function (i) { return plot.left + slot * (i + 0.5); };
+        var scale = function (value, top) { return plot.bottom - (value / top) * (plot.bottom - plot.top); };
+
+        drawYAxis(svg, plot, revenueTop, 'left', colors.primary, 'Daily Revenue ($)', formatCurrency, true);
+        drawYAxis(svg, plot, ordersTop, 'right', colors.highlight, 'Number of Orders', formatNumber, false);
+
+        // Orders as bars behind the revenue line
+        data.orders.forEach(function (orders, i) {
+            var y = scale(orders, ordersTop);
+            element(svg, 'rect', {
+                x: centre(i) - slot * 0.3, y: y, width: slot * 0.6, height: plot.bottom - y,
+                fill: colors.highlight, 'fill-opacity': 0.6
+            });
+        });
+        var points = data.revenue.map(function (revenue, i) {
+            return centre(i) + ',' + scale(revenue, revenueTop);
+        });
+        element(svg, 'polyline', {
+            points: points.join(' '), fill: 'none', stroke: colors.primary, 'stroke-width': 3.5, 'stroke-linejoin': 'round'
+        });
+        data.revenue.forEach(function (revenue, i) {
+            var marker = element(svg, 'circle', {
+                cx: centre(i), cy: scale(revenue, revenueTop), r: 7, fill: 'white', stroke: colors.primary, 'stroke-width': 2
+            });
+            element(marker, 'title', {}, data.days[i] + ': ' + formatCurrency(revenue) + ', ' + formatNumber(data.orders[i]) + ' orders');
+        });
+        data.days.forEach(function (day, i) {
+            element(svg, 'text', {x: centre(i), y: plot.bottom + 26, 'text-anchor': 'middle', 'font-size': 15, fill: '#262626'}, day);
+        });
+        drawFrame(svg, plot);
+
+        // Legend below the plot
+        var legendY = plot.bottom + 72;
+        var legend = element(svg, 'g', {'font-size': 15, fill: '#262626'});
+        element(legend, 'line', {x1: 345, x2: 385, y1: legendY, y2: legendY, stroke: colors.primary, 'stroke-width': 3.5});
+        element(legend, 'circle', {cx: 365, cy: legendY, r: 6, fill: 'white', stroke: colors.primary, 'stroke-width': 2});
+        element(legend, 'text', {x: 395, y: legendY + 5}, 'Revenue');
+        element(legend, 'rect', {x: 500, y: legendY - 9, width: 40, height: 18, fill: colors.highlight, 'fill-opacity': 0.6});
+        element(legend, 'text', {x: 550, y: legendY + 5}, 'Number of Orders');
+    }
+
+    function drawTopCategories(svg, data, colors) {
+        var height = 600;
+        var plot = {left: 110, right: 970, top: 70, bottom: 470};
+        svg.setAttribute('viewBox', '0 0 ' + WIDTH + ' ' + height);
+        drawTitle(svg, 'Top Product Categories by Revenue');
+        if (!data || !data.categories.length) {
+            drawEmpty(svg, height);
+            return;
+        }
+
+        var top = Math.max.apply(null, data.sales) * 1.1 || 1;
+        var slot = (plot.right - plot.left) / data.categories.length;
+        var barWidth = slot * (data.categories.length <= 3 ? 0.5 : 0.65);
+        var scale = function (value) { return plot.bottom - (value / top) * (plot.bottom - plot.top); };
+
+        drawYAxis(svg, plot, top, 'left', '#262626', 'Revenue ($)', formatCurrency, true);
+        data.sales.forEach(function (sales, i) {
+            var centre = plot.left + slot * (i + 0.5);
+            var y = scale(sales);
+            var bar = element(svg, 'rect', {x: centre - barWidth / 2, y: y, width: barWidth, height: plot.bottom - y, fill: colors.primary});
+            element(bar, 'title', {}, data.categories[i] + ': ' + formatCurrency(sales));
+            element(svg, 'text', {
+                x: centre, y: scale(sales + top / 1.1 * 0.02) - 4, 'text-anchor': 'middle', 'font-size': 13, 'font-weight': 'bold', fill: 'black'
+            }, formatCurrency(sales));
+            var labelY = plot.bottom + 24;
+            element(svg, 'text', {
+                x: centre, y: labelY, transform: 'rotate(-25 ' + centre + ' ' + labelY + ')',
+                'text-anchor': 'end', 'font-size': 15, fill: '#262626'
+            }, data.categories[i]);
+        });
+        drawFrame(svg, plot);
+    }
+
+    var CHARTS = {
+        sales_trend: drawSalesTrend,
+        top_categories: drawTopCategories
+    };
+
+    function drawCharts() {
+        var source = document.getElementById('chart-data');
+        if (!source) {
+            return;
+        }
+        var chartData = JSON.parse(source.textContent);
+        var charts = document.querySelectorAll('svg.client-chart[data-chart]');
+        Array.prototype.forEach.call(charts, function (svg) {
+            var draw = CHARTS[svg.getAttribute('data-chart')];
+            if (draw) {
+                draw(svg, chartData[svg.getAttribute('data-chart')], chartData.colors);
+            }
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', drawCharts);
+    } else {
+        drawCharts();
+    }
+}());
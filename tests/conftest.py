@@ -0,0 +1,109 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modules in src/ import each other by name, as when run from there
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'src'))
+
+# Environment variables load_files_paths() reads each table's path from
+SOURCE_ENV_VARS = {
+    'orders': 'orders_table_file_path',
+    'products': 'products_table_file_path',
+    'ordered_items': 'orderd_items_table_file_path',
+    'product_category': 'product_category_file_path',
+    'customers': 'customers_table_file_path',
+    'order_reviews': 'order_reviews_table_file_path',
+    'order_payment': 'order_payment_table_file_path',
+    'sellers': 'sellers_table_file_path'
+}
+
+def make_source_tables(seed=0, order_count=600):
+    """
+    Build every source table in the CSV layout of the Olist files, with the awkward cases
+    the sample data lacks: orders without reviews or payments, several reviews per order,
+    undelivered orders, deliveries of 50 days or more and categories without a translation.
+    """
+    rng = np.random.default_rng(seed)
+    order_ids = [f'o{i:05d}' for i in range(order_count)]
+    purchases = pd.Timestamp('2017-03-01') + pd.to_timedelta(rng.integers(0, 120 * 86400, order_count), unit='s')
+    delivered = purchases + pd.to_timedelta(rng.integers(86400, 70 * 86400, order_count), unit='s')
+    status = rng.choice(['delivered', 'shipped', 'canceled'], order_count, p=[0.85, 0.1, 0.05])
+    orders = pd.DataFrame({
+        'order_id': order_ids,
+        'customer_id': [f'c{i:05d}' for i in range(order_count)],
+        'order_status': status,
+        'order_purchase_timestamp': purchases.strftime('%Y-%m-%d %H:%M:%S'),
+        'order_delivered_customer_date': np.where(status == 'delivered', delivered.strftime('%Y-%m-%d %H:%M:%S'), ''),
+        'order_estimated_delivery_date': (purchases.normalize() + pd.Timedelta(days=20)).strftime('%Y-%m-%d %H:%M:%S')
+    })
+    
+    # One to three lines per order
+    line_orders = np.repeat(order_ids, rng.integers(1, 4, order_count))
+    items = pd.DataFrame({
+        'order_id': line_orders,
+        'product_id': [f'p{i}' for i in rng.integers(0, 12, len(line_orders))],
+        'seller_id': [f's{i}' for i in rng.integers(0, 6, len(line_orders))],
+        'price': rng.integers(500, 40000, len(line_orders)) / 100,
+        'freight_value': rng.integers(0, 3000, len(line_orders)) / 100
+    })
+    
+    # No review for some orders, two for others, so the per-order mean is fractional
+    review_orders = np.repeat(order_ids, rng.choice([0, 1, 2], order_count, p=[0.15, 0.65, 0.2]))
+    reviews = pd.DataFrame({'order_id': review_orders, 'review_score': rng.integers(1, 6, len(review_orders))})
+    payment_orders = np.repeat(order_ids, rng.choice([0, 1, 2], order_count, p=[0.05, 0.8, 0.15]))
+    payments = pd.DataFrame({'order_id': payment_orders, 'payment_value': rng.integers(500, 60000, len(payment_orders)) / 100})
+    
+    # Returning customers share a unique id
+    customers = pd.DataFrame({
+        'customer_id': orders['customer_id'],
+        'customer_unique_id': [f'u{i}' for i in rng.integers(0, order_count // 2, order_count)],
+        'customer_state': rng.choice(['SP', 'RJ', 'MG', 'PR'], order_count)
+    })
+    products = pd.DataFrame({
+        'product_id': [f'p{i}' for i in range(12)],
+        'product_category_name': [f'cat{i % 5}' if i != 11 else '' for i in range(12)]
+    })
+    product_category = pd.DataFrame({
+        'product_category_name': ['cat0', 'cat1', 'cat2', 'cat3'],
+        'product_category_name_english': ['toys', 'books', 'garden', 'housewares']
+    })
+    sellers = pd.DataFrame({
+        'seller_id': [f's{i}' for i in range(6)],
+        'seller_city': ['sao paulo', 'curitiba', 'rio de janeiro', 'campinas', 'santos', 'belo horizonte'],
+        'seller_state': ['SP', 'PR', 'RJ', 'SP', 'SP', 'MG']
+    })
+    return {
+        'orders': orders,
+        'ordered_items': items,
+        'order_reviews': reviews,
+        'order_payment': payments,
+        'customers': customers,
+        'products': products,
+        'product_category': product_category,
+        'sellers': sellers
+    }
+
+@pytest.fixture
+def report_sources(tmp_path, monkeypatch):
+    """
+    Write make_source_tables() to CSV files, point load_files_paths() at them and run
+    from a scratch directory laid out like the repository (data/ and templates/).
+    
+    Returns:
+        dict: Path of every source file, keyed by table name.
+    """
+    source_dir = tmp_path / 'input'
+    source_dir.mkdir()
+    file_paths = {}
+    for table_name, table in make_source_tables().items():
+        file_paths[table_name] = str(source_dir / f'{table_name}.csv')
+        table.to_csv(file_paths[table_name], index=False)
+        monkeypatch.setenv(SOURCE_ENV_VARS[table_name], file_paths[table_name])
+    
+    (tmp_path / 'templates').symlink_to(os.path.join(REPO_DIR, 'templates'))
+    monkeypatch.chdir(tmp_path)
+    return file_paths
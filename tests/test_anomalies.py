@@ -0,0 +1,59 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from anomalies import ALERT_HISTORY_DAYS, detect_anomalies
+
+def daily_grids(revenue, orders=None, review_score_sum=None, review_score_count=None):
+    """
+    Lay one category's daily totals out like anomalies.build_daily_grids().
+    """
+    revenue = np.asarray(revenue, dtype='float64')
+    orders = np.ones_like(revenue) if orders is None else np.asarray(orders, dtype='float64')
+    review_score_count = np.zeros_like(revenue) if review_score_count is None else np.asarray(review_score_count, dtype='float64')
+    review_score_sum = np.zeros_like(revenue) if review_score_sum is None else np.asarray(review_score_sum, dtype='float64')
+    return {
+        'dates': pd.date_range('2017-04-01', periods=len(revenue)),
+        'categories': pd.Index(['toys']),
+        'grids': {
+            'revenue': revenue[:, np.newaxis],
+            'orders': orders[:, np.newaxis],
+            'review_score_sum': review_score_sum[:, np.newaxis],
+            'review_score_count': review_score_count[:, np.newaxis]
+        }
+    }
+
+def category_alerts(alerts, measure):
+    return alerts[(alerts['category'] == 'toys') & (alerts['measure'] == measure)]
+
+def test_flat_history_flags_only_large_jumps():
+    revenue = [500.0] * ALERT_HISTORY_DAYS + [520.0, 5000.0]
+    alerts = category_alerts(detect_anomalies(daily_grids(revenue)), 'revenue')
+    assert alerts['date'].tolist() == [pd.Timestamp('2017-04-30')]
+    assert alerts['expected'].tolist() == [500.0]
+
+def test_sparse_history_gives_bounded_scores():
+    # A few cents of usual revenue and a near-zero deviation
+    revenue = np.tile([0.0, 3.56, 3.56, 0.0, 3.56, 3.56, 3.60], 5)[:ALERT_HISTORY_DAYS + 1]
+    revenue[-1] = 140.0
+    alerts = detect_anomalies(daily_grids(revenue))
+    assert category_alerts(alerts, 'revenue').empty
+    
+    # A real surge is still flagged, at a sensible score
+    revenue[-1] = 1400.0
+    alerts = category_alerts(detect_anomalies(daily_grids(revenue)), 'revenue')
+    assert len(alerts) == 1 and 3.5 <= alerts['z_score'].iloc[0] < 20
+
+def test_nan_history_is_not_scored():
+    days = ALERT_HISTORY_DAYS + 1
+    # Ratings of days with fewer than ALERT_MIN_REVIEWS reviews are NaN, so only 10 history days have one
+    review_score_count = np.where(np.arange(days) % 3 == 0, 10, 1)
+    review_score_sum = 4.5 * review_score_count
+    review_score_count[-1], review_score_sum[-1] = 10, 10
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        alerts = detect_anomalies(daily_grids(np.full(days, 500.0), review_score_sum=review_score_sum, review_score_count=review_score_count))
+    assert alerts[alerts['measure'] == 'rating'].empty
+    assert alerts.empty
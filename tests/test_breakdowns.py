@@ -0,0 +1,32 @@
+import pandas as pd
+
+from breakdowns import BREAKDOWN_MEASURES, get_rollup_period_breakdowns
+
+PERIODS = [('this_week', '2017-05-08', '2017-05-14'), ('last_week', '2017-05-01', '2017-05-07')]
+
+def daily_breakdowns():
+    """
+    Build two days of daily breakdowns, laid out like breakdowns.build_daily_breakdowns().
+    """
+    return pd.DataFrame({
+        'purchase_date': pd.to_datetime(['2017-05-02', '2017-05-09', '2017-05-09']),
+        'dimension': ['seller', 'seller', 'customer_state'],
+        'member': ['a', 'a', 'SP'],
+        'revenue': [10.0, 30.0, 30.0],
+        'items': [1, 2, 2],
+        'orders': [1, 1, 1],
+        'delivery_days_sum': [4.0, 6.0, 6.0],
+        'delivery_days_count': [1, 1, 1]
+    })
+
+def test_rollup_period_breakdowns_sum_each_window():
+    breakdowns = get_rollup_period_breakdowns(daily_breakdowns(), PERIODS)
+    assert breakdowns.loc[('seller', 'a'), ('revenue', 'this_week')] == 30.0
+    assert breakdowns.loc[('seller', 'a'), ('revenue', 'last_week')] == 10.0
+    assert breakdowns.loc[('customer_state', 'SP'), ('items', 'last_week')] == 0
+
+def test_rollup_period_breakdowns_without_rows_are_empty():
+    periods = [('this_week', '2025-01-01', '2025-01-07'), ('last_week', '2024-12-25', '2024-12-31')]
+    breakdowns = get_rollup_period_breakdowns(daily_breakdowns(), periods)
+    assert breakdowns.empty
+    assert list(breakdowns.columns) == [(measure, label) for measure in BREAKDOWN_MEASURES for label, _, _ in periods]
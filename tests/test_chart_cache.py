@@ -0,0 +1,26 @@
+import os
+
+import chart_cache
+
+def write_chart(directory, name, size):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+def test_account_chart_scans_only_past_the_limit(tmp_path, monkeypatch):
+    scans = []
+    evict_charts = chart_cache.evict_charts
+    monkeypatch.setattr(chart_cache, 'evict_charts', lambda *args: scans.append(args) or evict_charts(*args))
+    monkeypatch.setattr(chart_cache, '_directory_bytes', {})
+    directories = [str(tmp_path)]
+    
+    for i in range(10):
+        write_chart(str(tmp_path), f'{i}.png', 100)
+        os.utime(os.path.join(str(tmp_path), f'{i}.png'), (i, i))
+        chart_cache.account_chart(directories, 100, max_bytes=500, trim_bytes=300)
+    
+    # The first chart, and the ones taking the directory past 500 bytes
+    assert len(scans) == 3
+    assert sorted(os.listdir(str(tmp_path))) == ['6.png', '7.png', '8.png', '9.png']
+    assert sum(os.path.getsize(os.path.join(str(tmp_path), name)) for name in os.listdir(str(tmp_path))) <= 500
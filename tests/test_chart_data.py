@@ -0,0 +1,60 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from chart_data import CHART_COLORS, get_chart_data
+from conftest import REPO_DIR
+
+def chart_jobs(categories, sales, max_categories=5):
+    return [
+        ('sales_trend', {
+            'day_names': ['Mon', 'Tue', 'Wed'],
+            'daily_revenue': [np.float64(100.5), np.float64(0.0), np.float64(250.25)],
+            'order_counts': [np.int64(2), np.int64(0), np.int64(3)],
+            'output_path': 'sales_trend.png'
+        }),
+        ('top_categories', {
+            'categories': categories,
+            'sales': sales,
+            'daily_rates': None,
+            'prev_week_sales': None,
+            'percent_changes': None,
+            'signs': None,
+            'trends': None,
+            'max_categories': max_categories,
+            'output_path': 'top_categories.png'
+        })
+    ]
+
+def test_colors_match_the_report_css():
+    with open(os.path.join(REPO_DIR, 'templates', 'report_template.css'), encoding='utf-8') as f:
+        css_colors = dict(re.findall(r'--(\w+)-color:\s*(#[0-9A-Fa-f]{6})', f.read()))
+    colors = get_chart_data(chart_jobs(('Toys',), (1.0,)))['colors']
+    assert colors == CHART_COLORS
+    assert {name: color.lower() for name, color in colors.items()} == {name: css_colors[name].lower() for name in colors}
+
+def test_sales_trend_keeps_the_day_order():
+    chart_data = get_chart_data(chart_jobs(('Toys',), (1.0,)))
+    assert chart_data['sales_trend'] == {'days': ['Mon', 'Tue', 'Wed'], 'revenue': [100.5, 0.0, 250.25], 'orders': [2.0, 0.0, 3.0]}
+    # NumPy values are converted, so the data can be embedded in the report
+    json.dumps(chart_data)
+
+def test_top_categories_are_cut_before_being_sorted_by_sales():
+    categories = ('Toys', 'Books', 'Garden', 'Tools', 'Games', 'Music')
+    sales = (np.float64(200.0), np.float64(300.0), np.float64(100.0), np.float64(50.0), np.float64(80.0), np.float64(900.0))
+    chart_data = get_chart_data(chart_jobs(categories, sales))
+    # 'Music' is past max_categories, however large its sales
+    assert chart_data['top_categories'] == {
+        'categories': ['Books', 'Toys', 'Garden', 'Games', 'Tools'],
+        'sales': [300.0, 200.0, 100.0, 80.0, 50.0]
+    }
+    assert get_chart_data(chart_jobs(categories, sales, max_categories=2))['top_categories']['categories'] == ['Books', 'Toys']
+
+def test_missing_series_give_empty_charts():
+    jobs = chart_jobs(None, None)
+    jobs[0][1].update(day_names=None, daily_revenue=None, order_counts=None)
+    chart_data = get_chart_data(jobs)
+    assert chart_data['sales_trend'] == {'days': [], 'revenue': [], 'orders': []}
+    assert chart_data['top_categories'] == {'categories': [], 'sales': []}
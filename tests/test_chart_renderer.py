@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+
+import pytest
+
+from chart_renderer import ChartRenderer
+
+def sales_trend_args(output_path, revenue=100.0):
+    return {
+        'day_names': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        'daily_revenue': [revenue, 120.0, 90.0, 150.0, 80.0, 60.0, 70.0],
+        'order_counts': [3, 4, 2, 5, 2, 1, 2],
+        'output_path': output_path
+    }
+
+def top_categories_args(output_path):
+    return {
+        'categories': ('Toys', 'Books', 'Garden'),
+        'sales': (300.0, 200.0, 100.0),
+        'daily_rates': (2, 1, 1),
+        'prev_week_sales': (250.0, 220.0, 100.0),
+        'percent_changes': (20.0, 9.1, 0.0),
+        'signs': ('+', '-', ''),
+        'trends': ('positive', 'negative', 'neutral'),
+        'max_categories': 5,
+        'output_path': output_path
+    }
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def submit_from_child(renderer, output_path):
+    renderer.submit('sales_trend', sales_trend_args(output_path, revenue=500.0))
+
+@pytest.mark.parametrize('use_templates', [False, True])
+def test_queued_charts_are_rendered_and_counted(tmp_path, use_templates):
+    with ChartRenderer(1, use_templates=use_templates) as renderer:
+        renderer.submit('sales_trend', sales_trend_args(str(tmp_path / 'trend.png')))
+        renderer.submit('top_categories', top_categories_args(str(tmp_path / 'categories.png')))
+        assert renderer.render('sales_trend', sales_trend_args(str(tmp_path / 'trend.svg'))) == 'miss'
+        renderer.wait()
+        assert renderer.get_counts() == {'hit': 0, 'miss': 3, 'failed': 0}
+
+    assert read_bytes(tmp_path / 'trend.png').startswith(b'\x89PNG')
+    assert read_bytes(tmp_path / 'categories.png').startswith(b'\x89PNG')
+    assert b'<svg' in read_bytes(tmp_path / 'trend.svg')
+
+def test_cached_charts_are_reused(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    with ChartRenderer(1) as renderer:
+        renderer.submit('sales_trend', sales_trend_args(str(tmp_path / 'first.png')), cache_dir)
+        renderer.wait()
+        # Same inputs under another name, then different inputs
+        renderer.submit('sales_trend', sales_trend_args(str(tmp_path / 'second.png')), cache_dir)
+        renderer.submit('sales_trend', sales_trend_args(str(tmp_path / 'third.png'), revenue=101.0), cache_dir)
+        renderer.wait()
+        assert renderer.get_counts() == {'hit': 1, 'miss': 2, 'failed': 0}
+
+    assert read_bytes(tmp_path / 'second.png') == read_bytes(tmp_path / 'first.png')
+    assert read_bytes(tmp_path / 'third.png') != read_bytes(tmp_path / 'first.png')
+
+def test_failed_charts_are_counted(tmp_path):
+    with ChartRenderer(1) as renderer:
+        renderer.submit('sales_trend', dict(sales_trend_args(str(tmp_path / 'empty.png')), day_names=[], daily_revenue=[], order_counts=[]))
+        renderer.wait()
+        assert renderer.get_counts() == {'hit': 0, 'miss': 0, 'failed': 1}
+    assert not os.path.exists(tmp_path / 'empty.png')
+
+def test_charts_submitted_from_other_processes_are_waited_for(tmp_path):
+    output_path = str(tmp_path / 'child.png')
+    with ChartRenderer(1) as renderer:
+        child = multiprocessing.get_context('fork').Process(target=submit_from_child, args=(renderer, output_path))
+        child.start()
+        child.join()
+        renderer.wait()
+        assert renderer.get_counts()['miss'] == 1
+        workers = list(renderer.workers)
+
+    assert os.path.getsize(output_path) > 0
+    # Closing the renderer stops its workers
+    assert not any(worker.is_alive() for worker in workers)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from cohorts import build_cohort_matrix, build_customer_index, get_period_customers
+
+PERIODS = [('this_week', '2017-05-08', '2017-05-14'), ('last_week', '2017-05-01', '2017-05-07')]
+
+def customer_index():
+    """
+    Index three customers whose first orders fall in the weeks of Monday 1 and 8 May 2017:
+    u0 orders twice in its first week and again the next, u1 first orders in the second
+    week and returns the week after, u2 comes back two weeks after its first order.
+    """
+    orders = pd.DataFrame({
+        'customer_id': pd.Categorical(['c0', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6', 'c7', 'c8']),
+        'order_purchase_timestamp': pd.to_datetime([
+            '2017-05-10 09:00', '2017-05-02 10:00', '2017-05-03 18:00', '2017-05-09 12:00',
+            '2017-05-20 08:00', '2017-05-04 23:59', '2017-05-19 07:00', '2017-05-05 10:00', None
+        ])
+    })
+    # c7 has no customer row and c8 no purchase time, so neither is indexed
+    customers = pd.DataFrame({
+        'customer_id': pd.Categorical(['c0', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6', 'c8']),
+        'customer_unique_id': pd.Categorical(['u0', 'u0', 'u0', 'u1', 'u1', 'u2', 'u2', 'u2'])
+    })
+    return build_customer_index(orders, customers)
+
+def test_customer_index_numbers_each_customers_orders():
+    index = customer_index()
+    assert index['customer'].tolist() == [0, 0, 0, 1, 1, 2, 2]
+    assert index['order_number'].tolist() == [0, 1, 2, 0, 1, 0, 1]
+    assert index['first_purchase_timestamp'].dt.strftime('%m-%d').tolist() == ['05-02'] * 3 + ['05-09'] * 2 + ['05-04'] * 2
+
+def test_cohort_matrix_counts_active_customers_per_week():
+    cohort_matrix = build_cohort_matrix(customer_index())
+    assert cohort_matrix.index.tolist() == [pd.Timestamp('2017-05-01'), pd.Timestamp('2017-05-08')]
+    # u0 ordered twice in its first week, but is counted once
+    np.testing.assert_array_equal(cohort_matrix.to_numpy(), [[2, 1, 1], [1, 1, 0]])
+
+def test_cohort_matrix_of_no_orders_is_empty():
+    cohort_matrix = build_cohort_matrix(customer_index().iloc[:0])
+    assert cohort_matrix.shape == (0, 0)
+
+def test_period_customers_flag_returning_customers():
+    period_customers = get_period_customers(customer_index(), PERIODS)
+    assert list(period_customers['period'].cat.categories) == ['this_week', 'last_week']
+    rows = {(row.period, row.customer): row.is_returning for row in period_customers.itertuples()}
+    # u0's second order of its first week makes it a returning customer of that week
+    assert rows == {
+        ('this_week', 0): True,
+        ('this_week', 1): False,
+        ('last_week', 0): True,
+        ('last_week', 2): False
+    }
+
+def test_period_customers_of_an_empty_period():
+    periods = [('this_week', '2018-01-01', '2018-01-07'), ('last_week', '2017-05-01', '2017-05-07')]
+    period_customers = get_period_customers(customer_index(), periods)
+    assert period_customers.groupby('period', observed=False).size().tolist() == [0, 2]
@@ -0,0 +1,112 @@
+import dataclasses
+import math
+import re
+
+import pandas as pd
+import pytest
+
+from report_maker import (
+    calculate_report_metrics,
+    create_template_environment,
+    generate_ecommerce_report,
+    get_batch_periods,
+    get_report_dates,
+    load_period_metrics,
+    load_report_data
+)
+
+def render_report(engine, this_week_start, this_week_end, comparison='previous'):
+    """
+    Generate a report with one engine and return its HTML without the generation time.
+    """
+    report_path = generate_ecommerce_report(
+        this_week_start,
+        this_week_end,
+        engine=engine,
+        report_data=load_report_data(engine),
+        template_env=create_template_environment('templates'),
+        comparison=comparison,
+        chart_format='json'
+    )
+    assert report_path is not None
+    with open(report_path, encoding='utf-8') as f:
+        return re.sub(r'Report generated on [^<]*', '', f.read())
+
+def assert_same_values(actual, expected, path='metrics'):
+    """
+    Compare nested metric results, allowing floats to differ by summation order.
+    """
+    if dataclasses.is_dataclass(expected):
+        assert type(actual) is type(expected), path
+        actual, expected = dataclasses.asdict(actual), dataclasses.asdict(expected)
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for key in expected:
+            assert_same_values(actual[key], expected[key], f'{path}.{key}')
+    elif isinstance(expected, (list, tuple)):
+        assert len(actual) == len(expected), path
+        for i, (actual_value, expected_value) in enumerate(zip(actual, expected)):
+            assert_same_values(actual_value, expected_value, f'{path}[{i}]')
+    elif isinstance(expected, float) and not isinstance(actual, str):
+        assert actual is not None and (math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9) or (math.isnan(actual) and math.isnan(expected))), path
+    else:
+        assert actual == expected, path
+
+def get_period_measures(report_data, report_periods):
+    """
+    Load the measures of every report period, as a benchmark run does.
+    """
+    measures = []
+    for start_date, end_date in report_periods:
+        dates = get_report_dates(start_date, end_date)
+        periods = [
+            ('this_week', dates['this_week_start'], dates['this_week_end']),
+            ('last_week', dates['last_week_start'], dates['last_week_end'])
+        ]
+        period_measures, _, _, _, _ = load_period_metrics(report_data, periods)
+        measures.append(period_measures)
+    return measures
+
+@pytest.mark.parametrize('engine', ['rollup', 'sqlite', 'arrow'])
+def test_engine_period_measures_match_pandas(report_sources, engine):
+    # Weekly periods over all the sources, including weeks without any order
+    report_periods = get_batch_periods('2017-02-20', '2017-07-09', 7)
+    reference = get_period_measures(load_report_data('pandas'), report_periods)
+    measures = get_period_measures(load_report_data(engine), report_periods)
+    
+    # The rollup engine also returns the rollup-only 'attributed_orders' measure
+    for (start_date, _), expected, actual in zip(report_periods, reference, measures):
+        try:
+            pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False, check_exact=False)
+        except AssertionError as error:
+            raise AssertionError(f"{engine} measures differ for the period starting {start_date}") from error
+
+@pytest.mark.parametrize('comparison', ['previous', 'last_year', 'trailing_4_weeks'])
+@pytest.mark.parametrize('engine', ['rollup', 'sqlite', 'arrow'])
+def test_engine_metrics_match_pandas(report_sources, engine, comparison):
+    reference_data, report_data = load_report_data('pandas'), load_report_data(engine)
+    for this_week_start, this_week_end in [('2017-05-01', '2017-05-07'), ('2017-06-01', '2017-06-30')]:
+        dates = get_report_dates(this_week_start, this_week_end, comparison=comparison)
+        assert_same_values(calculate_report_metrics(report_data, dates), calculate_report_metrics(reference_data, dates))
+
+@pytest.mark.parametrize('this_week_start, this_week_end', [('2017-05-01', '2017-05-07'), ('2017-06-01', '2017-06-30')])
+def test_sqlite_report_matches_pandas(report_sources, this_week_start, this_week_end):
+    assert render_report('sqlite', this_week_start, this_week_end) == render_report('pandas', this_week_start, this_week_end)
+
+@pytest.mark.parametrize('engine', ['pandas', 'rollup', 'sqlite', 'arrow'])
+def test_delivery_time_distribution_keeps_long_deliveries(report_sources, engine):
+    dates = get_report_dates('2017-05-01', '2017-05-31')
+    metrics = calculate_report_metrics(load_report_data(engine), dates)
+    
+    orders = pd.read_csv(report_sources['orders'], parse_dates=['order_purchase_timestamp', 'order_delivered_customer_date'])
+    items = pd.read_csv(report_sources['ordered_items'])
+    orders = orders[orders['order_id'].isin(items['order_id']) & (orders['order_status'] == 'delivered')]
+    orders = orders[orders['order_purchase_timestamp'].between('2017-05-01', '2017-06-01', inclusive='left')]
+    delivery_days = (orders['order_delivered_customer_date'] - orders['order_purchase_timestamp']).dt.total_seconds() / 86400
+    assert delivery_days.max() >= 50
+    
+    distribution = metrics['delivery_time_days_distribution']
+    assert distribution.count == len(delivery_days)
+    assert distribution.p99 == pytest.approx(delivery_days.quantile(0.99, interpolation='lower'), rel=0.01)
+    # The average delivery time still leaves deliveries of 50 days or more out
+    assert metrics['delivery'].current < delivery_days.mean()
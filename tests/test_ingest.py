@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+from data_processor import load_table
+from ingest import get_ingest_paths, update_daily_rollup
+
+def make_tables(seed, order_count=60, first_order=0):
+    """
+    Build random order, item, review and lookup tables in the CSV layout of the source files.
+    """
+    rng = np.random.default_rng(seed)
+    order_ids = [f'o{i:05d}' for i in range(first_order, first_order + order_count)]
+    purchases = pd.Timestamp('2017-05-01') + pd.to_timedelta(rng.integers(0, 30 * 86400, order_count), unit='s')
+    delivered = purchases + pd.to_timedelta(rng.integers(1, 20 * 86400, order_count), unit='s')
+    orders = pd.DataFrame({
+        'order_id': order_ids,
+        'customer_id': [f'c{i:05d}' for i in range(first_order, first_order + order_count)],
+        'order_status': 'delivered',
+        'order_purchase_timestamp': purchases.strftime('%Y-%m-%d %H:%M:%S'),
+        'order_delivered_customer_date': np.where(rng.random(order_count) < 0.9, delivered.strftime('%Y-%m-%d %H:%M:%S'), ''),
+        'order_estimated_delivery_date': (purchases.normalize() + pd.Timedelta(days=15)).strftime('%Y-%m-%d %H:%M:%S')
+    })
+    line_orders = rng.choice(order_ids, order_count * 2)
+    items = pd.DataFrame({
+        'order_id': line_orders,
+        'product_id': [f'p{i}' for i in rng.integers(0, 8, len(line_orders))],
+        'seller_id': [f's{i}' for i in rng.integers(0, 5, len(line_orders))],
+        'price': rng.integers(100, 50000, len(line_orders)) / 100,
+        'freight_value': rng.integers(0, 3000, len(line_orders)) / 100
+    })
+    reviews = pd.DataFrame({'order_id': order_ids, 'review_score': rng.integers(1, 6, order_count)})
+    customers = pd.DataFrame({
+        'customer_id': orders['customer_id'],
+        'customer_unique_id': [f'u{i % 40}' for i in range(first_order, first_order + order_count)],
+        'customer_state': rng.choice(['SP', 'RJ', 'MG'], order_count)
+    })
+    return {'orders': orders, 'ordered_items': items, 'order_reviews': reviews, 'customers': customers}
+
+def write_sources(directory):
+    tables = make_tables(0)
+    tables['products'] = pd.DataFrame({'product_id': [f'p{i}' for i in range(8)], 'product_category_name': [f'cat{i % 3}' for i in range(8)]})
+    tables['product_category'] = pd.DataFrame({'product_category_name': ['cat0', 'cat1', 'cat2'], 'product_category_name_english': ['toys', 'books', 'garden']})
+    file_paths = {}
+    for table_name, table in tables.items():
+        file_paths[table_name] = str(directory / f'{table_name}.csv')
+        table.to_csv(file_paths[table_name], index=False)
+    return file_paths
+
+def append_rows(file_path, rows):
+    with open(file_path, 'a') as f:
+        f.write(rows.to_csv(index=False, header=False))
+
+def sorted_frame(frame):
+    return frame.astype({column: object for column in frame.select_dtypes('category').columns}).sort_values(list(frame.columns)).reset_index(drop=True)
+
+def assert_matches_rebuild(file_paths, rollup_dir, tmp_path):
+    rebuild_dir = tmp_path / 'rebuild'
+    fresh_paths = {}
+    for table_name, file_path in file_paths.items():
+        fresh_paths[table_name] = str(tmp_path / f'fresh_{table_name}.csv')
+        with open(file_path) as source, open(fresh_paths[table_name], 'w') as target:
+            target.write(source.read())
+    update_daily_rollup(fresh_paths, str(rebuild_dir), verbose=False)
+    
+    patched, rebuilt = get_ingest_paths(str(rollup_dir)), get_ingest_paths(str(rebuild_dir))
+    for name in ['daily_rollup', 'daily_sketches', 'daily_breakdowns', 'order_facts', 'breakdown_facts', 'order_hashes']:
+        pd.testing.assert_frame_equal(
+            sorted_frame(pd.read_feather(patched[name])),
+            sorted_frame(pd.read_feather(rebuilt[name])),
+            check_exact=False, rtol=1e-12
+        )
+    for table_name, file_path in file_paths.items():
+        pd.testing.assert_frame_equal(load_table(file_path, table_name), load_table(fresh_paths[table_name], table_name, use_cache=False))
+
+@pytest.fixture
+def hashed_rows(monkeypatch):
+    """
+    Record how many rows of each table update_daily_rollup() hashes.
+    """
+    counts = []
+    hash_order_rows = ingest.hash_order_rows
+    monkeypatch.setattr(ingest, 'hash_order_rows', lambda order_ids, rows: counts.append(len(rows)) or hash_order_rows(order_ids, rows))
+    return counts
+
+def test_appended_rows_are_the_only_rows_hashed(tmp_path, hashed_rows):
+    file_paths = write_sources(tmp_path)
+    rollup_dir = tmp_path / 'rollups'
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    
+    # New orders of known customers with their lines, plus a line and a review for orders seen before
+    new_tables = make_tables(1, order_count=5, first_order=1000)
+    new_tables['orders']['customer_id'] = ['c00000', 'c00001', 'c00002', 'c00003', 'c00004']
+    for table_name in ingest.ORDER_TABLES:
+        append_rows(file_paths[table_name], new_tables[table_name])
+    append_rows(file_paths['ordered_items'], make_tables(2)['ordered_items'].head(1))
+    append_rows(file_paths['order_reviews'], pd.DataFrame({'order_id': ['o00003'], 'review_score': [1]}))
+    
+    hashed_rows.clear()
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    assert hashed_rows == [5, len(new_tables['ordered_items']) + 1, 6]
+    assert_matches_rebuild(file_paths, rollup_dir, tmp_path)
+
+def test_only_changed_tables_are_hashed(tmp_path, hashed_rows):
+    file_paths = write_sources(tmp_path)
+    rollup_dir = tmp_path / 'rollups'
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    
+    append_rows(file_paths['order_reviews'], pd.DataFrame({'order_id': ['o00007'], 'review_score': [2]}))
+    hashed_rows.clear()
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    assert hashed_rows == [0, 0, 1]
+    assert_matches_rebuild(file_paths, rollup_dir, tmp_path)
+
+def test_edited_table_is_hashed_again(tmp_path, hashed_rows):
+    file_paths = write_sources(tmp_path)
+    rollup_dir = tmp_path / 'rollups'
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    
+    items = pd.read_csv(file_paths['ordered_items'])
+    items.loc[10, 'price'] += 1
+    items.to_csv(file_paths['ordered_items'], index=False)
+    hashed_rows.clear()
+    update_daily_rollup(file_paths, str(rollup_dir), verbose=False)
+    assert hashed_rows == [0, len(items), 0]
+    assert_matches_rebuild(file_paths, rollup_dir, tmp_path)
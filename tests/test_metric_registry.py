@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+import metric_registry
+from metric_registry import (
+    METRIC_REGISTRY,
+    MetricDefinition,
+    calculate_period_measures,
+    evaluate_metrics,
+    get_required_measures,
+    register_metric
+)
+
+def period_measures(**measures):
+    """
+    Lay out (this_week, last_week) measure values like metric_registry.calculate_period_measures().
+    """
+    return pd.DataFrame(measures, index=pd.Index(['this_week', 'last_week'], name='period'))
+
+def test_rates_change_in_percentage_points():
+    measures = period_measures(returning_customers=[30, 20], customers=[100, 100])
+    repeat_rate = evaluate_metrics(measures, 'this_week', 'last_week', ['repeat_rate'])['repeat_rate']
+    assert (repeat_rate.change, repeat_rate.sign, repeat_rate.trend) == (10.0, '+', 'positive')
+    assert repeat_rate.formatted == '30.0%'
+    
+    measures = period_measures(on_time_deliveries=[45, 47], on_time_count=[50, 50])
+    on_time_rate = evaluate_metrics(measures, 'this_week', 'last_week', ['on_time_rate'])['on_time_rate']
+    assert (on_time_rate.change, on_time_rate.sign, on_time_rate.trend) == (4.0, '-', 'negative')
+
+@pytest.fixture
+def metric_registry_copy(monkeypatch):
+    """
+    Let a test register metrics without changing the registry of other tests.
+    """
+    monkeypatch.setattr(metric_registry, 'METRIC_REGISTRY', dict(METRIC_REGISTRY))
+    return metric_registry.METRIC_REGISTRY
+
+def test_metrics_of_unknown_measures_are_rejected(metric_registry_copy):
+    with pytest.raises(ValueError, match="Unknown measure 'refunds' in metric 'refund_rate'"):
+        register_metric(MetricDefinition('refund_rate', 'refunds', 'orders'))
+    assert 'refund_rate' not in metric_registry_copy
+
+def test_registered_metrics_are_evaluated_with_the_others(metric_registry_copy):
+    register_metric(MetricDefinition('items_per_order', 'items', 'orders', value_format='{:.2f}'))
+    assert get_required_measures(['items_per_order', 'revenue']) == ['revenue', 'items', 'orders']
+    
+    measures = period_measures(revenue=[300.0, 200.0], items=[9, 4], orders=[3, 2])
+    results = evaluate_metrics(measures, 'this_week', 'last_week', ['revenue', 'orders', 'aov', 'items_per_order'])
+    assert 'items_per_order' in metric_registry_copy
+    items_per_order = results['items_per_order']
+    assert (items_per_order.current, items_per_order.previous, items_per_order.change) == (3.0, 2.0, 50.0)
+    assert items_per_order.formatted == '3.00'
+
+def test_required_measures_are_listed_once_in_measure_order():
+    assert get_required_measures(['aov', 'revenue', 'delivery']) == ['revenue', 'orders', 'delivery_days_sum', 'delivery_days_count']
+    assert len(get_required_measures()) == len(set(get_required_measures()))
+
+def test_period_measures_aggregate_each_source():
+    periods = pd.CategoricalDtype(['this_week', 'last_week'])
+    period_frames = {
+        'revenue': pd.DataFrame({'period': pd.Series(['this_week', 'this_week', 'last_week'], dtype=periods), 'price': [10.0, 5.0, 7.5]}),
+        # No delivered order last week
+        'operations': pd.DataFrame({'period': pd.Series(['this_week', 'this_week'], dtype=periods), 'delivery_days': [4.0, None]})
+    }
+    measures = calculate_period_measures(period_frames, ['revenue', 'items', 'delivery_days_sum', 'delivery_days_count'])
+    assert measures.to_dict('index') == {
+        'this_week': {'revenue': 15.0, 'items': 2, 'delivery_days_sum': 4.0, 'delivery_days_count': 1},
+        'last_week': {'revenue': 7.5, 'items': 1, 'delivery_days_sum': 0.0, 'delivery_days_count': 0}
+    }
+
+def test_metric_values_and_trends():
+    measures = period_measures(orders=[3, 2.5], delivery_days_sum=[20.0, 30.0], delivery_days_count=[2, 2], revenue=[300.0, 0.0])
+    results = evaluate_metrics(measures, 'this_week', 'last_week', ['orders', 'delivery', 'revenue', 'aov'])
+    # Averaged baselines are rounded to whole orders
+    assert (results['orders'].previous, results['orders'].change) == (2, 50.0)
+    # Shorter deliveries are an improvement
+    assert (results['delivery'].change, results['delivery'].sign, results['delivery'].trend) == (33.3, '+', 'positive')
+    assert results['delivery'].formatted == '10.0 days'
+    # No baseline revenue counts as no change
+    assert (results['revenue'].change, results['revenue'].trend) == (0.0, 'neutral')
+    assert results['aov'].formatted == '$100.00'
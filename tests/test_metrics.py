@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+from metrics import calculate_percent_change, calculate_percent_changes, round_like_builtin
+
+def scalar_percent_change(current, previous, inverse_trend=False):
+    """
+    Frozen copy of the scalar rule calculate_percent_changes() must reproduce.
+    
+    Takes Python numbers: round() of a numpy scalar would round like np.round() instead.
+    """
+    if previous != 0:
+        percent_change = ((current - previous) / previous) * 100
+        if percent_change == 0:
+            sign = ''
+            trend = 'neutral'
+        else:
+            if inverse_trend:
+                sign = '+' if percent_change < 0 else '-'
+                trend = 'positive' if percent_change < 0 else 'negative'
+            else:
+                sign = '+' if percent_change > 0 else '-'
+                trend = 'positive' if percent_change > 0 else 'negative'
+    else:
+        percent_change = 0
+        sign = ''
+        trend = 'neutral'
+    
+    return round(abs(percent_change), 1), sign, trend
+
+def same_value(expected, actual):
+    return (math.isnan(expected) and math.isnan(actual)) or expected == actual
+
+def random_pairs(seed, size=5000):
+    """
+    Build current/previous arrays mixing ordinary, zero, NaN, near-tie and huge values.
+    """
+    rng = np.random.default_rng(seed)
+    previous = rng.normal(1000, 400, size).round(2)
+    current = previous * (1 + rng.normal(0, 0.2, size))
+    
+    kind = rng.integers(0, 8, size)
+    # Zero and NaN baselines, and NaN current values
+    previous[kind == 0] = 0
+    previous[kind == 1] = np.nan
+    current[kind == 2] = np.nan
+    # Changes landing on or just off a rounding tie, e.g. 0.35% and 1.35%
+    ties = kind == 3
+    tie_changes = rng.integers(0, 1000, ties.sum()) / 10 + 0.05
+    previous[ties] = rng.integers(1, 10000, ties.sum())
+    current[ties] = previous[ties] * (1 + rng.choice([-1, 1], ties.sum()) * tie_changes / 100)
+    # Huge values and changes
+    huge = kind == 4
+    current[huge] = rng.uniform(1e15, 1e20, huge.sum())
+    previous[huge] = rng.uniform(1, 1e6, huge.sum())
+    # No change at all
+    current[kind == 5] = previous[kind == 5]
+    return current, previous
+
+def assert_matches_scalar(current, previous, inverse_trend):
+    percent_changes, signs, trends = calculate_percent_changes(current, previous, inverse_trend)
+    flags = np.broadcast_to(inverse_trend, current.shape)
+    for i in range(len(current)):
+        expected = scalar_percent_change(float(current[i]), float(previous[i]), bool(flags[i]))
+        actual = (percent_changes[i].item(), signs[i].item(), trends[i].item())
+        assert same_value(expected[0], actual[0]) and expected[1:] == actual[1:], (current[i], previous[i], flags[i], expected, actual)
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('inverse_trend', [False, True])
+def test_array_matches_scalar_with_global_inverse_trend(seed, inverse_trend):
+    current, previous = random_pairs(seed)
+    assert_matches_scalar(current, previous, inverse_trend)
+
+@pytest.mark.parametrize('seed', range(4))
+def test_array_matches_scalar_with_inverse_trend_per_value(seed):
+    current, previous = random_pairs(100 + seed)
+    inverse_trend = np.random.default_rng(seed).integers(0, 2, len(current)).astype(bool)
+    assert_matches_scalar(current, previous, inverse_trend)
+
+@pytest.mark.parametrize('current, previous', [
+    (100.35, 100), (101.35, 100), (99.65, 100), (98.65, 100), (102.25, 100),
+    (1e18, 3), (-1e18, 7), (5, 0), (0, 5), (math.nan, 5), (5, math.nan), (5, 5)
+])
+@pytest.mark.parametrize('inverse_trend', [False, True])
+def test_scalar_wrapper_matches_scalar_rule(current, previous, inverse_trend):
+    expected = scalar_percent_change(current, previous, inverse_trend)
+    actual = calculate_percent_change(current, previous, inverse_trend)
+    assert same_value(expected[0], actual[0]) and expected[1:] == actual[1:]
+    assert type(actual[0]) is type(expected[0])
+
+def test_round_like_builtin_near_ties_and_huge_values():
+    values = np.array([0.35, 1.35, 2.675, 0.05, 0.15, 0.25, 1e15 + 0.3, 991795496409610.4, 1e17, 123456789.45, -0.35])
+    rounded = round_like_builtin(values, 1)
+    assert rounded.tolist() == [round(value, 1) for value in values.tolist()]
@@ -0,0 +1,88 @@
+import re
+
+import pandas as pd
+import pytest
+
+from report_maker import (
+    generate_ecommerce_report,
+    generate_ecommerce_reports,
+    get_report_dates,
+    read_inline_svg,
+    scale_baseline
+)
+
+def baseline(dates):
+    return dates['last_week_start'], dates['last_week_end'], dates['comparison_scale'], dates['comparison_label']
+
+def test_previous_baseline_is_the_window_before():
+    dates = get_report_dates('2017-05-01', '2017-05-07')
+    assert baseline(dates) == ('2017-04-24', '2017-04-30', 1.0, 'last week')
+    assert dates['window_days'] == 7
+    
+    # Without a start date the period is window_days long
+    dates = get_report_dates(this_week_end='2017-05-31', window_days=10)
+    assert (dates['this_week_start'], dates['window_days']) == ('2017-05-22', 10)
+    assert baseline(dates) == ('2017-05-12', '2017-05-21', 1.0, 'the previous 10 days')
+    assert dates['comparison_header'] == 'Previous 10 Days'
+
+def test_last_year_baseline_keeps_the_calendar_dates():
+    dates = get_report_dates('2017-05-01', '2017-05-07', comparison='last_year')
+    assert baseline(dates) == ('2016-05-01', '2016-05-07', 1.0, 'the same period last year')
+    
+    # A leap day maps onto the last day of February
+    dates = get_report_dates('2016-02-23', '2016-02-29', comparison='last_year')
+    assert baseline(dates)[:2] == ('2015-02-23', '2015-02-28')
+
+def test_trailing_4_weeks_baseline_is_scaled_to_the_window():
+    dates = get_report_dates('2017-05-01', '2017-05-07', comparison='trailing_4_weeks')
+    assert baseline(dates) == ('2017-04-03', '2017-04-30', 0.25, 'the trailing 4-week average')
+    
+    dates = get_report_dates('2017-05-01', '2017-05-31', comparison='trailing_4_weeks')
+    assert baseline(dates)[:3] == ('2017-04-03', '2017-04-30', 31 / 28)
+
+def test_report_dates_reject_bad_arguments():
+    with pytest.raises(ValueError):
+        get_report_dates('2017-05-01', '2017-05-07', comparison='last_month')
+    with pytest.raises(ValueError):
+        get_report_dates('2017-05-07', '2017-05-01')
+
+def test_scale_baseline_scales_only_the_baseline():
+    period_measures = pd.DataFrame({'revenue': [70.0, 280.0], 'orders': [7, 28]}, index=pd.Index(['this_week', 'last_week'], name='period'))
+    category_sales = pd.DataFrame({('sales', 'this_week'): [10.0], ('sales', 'last_week'): [40], ('orders', 'last_week'): [6]})
+    period_measures, [category_sales] = scale_baseline(period_measures, [category_sales], 'last_week', 0.25)
+    assert period_measures.loc['last_week'].tolist() == [70.0, 7.0]
+    assert period_measures.loc['this_week'].tolist() == [70.0, 7.0]
+    assert category_sales.iloc[0].tolist() == [10.0, 10.0, 1.5]
+
+def read_report(report_path):
+    with open(report_path, encoding='utf-8') as f:
+        return re.sub(r'Report generated on [^<]*', '', f.read())
+
+def test_batch_reports_use_the_alert_threshold(report_sources):
+    [batch_path] = generate_ecommerce_reports('2017-05-01', '2017-05-07', engine='pandas', processes=1,
+                                              chart_format='json', alert_threshold=1.0)
+    batch_report = read_report(batch_path)
+    assert batch_report == read_report(generate_ecommerce_report('2017-05-01', '2017-05-07', engine='pandas',
+                                                                 chart_format='json', alert_threshold=1.0))
+    # The default threshold flags fewer days
+    default_report = read_report(generate_ecommerce_report('2017-05-01', '2017-05-07', engine='pandas', chart_format='json'))
+    assert batch_report.count('&sigma;') > default_report.count('&sigma;')
+
+def test_inline_svg_drops_the_xml_prologue_and_metadata(tmp_path):
+    svg_path = tmp_path / 'chart.svg'
+    svg_path.write_text(
+        '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
+        '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"\n  "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
+        '<svg xmlns="http://www.w3.org/2000/svg">\n <metadata>\n  <rdf:RDF></rdf:RDF>\n </metadata>\n <g id="figure_1"/>\n</svg>\n',
+        encoding='utf-8'
+    )
+    assert read_inline_svg(str(svg_path)) == '<svg xmlns="http://www.w3.org/2000/svg">\n <g id="figure_1"/>\n</svg>\n'
+    assert read_inline_svg(str(tmp_path / 'missing.svg')) is None
+
+def test_svg_reports_inline_their_charts(report_sources):
+    report = read_report(generate_ecommerce_report('2017-05-01', '2017-05-07', engine='pandas', chart_format='svg'))
+    assert report.count('<svg') == 2
+    assert 'alt="Sales Trend Chart"' not in report and 'alt="Top 5 Product Categories Chart"' not in report
+    assert '<?xml' not in report and '<metadata>' not in report
+    # Chart element ids are seeded, so the same data gives the same report
+    assert report == read_report(generate_ecommerce_report('2017-05-01', '2017-05-07', engine='pandas', chart_format='svg'))
@@ -0,0 +1,75 @@
+import re
+
+import matplotlib.image as mpimg
+import numpy as np
+import pytest
+
+from visualizations import (
+    SalesTrendTemplate,
+    TopCategoriesTemplate,
+    create_sales_trend_chart,
+    create_top_categories_chart,
+    setup_visualization_style
+)
+
+@pytest.fixture(autouse=True)
+def visualization_style():
+    setup_visualization_style()
+
+def sales_trend_args(daily_revenue):
+    return {
+        'day_names': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        'daily_revenue': daily_revenue,
+        'order_counts': [3, 4, 2, 5, 2, 1, 2]
+    }
+
+def top_categories_args(categories, sales):
+    return {'categories': categories, 'sales': sales, 'max_categories': 3}
+
+def chart_texts(svg_path):
+    """
+    Return every label of an SVG chart, in drawing order.
+    """
+    with open(svg_path, encoding='utf-8') as f:
+        return re.findall(r'<text[^>]*>([^<]*)</text>', f.read())
+
+def test_new_sales_trend_template_matches_chart_function(tmp_path):
+    chart_args = sales_trend_args([1000.0, 1200.0, 900.0, 1500.0, 800.0, 600.0, 700.0])
+    assert create_sales_trend_chart(output_path=str(tmp_path / 'function.png'), **chart_args)
+    assert SalesTrendTemplate(7).render(output_path=str(tmp_path / 'template.png'), **chart_args)
+    np.testing.assert_array_equal(mpimg.imread(tmp_path / 'template.png'), mpimg.imread(tmp_path / 'function.png'))
+
+def test_new_top_categories_template_matches_chart_function(tmp_path):
+    # Unsorted and longer than max_categories
+    chart_args = top_categories_args(('Toys', 'Books', 'Garden', 'Tools'), (200.0, 300.0, 100.0, 50.0))
+    assert create_top_categories_chart(output_path=str(tmp_path / 'function.png'), **chart_args)
+    assert TopCategoriesTemplate(3).render(output_path=str(tmp_path / 'template.png'), **chart_args)
+    np.testing.assert_array_equal(mpimg.imread(tmp_path / 'template.png'), mpimg.imread(tmp_path / 'function.png'))
+
+def test_reused_sales_trend_template_draws_the_new_data(tmp_path):
+    template = SalesTrendTemplate(7)
+    assert template.render(output_path=str(tmp_path / 'first.svg'), **sales_trend_args([10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0]))
+    
+    # The layout is kept from the first chart, but labels and limits follow the data
+    chart_args = sales_trend_args([1000.0, 1200.0, 900.0, 1500.0, 800.0, 600.0, 700.0])
+    assert template.render(output_path=str(tmp_path / 'template.svg'), **chart_args)
+    assert create_sales_trend_chart(output_path=str(tmp_path / 'function.svg'), **chart_args)
+    assert chart_texts(tmp_path / 'template.svg') == chart_texts(tmp_path / 'function.svg')
+
+def test_reused_top_categories_template_draws_the_new_data(tmp_path):
+    template = TopCategoriesTemplate(3)
+    assert template.render(output_path=str(tmp_path / 'first.svg'), **top_categories_args(('a', 'b', 'c'), (5.0, 4.0, 3.0)))
+    
+    chart_args = top_categories_args(('Toys', 'Books', 'Garden', 'Tools'), (200.0, 300.0, 100.0, 50.0))
+    assert template.render(output_path=str(tmp_path / 'template.svg'), **chart_args)
+    assert create_top_categories_chart(output_path=str(tmp_path / 'function.svg'), **chart_args)
+    texts = chart_texts(tmp_path / 'template.svg')
+    assert texts == chart_texts(tmp_path / 'function.svg')
+    assert texts[:3] == ['Books', 'Toys', 'Garden']
+
+def test_templates_reject_charts_of_another_size(tmp_path):
+    chart_args = sales_trend_args([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+    assert not SalesTrendTemplate(5).render(output_path=str(tmp_path / 'trend.png'), **chart_args)
+    chart_args = top_categories_args(('Toys', 'Books'), (200.0, 300.0))
+    assert not TopCategoriesTemplate(3).render(output_path=str(tmp_path / 'categories.png'), **chart_args)
+    assert not list(tmp_path.iterdir())